@@ -57,6 +57,8 @@ def genfiles(package, package_name, modules, dir='api'):
 modules=[
     #('__init__', 'Top level namespace'),
     #('alignment', 'GPU data alignment [unused]'),
+    ('batch', 'Parallel batch fitting'),
+    ('bench', 'Kernel benchmarks'),
     ('bumps_model', 'Bumps interface'),
     ('compare', 'Compare models on different compute engines'),
     ('convert', 'Sasview to sasmodel converter'),
@@ -68,6 +70,7 @@ modules=[
     #('frozendict', 'Freeze a dictionary to make it immutable'),
     ('generate', 'Model parser'),
     ('kernel', 'Evaluator type definitions'),
+    ('kernelcache', 'Cached model evaluator'),
     ('kernelcl', 'OpenCL model evaluator'),
     ('kerneldll', 'Ctypes model evaluator'),
     ('kernelpy', 'Python model evaluator'),
@@ -75,6 +78,7 @@ modules=[
     ('mixture', 'Mixture model evaluator'),
     ('model_test', 'Unit test support'),
     ('modelinfo', 'Parameter and model definitions'),
+    ('perf', 'Performance counters'),
     ('product', 'Product model evaluator'),
     ('resolution', '1-D resolution functions'),
     ('resolution2d', '2-D resolution functions'),
@@ -0,0 +1,54 @@
+"""
+Generate the sin/cos tables in sasmodels/models/lib/gaussN_sincos.c
+from the Gauss-Legendre nodes in sasmodels/models/lib/gaussN.c.
+
+Usage::
+
+    cd sasmodels/models/lib
+    python ../../../explore/gauss_sincos.py
+"""
+import re
+
+import numpy as np
+
+HEADER = """\
+/*
+ *  sin and cos of the %(n)d point Gauss-Legendre nodes mapped to [0, pi/2],
+ *
+ *      alpha = pi/4 (Gauss%(n)dZ[i] + 1)
+ *
+ *  for orientation averages over alpha, which can use
+ *  Gauss%(n)dSin[i] and Gauss%(n)dCos[i] in place of SINCOS(alpha, sn, cn).
+ *
+ *  Use with the weights in lib/gauss%(n)d.c.  Generated from the Gauss%(n)dZ
+ *  table using numpy; regenerate if that table changes.
+ */
+"""
+
+def read_nodes(n):
+    """Read the Gauss%dZ table from gauss%d.c"""
+    with open('gauss%d.c'%n) as fid:
+        source = fid.read()
+    match = re.search(r'Gauss%dZ\[[^\]]*\]\s*=\s*\{(.*?)\}'%n, source, re.S)
+    body = re.sub(r'//[^\n]*', '', match.group(1))
+    z = np.array([float(v) for v in body.split(',') if v.strip()])
+    assert len(z) == n
+    return z
+
+def table(name, v):
+    """Format *v* as a constant double table called *name*"""
+    lines = ["constant double %s[%d]={"%(name, len(v))]
+    lines += ["\t%.17g,"%x for x in v[:-1]]
+    lines += ["\t%.17g"%v[-1], "};"]
+    return "\n".join(lines)
+
+def main():
+    for n in (20, 76, 150):
+        alpha = np.pi/4*(read_nodes(n) + 1)
+        with open('gauss%d_sincos.c'%n, 'w') as fid:
+            fid.write(HEADER%{'n': n})
+            fid.write("\n" + table("Gauss%dSin"%n, np.sin(alpha)) + "\n\n")
+            fid.write(table("Gauss%dCos"%n, np.cos(alpha)) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare OpenCL kernel times for fixed work group sizes against the size
+chosen by the tuner in sasmodels.kernelcl.
+
+Usage::
+
+    python explore/ocl_worksize.py [model] [nq] [pd_n]
+
+Use PYOPENCL_CTX to select the device, e.g., the CPU OpenCL driver.  The
+tuning table is not written, so the timings do not depend on earlier runs.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import numpy as np
+
+from sasmodels import kernelcl
+from sasmodels.core import load_model_info, build_model
+from sasmodels.direct_model import call_kernel
+
+def run(model_name='cylinder', nq=1000, pd_n=35, repeats=5):
+    kernelcl.TUNE, kernelcl.TUNING_PATH = True, None
+    model_info = load_model_info(model_name)
+    model = build_model(model_info, dtype='single', platform='ocl')
+    q = np.logspace(-3, -0.5, nq)
+    kernel = model.make_kernel([q])
+    pars = {'radius_pd': 0.1, 'radius_pd_n': pd_n,
+            'length_pd': 0.1, 'length_pd_n': pd_n}
+
+    def timeit():
+        call_kernel(kernel, pars)  # warm up
+        start = time.time()
+        for _ in range(repeats):
+            call_kernel(kernel, pars)
+        return (time.time() - start)/repeats*1000.
+
+    env = kernelcl.environment()
+    cl_kernel = kernel.kernel[0]
+    device = kernel.queue.device.name.strip()
+    print("%s on %s with nq=%d and %d pd points"
+          % (model_name, device, nq, pd_n**2))
+    print("boundary: %d" % kernel.q_input.boundary)
+
+    warp = kernelcl.get_warp(cl_kernel, kernel.queue)
+    sizes = [None] + [warp*2**k for k in range(8)
+                      if warp*2**k <= kernelcl.MAX_TUNING_SIZE]
+    for size in sizes:
+        env.set_local_size(cl_kernel, kernel.queue, kernel.dtype, size)
+        print("local size %4s: %8.2f ms" % (size, timeit()))
+
+    env.tuning.clear()
+    call_kernel(kernel, pars)  # triggers tuning
+    tuned = env.get_local_size(cl_kernel, kernel.queue, kernel.dtype)
+    print("tuned %4s:      %8.2f ms" % (tuned, timeit()))
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(model_name=args[0] if len(args) > 0 else 'cylinder',
+        nq=int(args[1]) if len(args) > 1 else 1000,
+        pd_n=int(args[2]) if len(args) > 2 else 35)
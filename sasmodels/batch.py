@@ -0,0 +1,206 @@
+"""
+Batch fitting
+-------------
+
+Fit the same kind of model to many datasets using a pool of processes.
+
+Each job is a tuple *(data, model, pars)* where *data* is a
+:class:`data.Data1D`, :class:`data.Data2D` or :class:`data.SESANSData1D`
+object, *model* is the model name as accepted by
+:func:`core.load_model_info`, and *pars* is a dictionary of initial
+parameter values.  Parameters to be fitted are given as
+*(value, (low, high))*, with the fit range as the second element.  For
+example::
+
+    from sasmodels.batch import fit_jobs
+    from sasmodels.data import load_data
+
+    jobs = []
+    for filename in filenames:
+        pars = {'radius': (50., (10., 200.)), 'scale': (0.01, (0., 1.)),
+                'background': (0.001, (0., 1.)), 'radius_pd': 0.1}
+        jobs.append((load_data(filename), 'sphere', pars))
+    for result in fit_jobs(jobs, method='lm'):
+        print(result['index'], result['chisq'], result['values'])
+
+Results are returned as each fit completes, which is not necessarily the
+order of the jobs.  Each result is a dictionary with the job *index*, the
+fitted *values* and their uncertainty *errors*, keyed by parameter name,
+the normalized *chisq*, the wall clock *time* for the job in seconds, and
+*error*, which is None unless the fit raised an exception, in which case
+it is the formatted traceback.
+
+For the dll platform, the models are built in the parent before the pool
+starts so that the compiled DLLs are written once to
+:data:`kerneldll.DLL_PATH` and reused by the workers.  Each worker builds
+its own kernels.  Fitting requires bumps.
+"""
+from __future__ import print_function, division
+
+import os
+import time
+import traceback
+import multiprocessing
+
+from . import core
+from .bumps_model import Model, Experiment
+
+try:
+    from typing import Any, Dict, Iterator, List, Tuple, Union
+    from .data import Data1D, Data2D
+    Data = Union[Data1D, Data2D]
+    Job = Tuple[Data, str, Dict[str, Any]]
+except ImportError:
+    pass
+
+# Models built within the current process, keyed by model name.
+_MODELS = {}  # type: Dict[str, Any]
+# Options shared by the jobs in the current process.
+_OPTIONS = {}  # type: Dict[str, Any]
+
+
+def fit_jobs(jobs, method='lm', processes=None, threads=1,
+             dtype=None, platform='dll', cutoff=1e-5, **fit_options):
+    # type: (List[Job], str, int, int, str, str, float, **Any) -> Iterator[Dict[str, Any]]
+    """
+    Fit each job in *jobs*, yielding the results as they complete.
+
+    *method* is the bumps fit method, with any additional *fit_options*
+    passed to :func:`bumps.fitters.fit`.
+
+    *processes* is the number of worker processes, defaulting to the
+    number of CPUs.  Use *processes=1* to run the fits in the current
+    process.
+
+    *threads* is the number of OpenMP threads used by each worker when
+    evaluating DLL kernels.  Since the jobs are already running in
+    parallel, the default is one thread per worker.
+
+    *dtype*, *platform* and *cutoff* control the model evaluation as for
+    :func:`core.build_model` and :class:`bumps_model.Experiment`.
+    """
+    options = dict(method=method, dtype=dtype, platform=platform,
+                   cutoff=cutoff, fit_options=fit_options)
+    # Compile the dlls once so the workers share them.  OpenCL contexts
+    # cannot be shared across a fork, so OpenCL models are built by the
+    # workers.
+    if platform == 'dll':
+        for name in sorted(set(job[1] for job in jobs)):
+            _get_model(name, dtype, platform)
+    tasks = [(index, job) for index, job in enumerate(jobs)]
+
+    if processes == 1:
+        _init_worker(options, None)
+        for task in tasks:
+            yield _fit_task(task)
+        return
+
+    pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                initargs=(options, threads))
+    try:
+        for result in pool.imap_unordered(_fit_task, tasks):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker(options, threads):
+    # type: (Dict[str, Any], int) -> None
+    """
+    Set the job options and thread count for the current process.
+    """
+    if threads is not None:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+    _OPTIONS.clear()
+    _OPTIONS.update(options)
+
+
+def _get_model(name, dtype, platform):
+    # type: (str, str, str) -> Any
+    """
+    Return the kernel model for *name*, building it if necessary.
+    """
+    if name not in _MODELS:
+        model_info = core.load_model_info(name)
+        _MODELS[name] = core.build_model(model_info, dtype=dtype,
+                                         platform=platform)
+    return _MODELS[name]
+
+
+def _fit_task(task):
+    # type: (Tuple[int, Job]) -> Dict[str, Any]
+    """
+    Fit a single job, returning the result dictionary.
+    """
+    index, (data, name, pars) = task
+    start = time.time()
+    result = {'index': index, 'model': name, 'values': {}, 'errors': {},
+              'chisq': None, 'error': None}
+    try:
+        from bumps.names import FitProblem  # type: ignore
+        from bumps.fitters import fit  # type: ignore
+
+        options = _OPTIONS
+        kernel_model = _get_model(name, options['dtype'], options['platform'])
+        values = dict((k, v[0] if isinstance(v, tuple) else v)
+                      for k, v in pars.items())
+        model = Model(kernel_model, **values)
+        for k, v in pars.items():
+            if isinstance(v, tuple):
+                getattr(model, k).range(*v[1])
+        experiment = Experiment(data, model, cutoff=options['cutoff'])
+        problem = FitProblem(experiment)
+        fitted = fit(problem, method=options['method'], verbose=False,
+                     **options['fit_options'])
+        problem.setp(fitted.x)
+        labels = problem.labels()
+        result['values'] = dict(zip(labels, fitted.x))
+        if fitted.dx is not None:
+            result['errors'] = dict(zip(labels, fitted.dx))
+        result['chisq'] = problem.chisq()
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['time'] = time.time() - start
+    return result
+
+
+def test_fit_jobs():
+    # type: () -> None
+    """
+    Check the result fields for good jobs and for a job which raises.
+    """
+    import unittest
+    try:
+        import bumps  # type: ignore # pylint: disable=unused-import
+    except ImportError:
+        raise unittest.SkipTest("bumps is not available")
+    import numpy as np  # type: ignore
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    q = np.logspace(-3, -1.5, 50)
+    data = empty_data1D(q)
+    model = _get_model('sphere', 'double', 'dll')
+    data.y = DirectModel(data, model)(radius=60., scale=0.01,
+                                      background=0.001)
+    data.dy = 0.01*data.y
+    pars = {'radius': (55., (10., 200.)), 'scale': 0.01, 'background': 0.001}
+    jobs = [
+        (data, 'sphere', pars),
+        (data, 'sphere', dict(pars, no_such_parameter=1.0)),
+        (data, 'sphere', pars),
+        ]
+    results = list(fit_jobs(jobs, method='lm', processes=1, dtype='double',
+                            steps=200))
+    assert sorted(r['index'] for r in results) == [0, 1, 2]
+    for result in results:
+        assert result['time'] >= 0.
+        if result['index'] == 1:
+            assert 'no_such_parameter' in result['error']
+            assert result['chisq'] is None and not result['values']
+        else:
+            assert result['error'] is None, result['error']
+            assert abs(result['values']['radius'] - 60.) < 0.05
+            assert result['chisq'] < 0.01
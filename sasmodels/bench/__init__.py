@@ -0,0 +1,29 @@
+"""
+Kernel benchmarks
+=================
+
+Time the model kernels across models, compute platforms, precisions,
+1D/2D data and polydispersity mesh sizes, and compare the timings
+against a saved baseline.
+
+From the command line::
+
+    python -m sasmodels.bench --json bench.json
+    python -m sasmodels.bench sphere cylinder --baseline bench.json
+
+See :func:`main` for the options.  From python::
+
+    from sasmodels.bench import run_benchmarks, compare_results
+    results = run_benchmarks(['sphere'], platforms=['dll'], pd_sizes=[1, 35])
+"""
+from .sweep import run_benchmarks, time_kernel
+from .report import (save_json, load_json, save_csv, compare_results,
+                     print_results, print_regressions)
+from .cli import main
+
+__all__ = [
+    "run_benchmarks", "time_kernel",
+    "save_json", "load_json", "save_csv", "compare_results",
+    "print_results", "print_regressions",
+    "main",
+]
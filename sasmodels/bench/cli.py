@@ -0,0 +1,94 @@
+"""
+Command line interface for the kernel benchmarks.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+
+from .sweep import run_benchmarks, PLATFORMS, DTYPES, DIMS, PD_SIZES
+from .report import (save_json, load_json, save_csv, compare_results,
+                     print_record, print_regressions)
+
+try:
+    from typing import List, Optional
+except ImportError:
+    pass
+
+
+def _split(value):
+    # type: (str) -> List[str]
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def _parser():
+    # type: () -> argparse.ArgumentParser
+    parser = argparse.ArgumentParser(
+        prog="python -m sasmodels.bench",
+        description="Benchmark the sasmodels kernels.")
+    parser.add_argument(
+        'models', nargs='*',
+        help="models to benchmark (default: all models)")
+    parser.add_argument(
+        '--platform', type=_split, default=PLATFORMS,
+        help="comma separated platforms (default: %s)" % ",".join(PLATFORMS))
+    parser.add_argument(
+        '--dtype', type=_split, default=DTYPES,
+        help="comma separated precisions (default: %s)" % ",".join(DTYPES))
+    parser.add_argument(
+        '--dim', type=_split, default=DIMS,
+        help="comma separated dimensions (default: %s)" % ",".join(DIMS))
+    parser.add_argument(
+        '--pd', type=lambda v: [int(k) for k in _split(v)], default=PD_SIZES,
+        help="comma separated polydispersity mesh sizes (default: %s)"
+        % ",".join(str(k) for k in PD_SIZES))
+    parser.add_argument(
+        '--nq', type=int, default=128,
+        help="number of q points for 1D (default: 128)")
+    parser.add_argument(
+        '--nq2d', type=int, default=32,
+        help="number of q points on each side for 2D (default: 32)")
+    parser.add_argument(
+        '--time', type=float, default=0.2,
+        help="minimum seconds for each configuration (default: 0.2)")
+    parser.add_argument(
+        '--json', help="save results to this JSON file")
+    parser.add_argument(
+        '--csv', help="save results to this CSV file")
+    parser.add_argument(
+        '--baseline', help="compare against results in this JSON file")
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help="allowed fractional slowdown from baseline (default: 0.2)")
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help="don't print results as they complete")
+    return parser
+
+
+def main(argv=None):
+    # type: (Optional[List[str]]) -> int
+    """
+    Run the benchmarks from the command line.
+
+    Returns 1 if any configuration is slower than the baseline by more
+    than the tolerance, or 0 otherwise.  Use "--help" for the options.
+    """
+    opts = _parser().parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_benchmarks(
+        models=opts.models if opts.models else None,
+        platforms=opts.platform, dtypes=opts.dtype, dims=opts.dim,
+        pd_sizes=opts.pd, nq=opts.nq, nq2d=opts.nq2d, min_time=opts.time,
+        progress=None if opts.quiet else print_record)
+    if opts.json:
+        save_json(opts.json, results)
+    if opts.csv:
+        save_csv(opts.csv, results)
+    if opts.baseline:
+        regressions = compare_results(results, load_json(opts.baseline),
+                                      tolerance=opts.tolerance)
+        print_regressions(regressions)
+        print("%d regressions in %d configurations"
+              % (len(regressions), len(results)))
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,138 @@
+"""
+Save benchmark results and compare them against a baseline.
+
+Results are stored as a list of records, one per configuration, as
+returned by :func:`sasmodels.bench.sweep.run_benchmarks`.  JSON files
+keep the records along with information about the machine so they can
+be reloaded as a baseline; CSV files are for spreadsheets.
+"""
+from __future__ import print_function, division
+
+import csv
+import json
+import platform
+import time
+
+try:
+    from typing import Any, Dict, List, Tuple
+except ImportError:
+    pass
+
+#: Fields identifying a configuration.
+KEY_FIELDS = ['model', 'platform', 'dtype', 'dim', 'nq', 'pd_n']
+#: Fields in the CSV output, in column order.
+CSV_FIELDS = KEY_FIELDS + ['calls', 'seconds', 'ms_per_call',
+                           'evals_per_sec', 'error']
+
+
+def save_json(filename, results):
+    # type: (str, List[Dict[str, Any]]) -> None
+    """
+    Save *results* to *filename* as JSON, along with the machine details.
+    """
+    from .. import __version__
+    content = {
+        'version': __version__,
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'machine': platform.node(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    with open(filename, 'w') as fid:
+        json.dump(content, fid, indent=1, sort_keys=True)
+
+
+def load_json(filename):
+    # type: (str) -> List[Dict[str, Any]]
+    """
+    Load the results saved by :func:`save_json`.
+    """
+    with open(filename) as fid:
+        return json.load(fid)['results']
+
+
+def save_csv(filename, results):
+    # type: (str, List[Dict[str, Any]]) -> None
+    """
+    Save *results* to *filename* as comma separated values.
+    """
+    with open(filename, 'w') as fid:
+        writer = csv.DictWriter(fid, fieldnames=CSV_FIELDS,
+                                extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for record in results:
+            writer.writerow(record)
+
+
+def _key(record):
+    # type: (Dict[str, Any]) -> Tuple
+    return tuple(record[k] for k in KEY_FIELDS)
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    # type: (List[Dict[str, Any]], List[Dict[str, Any]], float) -> List[Dict[str, Any]]
+    """
+    Compare *results* against *baseline*, returning the regressions.
+
+    A configuration has regressed if its evaluation rate is less than
+    *(1 - tolerance)* times the baseline rate, or if it fails when the
+    baseline did not.  Configurations missing from either set are
+    ignored.  Each regression is a copy of the result record with
+    *baseline_evals_per_sec* and *ratio* (new rate over baseline rate)
+    added.
+    """
+    previous = dict((_key(record), record) for record in baseline)
+    regressions = []
+    for record in results:
+        base = previous.get(_key(record), None)
+        if base is None or 'evals_per_sec' not in base:
+            continue
+        rate = record.get('evals_per_sec', 0.)
+        ratio = rate/base['evals_per_sec']
+        if ratio < 1. - tolerance:
+            regression = dict(record)
+            regression['baseline_evals_per_sec'] = base['evals_per_sec']
+            regression['ratio'] = ratio
+            regressions.append(regression)
+    return regressions
+
+
+def _label(record):
+    # type: (Dict[str, Any]) -> str
+    return "%s %s %s %s pd=%d" % (record['model'], record['platform'],
+                                 record['dtype'], record['dim'],
+                                 record['pd_n'])
+
+
+def print_results(results):
+    # type: (List[Dict[str, Any]]) -> None
+    """
+    Print a table of results.
+    """
+    for record in results:
+        print_record(record)
+
+
+def print_record(record):
+    # type: (Dict[str, Any]) -> None
+    """
+    Print one line of the results table.
+    """
+    if 'error' in record:
+        print("%-50s  error: %s" % (_label(record), record['error']))
+    else:
+        print("%-50s %10.3f ms %12.4g evals/s"
+              % (_label(record), record['ms_per_call'],
+                 record['evals_per_sec']))
+
+
+def print_regressions(regressions):
+    # type: (List[Dict[str, Any]]) -> None
+    """
+    Print a table of regressions.
+    """
+    for record in regressions:
+        print("REGRESSION %-50s %12.4g evals/s (baseline %.4g, ratio %.2f)"
+              % (_label(record), record.get('evals_per_sec', 0.),
+                 record['baseline_evals_per_sec'], record['ratio']))
@@ -0,0 +1,205 @@
+"""
+Run the kernel timings for each benchmark configuration.
+
+A configuration is a model on a compute platform at a precision, with
+1D or 2D q values and a polydispersity mesh size.  The mesh size is the
+number of points in the distribution of the first polydisperse
+parameter of the model; the other parameters are monodisperse, so the
+cost is proportional to the mesh size for all models.
+"""
+from __future__ import print_function, division
+
+import time
+import traceback
+
+import numpy as np  # type: ignore
+
+from .. import core
+from ..direct_model import call_kernel
+
+try:
+    from typing import Any, Dict, List, Optional, Tuple
+    from ..kernel import Kernel
+    from ..modelinfo import ModelInfo
+except ImportError:
+    pass
+
+#: Platforms to benchmark, if available.  Python models always run on
+#: the "python" platform, in double precision.
+PLATFORMS = ['dll', 'ocl']
+#: Precisions to benchmark.
+DTYPES = ['single', 'double']
+#: Data dimensions to benchmark.
+DIMS = ['1d', '2d']
+#: Polydispersity mesh sizes to benchmark.
+PD_SIZES = [1, 10, 35]
+
+
+def make_q(dim, nq):
+    # type: (str, int) -> List[np.ndarray]
+    """
+    Return the q vectors for the benchmark.
+
+    For *dim="1d"* this is *nq* log spaced points from 0.001 to 0.5.  For
+    *dim="2d"* it is an *nq* x *nq* grid from -0.5 to 0.5 in qx and qy.
+    """
+    if dim == '1d':
+        return [np.logspace(-3, np.log10(0.5), nq)]
+    q = np.linspace(-0.5, 0.5, nq)
+    qx, qy = np.meshgrid(q, q)
+    return [qx.flatten(), qy.flatten()]
+
+
+def make_pars(model_info, pd_n):
+    # type: (ModelInfo, int) -> Dict[str, float]
+    """
+    Return the parameters for the benchmark, with a 10% gaussian
+    distribution of *pd_n* points on the first polydisperse parameter.
+    """
+    pars = {}  # type: Dict[str, float]
+    if pd_n > 1:
+        for p in model_info.parameters.call_parameters:
+            if p.polydisperse and p.type != 'orientation':
+                pars[p.name + '_pd'] = 0.1
+                pars[p.name + '_pd_n'] = pd_n
+                break
+    return pars
+
+
+def time_kernel(kernel, pars, min_time=0.2, max_calls=1000):
+    # type: (Kernel, Dict[str, float], float, int) -> Tuple[int, float]
+    """
+    Call the *kernel* with *pars* until at least *min_time* seconds have
+    passed or *max_calls* calls have been made, returning the number of
+    calls and the total time.
+
+    One extra call is made before timing starts, so that compilation and
+    memory allocation are not included.
+    """
+    call_kernel(kernel, pars)
+    calls, start = 0, time.time()
+    while True:
+        call_kernel(kernel, pars)
+        calls += 1
+        elapsed = time.time() - start
+        if elapsed >= min_time or calls >= max_calls:
+            return calls, elapsed
+
+
+def run_benchmarks(models=None, platforms=None, dtypes=None, dims=None,
+                   pd_sizes=None, nq=128, nq2d=32, min_time=0.2,
+                   progress=None):
+    # type: (Optional[List[str]], Optional[List[str]], Optional[List[str]], Optional[List[str]], Optional[List[int]], int, int, float, Any) -> List[Dict[str, Any]]
+    """
+    Time each combination of *models*, *platforms*, *dtypes*, *dims* and
+    *pd_sizes*, returning a list of result records.
+
+    *models* defaults to all models from :func:`core.list_models`, and
+    the remaining options default to :data:`PLATFORMS`, :data:`DTYPES`,
+    :data:`DIMS` and :data:`PD_SIZES`.  Configurations which are not
+    available, such as OpenCL without pyopencl or single precision for
+    models which require double precision, are skipped.
+
+    *nq* is the number of 1D q points, and *nq2d* is the number of q
+    points along each side of the 2D grid.
+
+    *min_time* is the minimum time in seconds spent on each configuration.
+
+    *progress*, if given, is called with each record as it completes.
+
+    Each record has *model*, *platform*, *dtype*, *dim*, *nq* (total number
+    of q points), *pd_n*, *calls*, *seconds*, *ms_per_call* and
+    *evals_per_sec*, the number of I(q) evaluations per second, counting
+    each q point and each point in the polydispersity mesh.  If the model
+    fails to build or run, the record has *error* set to the exception
+    message instead of the timing.  Mesh sizes above one are skipped for
+    models without polydisperse parameters.
+    """
+    models = core.list_models() if models is None else models
+    platforms = PLATFORMS if platforms is None else platforms
+    dtypes = DTYPES if dtypes is None else dtypes
+    dims = DIMS if dims is None else dims
+    pd_sizes = PD_SIZES if pd_sizes is None else pd_sizes
+
+    results = []  # type: List[Dict[str, Any]]
+    for name in models:
+        model_info = core.load_model_info(name)
+        for platform, dtype in _engines(model_info, platforms, dtypes):
+            model, error = None, None
+            try:
+                model = core.build_model(model_info, dtype=dtype,
+                                         platform=platform)
+            except Exception as exc:
+                error = _format_error(exc)
+            for dim in dims:
+                q_vectors = make_q(dim, nq if dim == '1d' else nq2d)
+                kernel = None
+                if model is not None:
+                    try:
+                        kernel = model.make_kernel(q_vectors)
+                    except Exception as exc:
+                        error = _format_error(exc)
+                for pd_n in pd_sizes:
+                    pars = make_pars(model_info, pd_n)
+                    if pd_n > 1 and not pars:
+                        continue  # no polydisperse parameters
+                    record = {
+                        'model': name, 'platform': platform, 'dtype': dtype,
+                        'dim': dim, 'nq': len(q_vectors[0]), 'pd_n': pd_n,
+                    }
+                    if kernel is None:
+                        record['error'] = error
+                    else:
+                        _time_record(record, kernel, pars, min_time)
+                    results.append(record)
+                    if progress is not None:
+                        progress(record)
+                if kernel is not None:
+                    kernel.release()
+            if model is not None:
+                model.release()
+    return results
+
+
+def _engines(model_info, platforms, dtypes):
+    # type: (ModelInfo, List[str], List[str]) -> List[Tuple[str, str]]
+    """
+    Return the available (platform, dtype) pairs for the model.
+    """
+    if callable(model_info.Iq):
+        return [('python', 'double')]
+    engines = []
+    for platform in platforms:
+        for dtype in dtypes:
+            if dtype == 'single' and not model_info.single:
+                continue
+            numpy_dtype, _, actual = core.parse_dtype(
+                model_info, dtype=dtype, platform=platform)
+            if actual == platform and numpy_dtype.name == np.dtype(dtype).name:
+                engines.append((platform, dtype))
+    return engines
+
+
+def _time_record(record, kernel, pars, min_time):
+    # type: (Dict[str, Any], Kernel, Dict[str, float], float) -> None
+    """
+    Time the kernel, storing the results in *record*.
+    """
+    try:
+        calls, seconds = time_kernel(kernel, pars, min_time=min_time)
+    except Exception as exc:
+        record['error'] = _format_error(exc)
+        return
+    record['calls'] = calls
+    record['seconds'] = seconds
+    record['ms_per_call'] = 1000.*seconds/calls
+    record['evals_per_sec'] = record['nq']*record['pd_n']*calls/seconds
+
+
+def _format_error(exc):
+    # type: (Exception) -> str
+    """
+    Return the last line of the exception message.
+    """
+    lines = traceback.format_exception_only(type(exc), exc)
+    return lines[-1].strip()
@@ -0,0 +1,27 @@
+"""
+Tests for the kernel benchmarks.
+"""
+from __future__ import print_function, division
+
+from .report import compare_results
+
+
+def test_compare_results():
+    """
+    Check that slow and failing configurations are flagged.
+    """
+    def record(model, rate):
+        result = dict(model=model, platform='dll', dtype='double', dim='1d',
+                      nq=128, pd_n=1)
+        if rate is None:
+            result['error'] = 'failed'
+        else:
+            result['evals_per_sec'] = rate
+        return result
+    baseline = [record('a', 100.), record('b', 100.), record('c', 100.),
+                record('d', None)]
+    results = [record('a', 90.), record('b', 50.), record('c', None),
+               record('d', 10.), record('e', 1.)]
+    regressions = compare_results(results, baseline, tolerance=0.2)
+    assert [r['model'] for r in regressions] == ['b', 'c']
+    assert regressions[0]['ratio'] == 0.5
@@ -9,18 +9,24 @@ arguments to set the initial value for each parameter.
 the sasview data loader.  *Experiment* takes a *cutoff* parameter controlling
 how far the polydispersity integral extends.
 
+:class:`MultiExperiment` combines the *Model* function with several data
+files which share all the model parameters, such as measurements at
+different detector distances, and evaluates them in one kernel call.
+
 """
 from __future__ import print_function
 
-__all__ = ["Model", "Experiment"]
+__all__ = ["Model", "Experiment", "MultiExperiment"]
+
+from copy import copy
 
 import numpy as np  # type: ignore
 
 from .data import plot_theory
-from .direct_model import DataMixin
+from .direct_model import DataMixin, MultiDirectModel
 
 try:
-    from typing import Dict, Union, Tuple, Any
+    from typing import Dict, Union, Tuple, Any, Optional, List
     from .data import Data1D, Data2D
     from .kernel import KernelModel
     from .modelinfo import ModelInfo
@@ -115,6 +121,22 @@ class Model(object):
         pars.update((k, getattr(self, k)) for k in self._pd_type_names)
         return pars
 
+def _linear_parameters(model_info):
+    # type: (ModelInfo) -> List[str]
+    """
+    Return the names of the parameters which enter the theory linearly.
+
+    For mixture models, the overall scale is degenerate with the
+    component scales, so only the component scales are returned.
+    """
+    composition = model_info.composition
+    if composition is not None and composition[0] == 'mixture':
+        names = [chr(ord('A')+k) + '_scale'
+                 for k, _ in enumerate(composition[1])]
+    else:
+        names = ['scale']
+    return names + ['background']
+
 class Experiment(DataMixin):
     r"""
     Bumps wrapper for a SAS experiment.
@@ -129,15 +151,44 @@ class Experiment(DataMixin):
     *cutoff* is the integration cutoff, which avoids computing the
     the SAS model where the polydispersity weight is low.
 
+    *coverage*, if not None, is the fraction of the total polydispersity
+    weight to integrate, which is used in place of *cutoff*.  The
+    fraction achieved by the last evaluation is available as *pd_coverage*.
+
     The resulting model can be used directly in a Bumps FitProblem call.
+
+    The theory without *scale* and *background* is kept between updates,
+    so a fit step which only changes *scale* or *background* does not
+    need to evaluate the kernel.
+
+    If *linear* is True, the parameters which enter the theory linearly
+    are solved by weighted least squares for each set of nonlinear
+    parameters (variable projection), and are not returned from
+    :meth:`parameters`, so the fitter only searches the nonlinear
+    parameters.  The linear parameters are *scale* and *background*, or
+    for mixture models the component scales *A_scale*, *B_scale*, ...
+    and *background*, with the overall *scale* held fixed.  The solved
+    values are stored in the model parameters after each evaluation.
+    The least squares solution is unconstrained, so it ignores the
+    limits on the linear parameters.  This is not available for SESANS
+    data.
     """
     _cache = None # type: Dict[str, np.ndarray]
-    def __init__(self, data, model, cutoff=1e-5):
-        # type: (Data, Model, float) -> None
+    _unscaled = None # type: Tuple[Tuple[Any, ...], np.ndarray, Any]
+    _basis = None # type: Tuple[Tuple[Any, ...], np.ndarray, Optional[np.ndarray]]
+    _background = None # type: np.ndarray
+    def __init__(self, data, model, cutoff=1e-5, coverage=None, linear=False):
+        # type: (Data, Model, float, Optional[float], bool) -> None
         # remember inputs so we can inspect from outside
         self.model = model
         self.cutoff = cutoff
+        self.coverage = coverage
+        self.linear = linear
         self._interpret_data(data, model.sasmodel)
+        if linear and self.data_type == 'sesans':
+            raise ValueError("linear parameters cannot be eliminated for "
+                             "SESANS data")
+        self._linear_names = _linear_parameters(model.sasmodel.info)
         self._cache = {}
 
     def update(self):
@@ -159,8 +210,15 @@ class Experiment(DataMixin):
         # type: () -> Dict[str, Parameter]
         """
         Return a dictionary of parameters
+
+        If the linear parameters are being solved directly then they are
+        not included.
         """
-        return self.model.parameters()
+        pars = self.model.parameters()
+        if self.linear:
+            for name in self._linear_names + ['scale']:
+                pars.pop(name, None)
+        return pars
 
     def theory(self):
         # type: () -> np.ndarray
@@ -171,10 +229,196 @@ class Experiment(DataMixin):
         called when the parameters have changed.
         """
         if 'theory' not in self._cache:
-            pars = self.model.state()
-            self._cache['theory'] = self._calc_theory(pars, cutoff=self.cutoff)
+            self._cache['theory'] = self._evaluate(self.model.state())
         return self._cache['theory']
 
+    def jacobian(self, names=None, step=None, pool=None):
+        # type: (Optional[List[str]], Optional[float], Any) -> np.ndarray
+        """
+        Return the derivative of the theory with respect to the fitted
+        parameters as an array of shape *(numpoints, len(names))*.
+
+        *names* lists the parameters for the columns of the jacobian,
+        defaulting to the sorted names of the fitted parameters in
+        :meth:`parameters`, excluding the polydispersity point counts.
+
+        *step* is the relative step size for the forward differences,
+        defaulting to the square root of the machine precision of the
+        model.  Parameters at zero use *step* as the absolute step.
+
+        *pool* is used to evaluate the perturbed parameter sets in
+        parallel.  It can be any object with a *map(function, items)*
+        method, such as a :class:`multiprocessing.pool.ThreadPool` or a
+        process pool.  Each perturbed set is evaluated on a copy of the
+        experiment with its own kernel.  If *pool* is None, a thread pool
+        with up to one thread per CPU is used for the call.  The DLL and
+        OpenCL kernels release the GIL while they run.
+
+        The derivatives for *scale* and *background* are computed directly
+        from the unscaled theory without calling the kernel.
+        """
+        if names is None:
+            names = sorted(k for k, p in self.parameters().items()
+                           if not p.fixed and not k.endswith('_pd_n'))
+        if step is None:
+            dtype = getattr(self._model, 'dtype', None)
+            if dtype is None:
+                dtype = np.dtype('d')
+            step = np.sqrt(np.finfo(dtype).eps)
+        pars = self.model.state()
+        base = self.theory()
+
+        scaled = not self.linear and self.data_type != 'sesans'
+        analytic = {}  # type: Dict[str, np.ndarray]
+        if scaled:
+            analytic['scale'] = self._unscaled[1]
+            analytic['background'] = self._background_response()
+        tasks, deltas = [], []
+        for name in names:
+            if name in analytic:
+                continue
+            value = pars[name]
+            delta = step*abs(value) if value != 0. else step
+            tasks.append((self._worker(), dict(pars, **{name: value+delta})))
+            deltas.append(delta)
+
+        # Projection in the workers writes the linear parameters into the
+        # shared model, so restore them when done.
+        linear_values = dict((k, getattr(self.model, k).value)
+                             for k in self._linear_names)
+        try:
+            if pool is None and len(tasks) > 1:
+                from multiprocessing import cpu_count
+                from multiprocessing.pool import ThreadPool
+                threads = ThreadPool(min(len(tasks), cpu_count()))
+                try:
+                    shifted = threads.map(_evaluate_task, tasks)
+                finally:
+                    threads.close()
+                    threads.join()
+            elif pool is None:
+                shifted = [_evaluate_task(task) for task in tasks]
+            else:
+                shifted = list(pool.map(_evaluate_task, tasks))
+        finally:
+            for k, v in linear_values.items():
+                getattr(self.model, k).value = v
+
+        differences = iter((theory - base)/delta
+                           for theory, delta in zip(shifted, deltas))
+        columns = [analytic[name] if name in analytic else next(differences)
+                   for name in names]
+        return np.array(columns).T.reshape(len(base), len(names))
+
+    def _worker(self):
+        # type: () -> "Experiment"
+        """
+        Return a copy of the experiment for evaluating the theory in
+        another thread or process, with its own kernels and saved theory.
+        """
+        worker = copy(self)
+        worker._kernel = worker._kernel_mono = None
+        worker._unscaled = worker._basis = None
+        worker._cache = {}
+        worker.perf_stats = None
+        return worker
+
+    def _evaluate(self, pars):
+        # type: (Dict[str, Any]) -> np.ndarray
+        """
+        Return the theory for *pars*.
+        """
+        if self.linear:
+            return self._projected_theory(pars)
+        elif self.data_type == 'sesans':
+            return self._calc_theory(
+                pars, cutoff=self.cutoff, coverage=self.coverage)
+        else:
+            return self._scaled_theory(pars)
+
+    def _scaled_theory(self, pars):
+        # type: (Dict[str, Any]) -> np.ndarray
+        """
+        Return the theory for *pars*, reusing the unscaled theory from the
+        previous evaluation if only *scale* and *background* have changed.
+
+        Resolution is linear in the theory, so the smeared result is
+        *scale* times the smeared unscaled theory plus *background* times
+        the smeared unit function.
+
+        The saved theory is keyed on *cutoff* and *coverage* as well as the
+        parameter values, since changing either changes the integral.
+        """
+        scale, background = pars['scale'], pars['background']
+        unit_pars = dict(pars, scale=1.0, background=0.0)
+        key = (unit_pars, self.cutoff, self.coverage)
+        if self._unscaled is None or self._unscaled[0] != key:
+            theory = self._calc_theory(
+                unit_pars, cutoff=self.cutoff, coverage=self.coverage)
+            self._unscaled = (key, theory, self.Iq_calc)
+        _, theory, Iq_calc = self._unscaled
+        if Iq_calc is not None:
+            qx_calc, qy_calc, Iq = Iq_calc
+            self.Iq_calc = (qx_calc, qy_calc, scale*Iq + background)
+        return scale*theory + background*self._background_response()
+
+    def _background_response(self):
+        # type: () -> np.ndarray
+        """
+        Return the resolution smeared theory for a constant I(q) = 1.
+        """
+        if self._background is None:
+            ones = np.ones(len(self._kernel_inputs[0]))
+            self._background = self.resolution.apply(ones)
+        return self._background
+
+    def _projected_theory(self, pars):
+        # type: (Dict[str, Any]) -> np.ndarray
+        """
+        Return the theory for the nonlinear parameters in *pars*, with the
+        linear parameters set to their weighted least squares values.
+
+        The theory for each linear parameter is computed with that
+        parameter set to one, giving the columns of the design matrix.
+        Mixture models compute all components in one kernel call.
+        """
+        names = self._linear_names
+        unit_pars = dict(pars, background=0.0)
+        unit_pars.update((k, 1.0) for k in names if k != 'background')
+        key = (unit_pars, self.cutoff, self.coverage)
+        if self._basis is None or self._basis[0] != key:
+            theory = self._calc_theory(
+                unit_pars, cutoff=self.cutoff, coverage=self.coverage)
+            if len(names) > 2:
+                # mixture: one column per component, scaled by the fixed
+                # overall scale
+                scale = unit_pars['scale']
+                parts = [scale*part for part in self._kernel.results]
+                columns = [self.resolution.apply(part) for part in parts]
+            else:
+                parts = None
+                columns = [theory]
+            columns.append(self._background_response())
+            raw = None
+            if self.Iq_calc is not None:
+                qx_calc, qy_calc, Iq = self.Iq_calc
+                raw = ([Iq] if parts is None
+                       else [np.reshape(part, Iq.shape) for part in parts])
+                raw.append(np.ones_like(Iq))
+                raw = np.array(raw)
+            self._basis = (key, np.array(columns), raw)
+        _, columns, raw = self._basis
+
+        # Weighted least squares for the linear coefficients
+        design = (columns/self.dIq).T
+        coeffs = np.linalg.lstsq(design, self.Iq/self.dIq, rcond=None)[0]
+        for name, value in zip(names, coeffs):
+            getattr(self.model, name).value = value
+        if raw is not None:
+            self.Iq_calc = (self.Iq_calc[0], self.Iq_calc[1],
+                            np.tensordot(coeffs, raw, axes=1))
+        return np.dot(coeffs, columns)
+
     def residuals(self):
         # type: () -> np.ndarray
         """
@@ -235,3 +479,321 @@ class Experiment(DataMixin):
         # pylint: disable=attribute-defined-outside-init
         self.__dict__ = state
 
+
+def _evaluate_task(task):
+    # type: (Tuple[Experiment, Dict[str, Any]]) -> np.ndarray
+    """
+    Return the theory for *pars* on the copy of the experiment in *task*,
+    releasing its kernels when done.  Used by :meth:`Experiment.jacobian`.
+    """
+    experiment, pars = task
+    try:
+        return experiment._evaluate(pars)
+    finally:
+        for kernel in (experiment._kernel, experiment._kernel_mono):
+            if kernel is not None:
+                kernel.release()
+
+
+class MultiExperiment(object):
+    """
+    Bumps wrapper for several SAS datasets sharing one model.
+
+    *datasets* is a list of :class:`data.Data1D` or :class:`data.Data2D`
+    objects, all of the same type, each with its own resolution.
+
+    *model* is a :class:`Model` object, whose parameters are shared by all
+    the datasets.
+
+    *cutoff* and *coverage* are as for :class:`Experiment`.
+
+    The theory for all datasets is computed in one kernel call using
+    :class:`direct_model.MultiDirectModel`.  The residuals for the datasets
+    are joined, so the resulting object can be used directly in a Bumps
+    FitProblem call as a single fitness.
+    """
+    def __init__(self, datasets, model, cutoff=1e-5, coverage=None):
+        # type: (List[Data], Model, float, Optional[float]) -> None
+        self.model = model
+        self.cutoff = cutoff
+        self.coverage = coverage
+        self._calculator = MultiDirectModel(
+            datasets, model.sasmodel, cutoff=cutoff, coverage=coverage)
+        self._parts = self._calculator.parts
+        self._cache = {}  # type: Dict[str, List[np.ndarray]]
+
+    @property
+    def pd_coverage(self):
+        # type: () -> Optional[float]
+        """
+        Fraction of the polydispersity weight achieved by the last
+        evaluation, if *coverage* is set.
+        """
+        return self._calculator.pd_coverage
+
+    def update(self):
+        # type: () -> None
+        """
+        Call when model parameters have changed and theory needs to be
+        recalculated.
+        """
+        self._cache.clear()
+
+    def numpoints(self):
+        # type: () -> float
+        """
+        Return the number of data points in all the datasets.
+        """
+        return sum(len(part.Iq) for part in self._parts)
+
+    def parameters(self):
+        # type: () -> Dict[str, Parameter]
+        """
+        Return a dictionary of parameters.
+        """
+        return self.model.parameters()
+
+    def theory(self):
+        # type: () -> List[np.ndarray]
+        """
+        Return the list of theory values for the datasets.
+
+        This method uses lazy evaluation, and requires model.update() to be
+        called when the parameters have changed.
+        """
+        if 'theory' not in self._cache:
+            self._calculator.cutoff = self.cutoff
+            self._calculator.coverage = self.coverage
+            self._cache['theory'] = self._calculator(**self.model.state())
+        return self._cache['theory']
+
+    def residuals(self):
+        # type: () -> np.ndarray
+        """
+        Return theory minus data normalized by uncertainty for all the
+        datasets, joined into one vector.
+        """
+        return np.hstack([(theory - part.Iq)/part.dIq
+                          for part, theory in zip(self._parts, self.theory())])
+
+    def nllf(self):
+        # type: () -> float
+        """
+        Return the negative log likelihood of seeing data given the model
+        parameters, up to a normalizing constant which depends on the data
+        uncertainty.
+        """
+        delta = self.residuals()
+        return 0.5 * np.sum(delta**2)
+
+    def plot(self, view='log'):
+        # type: (str) -> None
+        """
+        Plot the data and residuals for each dataset in its own figure.
+        """
+        import matplotlib.pyplot as plt
+        for k, (part, theory) in enumerate(zip(self._parts, self.theory())):
+            if k > 0:
+                plt.figure()
+            resid = (theory - part.Iq)/part.dIq
+            plot_theory(part._data, theory, resid, view)
+
+    def __getstate__(self):
+        # type: () -> Dict[str, Any]
+        # Can't pickle gpu functions, so instead make them lazy
+        state = self.__dict__.copy()
+        calculator = copy(self._calculator)
+        calculator._kernel = None
+        state['_calculator'] = calculator
+        return state
+
+    def __setstate__(self, state):
+        # type: (Dict[str, Any]) -> None
+        # pylint: disable=attribute-defined-outside-init
+        self.__dict__ = state
+
+
+
+def test_scaled_cache():
+    """
+    Check that the theory reused for scale and background changes matches
+    a fresh evaluation, and is recomputed when cutoff or coverage changes.
+    """
+    import unittest
+    try:
+        import bumps  # type: ignore # pylint: disable=unused-import
+    except ImportError:
+        raise unittest.SkipTest("bumps is not available")
+    from .core import load_model
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    kernel = load_model('cylinder', dtype='double!')
+    q = np.logspace(-3, -1, 50)
+    for resolution in (0.0, 0.1):
+        data = empty_data1D(q, resolution=resolution)
+        model = Model(kernel, radius=40, radius_pd=0.3, radius_pd_n=35,
+                      length_pd=0.2, length_pd_n=20)
+        experiment = Experiment(data, model, cutoff=1e-3)
+
+        def check():
+            # type: () -> None
+            """Compare the experiment to a fresh calculation"""
+            experiment.update()
+            actual = experiment.theory()
+            target = DirectModel(data, kernel, cutoff=experiment.cutoff,
+                                 coverage=experiment.coverage)
+            target = target(**model.state())
+            assert np.allclose(actual, target, rtol=1e-12, atol=0)
+
+        check()
+        saved = experiment._unscaled
+        model.scale.value, model.background.value = 3.0, 0.5
+        check()
+        assert experiment._unscaled is saved
+        experiment.cutoff = 1e-5
+        check()
+        assert experiment._unscaled is not saved
+        saved = experiment._unscaled
+        experiment.coverage = 0.9
+        check()
+        assert experiment._unscaled is not saved
+
+
+def test_jacobian():
+    """
+    Check the jacobian against central differences of the theory.
+    """
+    import unittest
+    try:
+        import bumps  # type: ignore # pylint: disable=unused-import
+    except ImportError:
+        raise unittest.SkipTest("bumps is not available")
+    from multiprocessing.pool import ThreadPool
+    from .core import load_model
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    kernel = load_model('cylinder', dtype='double!')
+    data = empty_data1D(np.logspace(-3, -1, 50), resolution=0.05)
+    data.y = DirectModel(data, kernel)(radius=20., length=300.,
+                                       scale=0.5, background=0.01)
+    data.dy = 0.01*data.y
+    for linear in (False, True):
+        model = Model(kernel, radius=22., length=280., radius_pd=0.1,
+                      radius_pd_n=10, scale=0.4, background=0.02)
+        for name in ('radius', 'length', 'radius_pd', 'scale', 'background'):
+            getattr(model, name).range(0., 1000.)
+        experiment = Experiment(data, model, linear=linear)
+        base = experiment.theory().copy()
+        names = sorted(experiment.parameters().keys())
+        names = [k for k in names if not getattr(model, k).fixed]
+        assert names == (['length', 'radius', 'radius_pd'] if linear else
+                         ['background', 'length', 'radius', 'radius_pd',
+                          'scale'])
+        jac = experiment.jacobian()
+        assert jac.shape == (len(base), len(names))
+        # The jacobian does not disturb the current theory.
+        assert (experiment.theory() == base).all()
+        for k, name in enumerate(names):
+            par = getattr(model, name)
+            value = par.value
+            delta = 1e-5*value
+            par.value = value + delta
+            experiment.update()
+            upper = experiment.theory()
+            par.value = value - delta
+            experiment.update()
+            lower = experiment.theory()
+            par.value = value
+            experiment.update()
+            target = (upper - lower)/(2*delta)
+            assert np.allclose(jac[:, k], target, rtol=1e-4,
+                               atol=1e-4*np.max(abs(target))), name
+        pool = ThreadPool(2)
+        try:
+            assert np.allclose(experiment.jacobian(pool=pool), jac,
+                               rtol=1e-14, atol=0)
+        finally:
+            pool.close()
+            pool.join()
+
+
+def test_linear_projection():
+    """
+    Check that the projected scale and background are recovered from a fit
+    to simulated data, and that their limits are ignored.
+    """
+    import unittest
+    try:
+        from bumps.names import FitProblem
+        from bumps.fitters import fit
+    except ImportError:
+        raise unittest.SkipTest("bumps is not available")
+    from .core import load_model
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    kernel = load_model('sphere', dtype='double!')
+    data = empty_data1D(np.logspace(-3, -1, 100), resolution=0.05)
+    data.y = DirectModel(data, kernel)(radius=50, scale=0.3, background=0.02)
+    data.dy = 0.01*data.y
+
+    # The starting scale and background are far away, and the true scale
+    # is outside the scale limits.
+    model = Model(kernel, radius=40, scale=2.0, background=1.0)
+    model.radius.range(10, 100)
+    model.scale.range(1, 10)
+    model.background.range(0.5, 10)
+    experiment = Experiment(data, model, linear=True)
+    assert sorted(experiment.parameters().keys()) == sorted(
+        k for k in model.parameters() if k not in ('scale', 'background'))
+    problem = FitProblem(experiment)
+    fit(problem, method='amoeba', steps=200, verbose=False)
+    # Evaluate at the best fit to store its linear parameters in the model.
+    chisq = problem.chisq()
+    assert abs(model.radius.value - 50) < 1e-3
+    assert abs(model.scale.value - 0.3) < 1e-4
+    assert abs(model.background.value - 0.02) < 1e-4
+    assert chisq < 1e-6
+
+
+def test_multi_experiment():
+    """
+    Check a fit of two datasets with shared parameters.
+    """
+    import unittest
+    try:
+        from bumps.names import FitProblem
+        from bumps.fitters import fit
+    except ImportError:
+        raise unittest.SkipTest("bumps is not available")
+    import pickle
+    from .core import load_model
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    # Two detector distances with different resolution.
+    kernel = load_model('sphere', dtype='double!')
+    datasets = [empty_data1D(np.logspace(-3, -2, 30), resolution=0.05),
+                empty_data1D(np.logspace(-2, -1, 30), resolution=0.1)]
+    for data in datasets:
+        data.y = DirectModel(data, kernel)(radius=60., scale=0.01,
+                                           background=0.001)
+        data.dy = 0.01*data.y
+
+    model = Model(kernel, radius=55., scale=0.01, background=0.001)
+    model.radius.range(10., 200.)
+    experiment = MultiExperiment(datasets, model)
+    assert experiment.numpoints() == 60
+    targets = [DirectModel(data, kernel)(**model.state())
+               for data in datasets]
+    for theory, target in zip(experiment.theory(), targets):
+        assert np.allclose(theory, target, rtol=1e-14, atol=0)
+    experiment = pickle.loads(pickle.dumps(experiment))
+    model = experiment.model
+    problem = FitProblem(experiment)
+    fit(problem, method='amoeba', steps=200, verbose=False)
+    assert abs(model.radius.value - 60.) < 1e-3
+    assert problem.chisq() < 1e-6
+
@@ -4,11 +4,12 @@
 Program to compare models using different compute engines.
 
 This program lets you compare results between OpenCL and DLL versions
-of the code and between precision (half, fast, single, double, quad),
-where fast precision is single precision using native functions for
-trig, etc., and may not be completely IEEE 754 compliant.  This lets
-make sure that the model calculations are stable, or if you need to
-tag the model as double precision only.
+of the code and between precision (half, fast, single, double, quad,
+mixed), where fast precision is single precision using native functions
+for trig, etc., and may not be completely IEEE 754 compliant, and mixed
+precision is single precision with the polydispersity sums accumulated
+in double precision.  This lets make sure that the model calculations
+are stable, or if you need to tag the model as double precision only.
 
 Run using ./compare.sh (Linux, Mac) or compare.bat (Windows) in the
 sasmodels root to see the command line options.
@@ -84,8 +85,8 @@ Options (* for default):
 
 Any two calculation engines can be selected for comparison:
 
-    -single/-double/-half/-fast sets an OpenCL calculation engine
-    -single!/-double!/-quad! sets an OpenMP calculation engine
+    -single/-double/-half/-fast/-mixed sets an OpenCL calculation engine
+    -single!/-double!/-quad!/-mixed! sets an OpenMP calculation engine
     -sasview sets the sasview calculation engine
 
 The default is -single -sasview.  Note that the interpretation of quad
@@ -486,6 +487,7 @@ def eval_sasview(model_info, data):
 DTYPE_MAP = {
     'half': '16',
     'fast': 'fast',
+    'mixed': '32m',
     'single': '32',
     'double': '64',
     'quad': '128',
@@ -728,8 +730,8 @@ def _print_stats(label, err):
 #
 NAME_OPTIONS = set([
     'plot', 'noplot',
-    'half', 'fast', 'single', 'double',
-    'single!', 'double!', 'quad!', 'sasview',
+    'half', 'fast', 'single', 'double', 'mixed',
+    'single!', 'double!', 'quad!', 'mixed!', 'sasview',
     'lowq', 'midq', 'highq', 'exq', 'zero',
     '2d', '1d',
     'preset', 'random',
@@ -884,9 +886,11 @@ def parse_opts(argv):
         elif arg == '-fast':    engines.append(arg[1:])
         elif arg == '-single':  engines.append(arg[1:])
         elif arg == '-double':  engines.append(arg[1:])
+        elif arg == '-mixed':   engines.append(arg[1:])
         elif arg == '-single!': engines.append(arg[1:])
         elif arg == '-double!': engines.append(arg[1:])
         elif arg == '-quad!':   engines.append(arg[1:])
+        elif arg == '-mixed!':  engines.append(arg[1:])
         elif arg == '-sasview': engines.append(arg[1:])
         elif arg == '-edit':    opts['explore'] = True
         elif arg == '-demo':    opts['use_demo'] = True
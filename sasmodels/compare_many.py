@@ -10,10 +10,22 @@ greater than expected for that precision, the parameter set is labeled
 as bad and written to the output, along with the random seed used to
 generate that parameter value.  This seed can be used with :mod:`compare`
 to reload and display the details of the model.
+
+Long sweeps can be run in parallel with :func:`run_sweep`, or with the
+*-processes* and *-output* options on the command line.  The random
+seeds for the parameter sets are derived from a base seed, the model
+name and the index of the set, so the sweep is reproducible regardless
+of the order in which the sets are evaluated.  Results are appended to
+*OUTPUT.csv* and *OUTPUT.jsonl* as they are computed, and rerunning an
+interrupted sweep with the same options skips the sets already in
+*OUTPUT.jsonl*.
 """
 from __future__ import print_function
 
 import sys
+import os
+import json
+import hashlib
 import traceback
 
 import numpy as np  # type: ignore
@@ -76,13 +88,37 @@ PRECISION = {
     'half': 1e-3,
     'single': 5e-5,
     'double': 5e-14,
+    'mixed': 5e-5,
     'single!': 5e-5,
     'double!': 5e-14,
+    'mixed!': 5e-5,
     'quad!': 5e-18,
     'sasview': 5e-14,
 }
+
+def instance_seed(base_seed, name, k):
+    """
+    Return the random seed for parameter set *k* of model *name* in a sweep
+    started with *base_seed*.  The seed is below 1000000, so it can be used
+    with the *-random=seed* option of :mod:`compare`.
+    """
+    key = ("%d %s %d" % (base_seed, name, k)).encode('ascii')
+    return int(hashlib.sha1(key).hexdigest()[:8], 16) % 1000000
+
+def instance_pars(model_info, pars, seed, mono):
+    """
+    Return random parameters from *seed*, constrained to valid values for
+    the model.  If *mono* is True, polydispersity is suppressed.
+    """
+    pars_i = randomize_pars(model_info, pars, seed)
+    constrain_pars(model_info, pars_i)
+    constrain_new_to_old(model_info, pars_i)
+    if mono:
+        pars_i = suppress_pd(pars_i)
+    return pars_i
+
 def compare_instance(name, data, index, N=1, mono=True, cutoff=1e-5,
-                     base='sasview', comp='double'):
+                     base='sasview', comp='double', seed=None):
     r"""
     Compare the model under different calculation engines.
 
@@ -98,6 +134,9 @@ def compare_instance(name, data, index, N=1, mono=True, cutoff=1e-5,
     a little bit faster.
 
     *base* and *comp* are the names of the calculation engines to compare.
+
+    *seed*, if given, is the base seed for the parameter sets, as used by
+    :func:`instance_seed`.  Otherwise the seeds are random.
     """
 
     is_2d = hasattr(data, 'qx_data')
@@ -127,7 +166,7 @@ def compare_instance(name, data, index, N=1, mono=True, cutoff=1e-5,
             result = fn(**pars)
         except Exception:
             traceback.print_exc()
-            print("when comparing %s for %d"%(name, seed))
+            print("when comparing %s for %d"%(name, seed_k))
             if hasattr(data, 'qx_data'):
                 result = np.NaN*data.data
             else:
@@ -161,12 +200,11 @@ def compare_instance(name, data, index, N=1, mono=True, cutoff=1e-5,
     max_diff = [0]
     for k in range(N):
         print("%s %d"%(name, k), file=sys.stderr)
-        seed = np.random.randint(1e6)
-        pars_i = randomize_pars(model_info, pars, seed)
-        constrain_pars(model_info, pars_i)
-        constrain_new_to_old(model_info, pars_i)
-        if mono:
-            pars_i = suppress_pd(pars_i)
+        if seed is None:
+            seed_k = np.random.randint(1e6)
+        else:
+            seed_k = instance_seed(seed, name, k)
+        pars_i = instance_pars(model_info, pars, seed_k, mono)
 
         good = [True]
         columns = check_model(pars_i)
@@ -178,15 +216,227 @@ def compare_instance(name, data, index, N=1, mono=True, cutoff=1e-5,
         if good[0]:
             num_good += 1
         else:
-            print(("%d,"%seed)+','.join("%s"%v for v in columns))
+            print(("%d,"%seed_k)+','.join("%s"%v for v in columns))
     print('"good","%d of %d","max diff",%g'%(num_good, N, max_diff[0]))
 
 
+#: Per-process state for :func:`run_sweep` workers: the sweep settings,
+#: the data and the calculation engines for each model.
+_SWEEP = {}
+
+def _init_sweep(settings):
+    """
+    Initialize the sweep state for the current process.
+    """
+    data, index = make_data({'qmax':1.0, 'is2d':settings['is2d'],
+                             'nq':settings['nq'], 'res':0.,
+                             'accuracy': 'Low', 'view':'log', 'zero': False})
+    _SWEEP.clear()
+    _SWEEP.update(settings=settings, data=data, index=index, engines={})
+
+def _get_engines(name):
+    """
+    Return the model info, the demo parameters and the two calculation
+    engines for model *name*, building them the first time the model is
+    seen by this process.  If the engines can't be built, the exception
+    message is returned in place of the engines.
+    """
+    engines = _SWEEP['engines']
+    if name not in engines:
+        settings, data = _SWEEP['settings'], _SWEEP['data']
+        model_info = core.load_model_info(name)
+        pars = get_pars(model_info, use_demo=True)
+        try:
+            calc_base = make_engine(model_info, data, settings['base'],
+                                    settings['cutoff'])
+            calc_comp = make_engine(model_info, data, settings['comp'],
+                                    settings['cutoff'])
+            engines[name] = (model_info, pars, calc_base, calc_comp)
+        except Exception as exc:
+            engines[name] = (model_info, pars, str(exc), None)
+    return engines[name]
+
+def _json_value(value):
+    """
+    Convert a parameter value to a float, or to a string for values such
+    as the polydispersity type.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+def _sweep_task(task):
+    """
+    Compare the engines for one parameter set, returning the result record.
+    """
+    name, k, seed = task
+    settings = _SWEEP['settings']
+    model_info, pars, calc_base, calc_comp = _get_engines(name)
+    record = {'model': name, 'index': k, 'seed': seed}
+    if calc_comp is None:
+        record.update(good=False, stats=[np.NaN]*4, error=calc_base)
+        return record
+    pars_i = instance_pars(model_info, pars, seed, settings['mono'])
+    try:
+        base_value = calc_base(**pars_i)
+        comp_value = calc_comp(**pars_i)
+        stats = [float(v) for v in
+                 calc_stats(base_value, comp_value, _SWEEP['index'])]
+        error = None
+    except Exception:
+        stats, error = [np.NaN]*4, traceback.format_exc()
+    expected = max(PRECISION[settings['base']], PRECISION[settings['comp']])
+    record.update(good=bool(error is None and stats[0] < expected),
+                  stats=stats, error=error,
+                  pars=dict((k, _json_value(v)) for k, v in pars_i.items()))
+    return record
+
+def _load_checkpoint(path, settings):
+    """
+    Return the records saved in the checkpoint file at *path*.
+
+    Raises ValueError if the checkpoint was made with different settings.
+    If *settings['seed']* is None, it is set to the seed of the checkpoint.
+    """
+    records = []
+    with open(path) as fid:
+        saved = json.loads(fid.readline())['settings']
+        if settings['seed'] is None:
+            settings['seed'] = saved['seed']
+        if saved != settings:
+            raise ValueError("checkpoint %r has settings %s, not %s"
+                             % (path, saved, settings))
+        for line in fid:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # partial record from an interrupted write
+    return records
+
+CSV_COLUMNS = ["Model", "Index", "Seed", "Good", "Max rel err",
+               "95% rel err", "Max abs err above 90% rel",
+               "Max value above 90% rel", "Error", "Parameters"]
+def _csv_row(record):
+    """
+    Format a sweep record as a line of the CSV output.
+    """
+    pars = " ".join("%s=%s" % (k, v)
+                    for k, v in sorted(record.get('pars', {}).items()))
+    error = (record['error'] or "").strip().split("\n")[-1]
+    columns = (['"%s"' % record['model'], "%d" % record['index'],
+                "%d" % record['seed'], "%d" % record['good']]
+               + ["%g" % v for v in record['stats']]
+               + ['"%s"' % error.replace('"', "'"), '"%s"' % pars])
+    return ",".join(columns)
+
+def run_sweep(models, count, nq=100, is2d=False, mono=True, cutoff=0.,
+              base='sasview', comp='double', processes=None,
+              output='compare_many', seed=None, chunksize=10):
+    """
+    Compare *count* random parameter sets for each of *models* using a pool
+    of *processes* worker processes, defaulting to the number of CPUs.  Use
+    *processes=1* to run in the current process.
+
+    The q values and engines are as for :func:`compare_instance`, with *nq*
+    points in 1-D or *nq* x *nq* in 2-D if *is2d*.  Each worker builds the
+    engines for a model the first time it sees the model, and reuses them
+    for later parameter sets.  Parameter sets are handed to the workers in
+    groups of *chunksize*.
+
+    The parameter sets use seeds from :func:`instance_seed` with base seed
+    *seed*, chosen at random if *seed* is None.
+
+    Results are appended to *output.jsonl*, one JSON record per line, and
+    to *output.csv* as each parameter set completes.  The first line of the
+    JSON file holds the settings.  If the JSON file already exists, the
+    sweep resumes, skipping the parameter sets already recorded, provided
+    the settings other than *models* and *count* match; the base seed is
+    taken from the file if *seed* is None.
+
+    Returns the list of records, each with *model*, *index*, *seed*,
+    *good*, *stats* (see :func:`calc_stats`), *error* and *pars*, sorted
+    by model and index.  Models without 2-D support are skipped if *is2d*.
+    """
+    settings = {
+        'nq': nq, 'is2d': is2d, 'mono': mono,
+        'cutoff': cutoff, 'base': base, 'comp': comp, 'seed': seed,
+    }
+    json_path, csv_path = output + '.jsonl', output + '.csv'
+    if os.path.exists(json_path):
+        records = _load_checkpoint(json_path, settings)
+    else:
+        if settings['seed'] is None:
+            settings['seed'] = int(np.random.randint(1e6))
+        records = []
+    # Rewrite the output with the complete records, dropping any partial
+    # record from an interrupted sweep.
+    with open(json_path, 'w') as fid:
+        fid.write(json.dumps({'settings': settings}) + "\n")
+        for record in records:
+            fid.write(json.dumps(record) + "\n")
+    with open(csv_path, 'w') as fid:
+        fid.write(",".join('"%s"' % c for c in CSV_COLUMNS) + "\n")
+        for record in records:
+            fid.write(_csv_row(record) + "\n")
+
+    if is2d:
+        models = [name for name in models
+                  if core.load_model_info(name).parameters.has_2d]
+    done = set((r['model'], r['index']) for r in records)
+    tasks = [(name, k, instance_seed(settings['seed'], name, k))
+             for name in models for k in range(count)
+             if (name, k) not in done]
+
+    if processes == 1:
+        _init_sweep(settings)
+        results = (_sweep_task(task) for task in tasks)
+        pool = None
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes, _init_sweep, (settings,))
+        results = pool.imap_unordered(_sweep_task, tasks, chunksize)
+    try:
+        with open(json_path, 'a') as json_fid, open(csv_path, 'a') as csv_fid:
+            for record in results:
+                json_fid.write(json.dumps(record) + "\n")
+                json_fid.flush()
+                csv_fid.write(_csv_row(record) + "\n")
+                csv_fid.flush()
+                records.append(record)
+                print("%s %d" % (record['model'], record['index']),
+                      file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    records.sort(key=lambda r: (r['model'], r['index']))
+    print_sweep_summary(records)
+    return records
+
+def print_sweep_summary(records):
+    """
+    Print the number of good parameter sets and the maximum difference for
+    each model in the sweep.
+    """
+    summary = {}
+    for record in records:
+        num_good, num, max_diff = summary.get(record['model'], (0, 0, 0.))
+        summary[record['model']] = (
+            num_good + record['good'], num + 1,
+            max(max_diff, record['stats'][0]))
+    for name in sorted(summary):
+        num_good, num, max_diff = summary[name]
+        print('"Model","%s","good","%d of %d","max diff",%g'
+              % (name, num_good, num, max_diff))
+
+
 def print_usage():
     """
     Print the command usage string.
     """
-    print("usage: compare_many.py MODEL COUNT (1dNQ|2dNQ) (CUTOFF|mono) (single|double|quad)")
+    print("usage: compare_many.py [-processes=N] [-output=NAME] [-seed=N] MODEL COUNT (1dNQ|2dNQ) (CUTOFF|mono) (single|double|quad|mixed)")
 
 
 def print_models():
@@ -224,6 +474,13 @@ is set in compare.py defaults for each model.
 PRECISION is the floating point precision to use for comparisons.  If two
 precisions are given, then compare one to the other, ignoring sasview.
 
+-processes=N runs the comparisons in N worker processes, or one per CPU
+if N is 0.  -output=NAME appends the results to NAME.csv and NAME.jsonl
+as they are computed; rerun the same command to resume an interrupted
+sweep.  -seed=N sets the base seed for the random parameter sets.  If any
+of these are given, then the sweep runs in parallel with the output saved
+to compare_many.csv and compare_many.jsonl by default.
+
 Available models:
 """)
     print_models()
@@ -232,6 +489,10 @@ def main(argv):
     """
     Main program.
     """
+    options = dict(arg[1:].split('=', 1) for arg in argv
+                   if arg.startswith('-') and '=' in arg)
+    argv = [arg for arg in argv if not (arg.startswith('-') and '=' in arg)]
+    sweep = bool(options)
     if len(argv) not in (5, 6):
         print_help()
         return
@@ -250,14 +511,27 @@ def main(argv):
         cutoff = float(argv[3]) if not mono else 0
         base = argv[4]
         comp = argv[5] if len(argv) > 5 else "sasview"
+        processes = int(options.pop('processes', '0'))
+        output = options.pop('output', 'compare_many')
+        seed = int(options['seed']) if 'seed' in options else None
+        options.pop('seed', None)
+        if options:
+            raise ValueError("unknown options %s" % ", ".join(options))
     except Exception:
         traceback.print_exc()
         print_usage()
         return
 
+    model_list = [model] if model != "all" else MODELS
+    if sweep:
+        run_sweep(model_list, count, nq=Nq, is2d=is2D, mono=mono,
+                  cutoff=cutoff, base=base, comp=comp,
+                  processes=processes if processes else None,
+                  output=output, seed=seed)
+        return
+
     data, index = make_data({'qmax':1.0, 'is2d':is2D, 'nq':Nq, 'res':0.,
                              'accuracy': 'Low', 'view':'log', 'zero': False})
-    model_list = [model] if model != "all" else MODELS
     for model in model_list:
         compare_instance(model, data, index, N=count, mono=mono,
                          cutoff=cutoff, base=base, comp=comp)
@@ -255,6 +255,8 @@ def revert_pars(model_info, pars):
             del oldpars['i_zero']
         elif name == 'onion':
             oldpars.pop('n_shells', None)
+        elif name in ('bcc_paracrystal', 'fcc_paracrystal', 'sc_paracrystal'):
+            oldpars.pop('quadrature', None)
         elif name == 'rpa':
             # convert scattering lengths from femtometers to centimeters
             for p in "L1", "L2", "L3", "L4":
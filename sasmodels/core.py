@@ -20,6 +20,7 @@ from . import product
 from . import mixture
 from . import kernelpy
 from . import kerneldll
+from . import kernelcache
 
 if os.environ.get("SAS_OPENCL", "").lower() == "none":
     HAVE_OPENCL = False
@@ -138,8 +139,8 @@ def load_model_info(model_name):
     return modelinfo.make_model_info(kernel_module)
 
 
-def build_model(model_info, dtype=None, platform="ocl"):
-    # type: (modelinfo.ModelInfo, str, str) -> KernelModel
+def build_model(model_info, dtype=None, platform="ocl", cache=0):
+    # type: (modelinfo.ModelInfo, str, str, int) -> KernelModel
     """
     Prepare the model for the default execution platform.
 
@@ -151,12 +152,23 @@ def build_model(model_info, dtype=None, platform="ocl"):
 
     *dtype* indicates whether the model should use single or double precision
     for the calculation.  Choices are 'single', 'double', 'quad', 'half',
-    or 'fast'.  If *dtype* ends with '!', then force the use of the DLL rather
-    than OpenCL for the calculation.
+    'mixed' or 'fast'.  If *dtype* ends with '!', then force the use of the
+    DLL rather than OpenCL for the calculation.  Mixed precision evaluates
+    the model in single precision but accumulates the polydispersity sums
+    in double precision.
 
     *platform* should be "dll" to force the dll to be used for C models,
     otherwise it uses the default "ocl".
+
+    *cache* is the number of results to keep for each model.  If it is
+    non-zero, the model is wrapped in a :class:`kernelcache.CachedModel`
+    so that repeated calls which differ only in *scale* and *background*
+    do not need to run the kernel.
     """
+    if cache:
+        model = build_model(model_info, dtype=dtype, platform=platform)
+        return kernelcache.CachedModel(model, size=cache)
+
     composition = model_info.composition
     if composition is not None:
         composition_type, parts = composition
@@ -174,14 +186,17 @@ def build_model(model_info, dtype=None, platform="ocl"):
         return kernelpy.PyModel(model_info)
 
     numpy_dtype, fast, platform = parse_dtype(model_info, dtype, platform)
+    mixed = is_mixed(dtype)
 
     source = generate.make_source(model_info)
     if platform == "dll":
         #print("building dll", numpy_dtype)
-        return kerneldll.load_dll(source['dll'], model_info, numpy_dtype)
+        return kerneldll.load_dll(source['dll'], model_info, numpy_dtype,
+                                  mixed=mixed)
     else:
         #print("building ocl", numpy_dtype)
-        return kernelcl.GpuModel(source, model_info, numpy_dtype, fast=fast)
+        return kernelcl.GpuModel(source, model_info, numpy_dtype, fast=fast,
+                                 mixed=mixed)
 
 def precompile_dlls(path, dtype="double"):
     # type: (str, str) -> List[str]
@@ -218,7 +233,10 @@ def parse_dtype(model_info, dtype=None, platform=None):
 
     Possible types include 'half', 'single', 'double' and 'quad'.  If the
     type is 'fast', then this is equivalent to dtype 'single' with the
-    fast flag set to True.
+    fast flag set to True.  If the type is 'mixed', then this is also
+    equivalent to 'single'; use :func:`is_mixed` to check for it.  OpenCL
+    is only used for mixed precision if the device supports double
+    precision.
     """
     # Assign default platform, overriding ocl with dll if OpenCL is unavailable
     # If opencl=False OpenCL is switched off
@@ -233,9 +251,10 @@ def parse_dtype(model_info, dtype=None, platform=None):
         platform = "dll"
         dtype = dtype[:-1]
 
-    # Convert special type names "half", "fast", and "quad"
+    # Convert special type names "half", "fast", "mixed" and "quad"
     fast = (dtype == "fast")
-    if fast:
+    mixed = (dtype == "mixed")
+    if fast or mixed:
         dtype = "single"
     elif dtype == "quad":
         dtype = "longdouble"
@@ -252,13 +271,23 @@ def parse_dtype(model_info, dtype=None, platform=None):
     # Make sure that the type is supported by opencl, otherwise use dll
     if platform == "ocl":
         env = kernelcl.environment()
-        if not env.has_type(numpy_dtype):
+        if (not env.has_type(numpy_dtype)
+                or mixed and not env.has_type(generate.F64)):
             platform = "dll"
             if dtype is None:
                 numpy_dtype = generate.F64
 
     return numpy_dtype, fast, platform
 
+def is_mixed(dtype):
+    # type: (Optional[str]) -> bool
+    """
+    Return True if *dtype* requests mixed precision, with the model
+    evaluated in single precision but the polydispersity sums accumulated
+    in double precision.
+    """
+    return dtype is not None and dtype.rstrip('!') == "mixed"
+
 def list_models_main():
     # type: () -> None
     """
@@ -269,5 +298,64 @@ def list_models_main():
     kind = sys.argv[1] if len(sys.argv) > 1 else "all"
     print("\n".join(list_models(kind)))
 
+def test_mixed_precision():
+    """
+    Check that mixed precision accumulates large meshes more accurately
+    than single precision.
+    """
+    from .direct_model import call_kernel
+
+    model_info = load_model_info('cylinder')
+    q = np.logspace(-3, -0.3, 50)
+    pars = {'radius_pd': 0.2, 'radius_pd_n': 200,
+            'length_pd': 0.2, 'length_pd_n': 100}
+    result = {}
+    for dtype in ('double!', 'single!', 'mixed!'):
+        kernel = build_model(model_info, dtype=dtype).make_kernel([q])
+        result[dtype] = call_kernel(kernel, pars)
+        kernel.release()
+    target = result['double!']
+    single_err = np.max(abs(result['single!'] - target)/target)
+    mixed_err = np.max(abs(result['mixed!'] - target)/target)
+    assert result['mixed!'].dtype == generate.F64
+    assert mixed_err < 1e-6 and mixed_err < single_err
+
+def test_opencl_kernel():
+    """
+    Check the OpenCL padding, local size tuning and monodisperse kernels
+    against the dll.  This only runs if an OpenCL device, such as the
+    pocl CPU driver, is available.
+    """
+    import unittest
+    from .direct_model import call_kernel
+
+    if not HAVE_OPENCL:
+        raise unittest.SkipTest("OpenCL is not available")
+
+    old_tune, old_path = kernelcl.TUNE, kernelcl.TUNING_PATH
+    kernelcl.TUNE, kernelcl.TUNING_PATH = True, None
+    try:
+        model_info = load_model_info('cylinder')
+        q = np.linspace(0.001, 0.5, 37)
+        qx, qy = np.meshgrid(q[::3], q[::3])
+        pd = {'radius_pd': 0.1, 'radius_pd_n': 10, 'theta_pd': 10,
+              'theta_pd_n': 5}
+        dll = build_model(model_info, dtype='double!', platform='dll')
+        ocl = build_model(model_info, dtype='double', platform='ocl')
+        if not isinstance(ocl, kernelcl.GpuModel):
+            raise unittest.SkipTest("no OpenCL device with double precision")
+        for q_vectors in ([q], [qx.flatten(), qy.flatten()]):
+            ocl_kernel = ocl.make_kernel(q_vectors)
+            dll_kernel = dll.make_kernel(q_vectors)
+            for pars in ({}, pd):
+                target = call_kernel(dll_kernel, pars)
+                actual = call_kernel(ocl_kernel, pars)
+                assert len(actual) == len(target)
+                assert np.allclose(actual, target, rtol=1e-10, atol=0)
+            ocl_kernel.release()
+            dll_kernel.release()
+    finally:
+        kernelcl.TUNE, kernelcl.TUNING_PATH = old_tune, old_path
+
 if __name__ == "__main__":
     list_models_main()
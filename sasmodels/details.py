@@ -28,7 +28,7 @@ except Exception:
             return [np.asarray(v) for v in args]
 
 try:
-    from typing import List
+    from typing import Dict, List, Tuple
 except ImportError:
     pass
 else:
@@ -66,7 +66,7 @@ class CallDetails(object):
         max_pd = parameters.max_pd
 
         # Structure of the call details buffer:
-        #   pd_par[max_pd]     pd params in order of length
+        #   pd_par[max_pd]     pd params, orientation first then by length
         #   pd_length[max_pd]  length of each pd param
         #   pd_offset[max_pd]  offset of pd values in parameter array
         #   pd_stride[max_pd]  index of pd value in loop = n//stride[k]
@@ -185,6 +185,9 @@ def make_details(model_info, length, offset, num_weights):
     Monodisperse parameters should use a polydispersity length of one
     with weight 1.0. *num_weights* is the total length of the polydispersity
     array.
+
+    Polydisperse orientation parameters are placed in the innermost loops,
+    followed by the remaining parameters in order of decreasing length.
     """
     #pars = model_info.parameters.call_parameters[2:model_info.parameters.npars+2]
     #print(", ".join(str(i)+"-"+p.id for i,p in enumerate(pars)))
@@ -197,9 +200,7 @@ def make_details(model_info, length, offset, num_weights):
     if num_active > max_pd:
         raise ValueError("Too many polydisperse parameters")
 
-    # Decreasing list of polydpersity lengths
-    # Note: the reversing view, x[::-1], does not require a copy
-    idx = np.argsort(length)[::-1][:max_pd]
+    idx = _pd_order(length, _orientation_mask(model_info), max_pd)
     pd_stride = np.cumprod(np.hstack((1, length[idx])))
 
     call_details = CallDetails(model_info)
@@ -216,6 +217,34 @@ def make_details(model_info, length, offset, num_weights):
     return call_details
 
 
+def _pd_order(length, orientation, max_pd):
+    # type: (np.ndarray, np.ndarray, int) -> np.ndarray
+    """
+    Return the parameter index for each polydispersity loop, innermost first.
+
+    The *max_pd* longest distributions are selected, then the polydisperse
+    *orientation* parameters among them are moved to the innermost loops,
+    so that the volume only needs to be recomputed by the kernel when the
+    outer loops step.
+    """
+    # Decreasing list of polydpersity lengths
+    # Note: the reversing view, x[::-1], does not require a copy
+    idx = np.argsort(length)[::-1][:max_pd]
+    inner = orientation[idx] & (length[idx] > 1)
+    return np.hstack((idx[inner], idx[~inner]))
+
+
+def _orientation_mask(model_info):
+    # type: (ModelInfo) -> np.ndarray
+    """
+    Return a boolean array with True for the orientation parameters in
+    the kernel parameter vector.
+    """
+    partable = model_info.parameters
+    pars = partable.call_parameters[2:partable.npars+2]
+    return np.array([p.type == 'orientation' for p in pars], dtype=bool)
+
+
 ZEROS = tuple([0.]*31)
 def make_kernel_args(kernel, pairs):
     # type: (Kernel, Tuple[List[np.ndarray], List[np.ndarray]]) -> Tuple[CallDetails, np.ndarray, bool]
@@ -244,6 +273,238 @@ def make_kernel_args(kernel, pairs):
     return call_details, data, is_magnetic
 
 
+def make_mono_args(kernel, values):
+    # type: (Kernel, List[float]) -> Tuple[CallDetails, np.ndarray, bool]
+    """
+    Converts monodisperse parameter values into parameters for the kernel call.
+
+    *values* holds the value of each call parameter, starting with scale
+    and background.  The result is the same as :func:`make_kernel_args`
+    with a single point of weight 1.0 for each parameter, without the cost
+    of building and stacking the individual value and weight vectors.
+    """
+    npars = kernel.info.parameters.npars
+    nvalues = kernel.info.parameters.nvalues
+    call_details = make_details(kernel.info, np.ones(npars, 'i'),
+                                np.arange(npars), npars)
+    # Pad value array to a 32 value boundary
+    data_len = nvalues + 2*npars
+    extra = (32 - data_len%32)%32
+    data = np.zeros(data_len + extra, kernel.dtype)
+    data[:nvalues] = values
+    data[nvalues:nvalues+npars] = data[2:npars+2]
+    data[nvalues+npars:data_len] = 1.0
+    is_magnetic = convert_magnetism(kernel.info.parameters, data)
+    return call_details, data, is_magnetic
+
+
+class KernelArgs(object):
+    """
+    Reusable argument builder for calls to *kernel*.
+
+    Calling the builder with (value, weight) pairs returns the same
+    *(call_details, data, is_magnetic)* as :func:`make_kernel_args`, and
+    :meth:`mono` returns the same as :func:`make_mono_args`.  The
+    :class:`CallDetails` are cached for each set of distribution lengths,
+    and the values and weights are written in place into a persistent
+    buffer of the kernel precision, padded to a 32 value boundary and
+    aligned to 32 bytes.  This avoids rebuilding the details and stacking
+    the value vectors when only the parameter values change between
+    calls, as is usual when fitting.
+
+    The returned data is the persistent buffer itself, not a copy, so it
+    is overwritten by the next call to the builder.  Pass it to the kernel
+    before using the builder again, and copy it if it needs to be kept.
+    """
+    #: Number of distinct length signatures to keep before clearing the cache
+    cache_size = 16
+
+    def __init__(self, kernel):
+        # type: (Kernel) -> None
+        self.info = kernel.info
+        self.dtype = np.dtype(kernel.dtype)
+        self._details = {}  # type: Dict[Tuple[int, ...], CallDetails]
+        self._data = None  # type: np.ndarray
+
+    def __call__(self, pairs):
+        # type: (List[Tuple[List[float], List[float]]]) -> Tuple[CallDetails, np.ndarray, bool]
+        parameters = self.info.parameters
+        npars, nvalues = parameters.npars, parameters.nvalues
+        dispersed = pairs[2:npars+2]
+        call_details = self._get_details(tuple(len(w) for _, w in dispersed))
+        num_weights = call_details.num_weights
+        data = self._get_data(nvalues + 2*num_weights)
+        data[:nvalues] = [v[0][0] for v in pairs]
+        values, weights = data[nvalues:], data[nvalues+num_weights:]
+        for (v, w), start, n in zip(dispersed, call_details.offset,
+                                    call_details.length):
+            values[start:start+n] = v
+            weights[start:start+n] = w
+        is_magnetic = convert_magnetism(parameters, data)
+        return call_details, data, is_magnetic
+
+    def mono(self, values):
+        # type: (List[float]) -> Tuple[CallDetails, np.ndarray, bool]
+        """
+        Return the kernel arguments for monodisperse parameter *values*,
+        starting with scale and background.
+        """
+        parameters = self.info.parameters
+        npars, nvalues = parameters.npars, parameters.nvalues
+        call_details = self._get_details((1,)*npars)
+        data = self._get_data(nvalues + 2*npars)
+        data[:nvalues] = values
+        data[nvalues:nvalues+npars] = data[2:npars+2]
+        data[nvalues+npars:nvalues+2*npars] = 1.0
+        is_magnetic = convert_magnetism(parameters, data)
+        return call_details, data, is_magnetic
+
+    def _get_details(self, lengths):
+        # type: (Tuple[int, ...]) -> CallDetails
+        call_details = self._details.get(lengths, None)
+        if call_details is None:
+            if len(self._details) >= self.cache_size:
+                self._details.clear()
+            length = np.array(lengths, 'i')
+            offset = np.cumsum(np.hstack((0, length)))
+            call_details = make_details(self.info, length, offset[:-1],
+                                        offset[-1])
+            self._details[lengths] = call_details
+        return call_details
+
+    def _get_data(self, data_len):
+        # type: (int) -> np.ndarray
+        # Pad value array to a 32 value boundary.  Buffers of different
+        # data_len can share a padded size, so clear the stale tail.
+        size = data_len + (32 - data_len%32)%32
+        if self._data is None or self._data.size != size:
+            self._data = _aligned_zeros(size, self.dtype)
+        else:
+            self._data[data_len:] = 0.
+        return self._data
+
+
+def _aligned_zeros(size, dtype, align=32):
+    # type: (int, np.dtype, int) -> np.ndarray
+    """
+    Return a zero vector of *size* elements whose data starts on an
+    *align* byte boundary.
+    """
+    nbytes = size*dtype.itemsize
+    raw = np.zeros(nbytes + align, 'B')
+    start = -raw.ctypes.data % align
+    return raw[start:start+nbytes].view(dtype)
+
+
+def coverage_cutoff(call_details, values, coverage):
+    # type: (CallDetails, np.ndarray, float) -> Tuple[float, float]
+    """
+    Return the weight cutoff needed to cover a fraction of the dispersion
+    weight.
+
+    The points of the polydispersity mesh defined by *call_details* and
+    *values* are taken in order of decreasing weight until they account
+    for *coverage* of the total weight.  Returns *(cutoff, achieved)*
+    where *cutoff* is the value to pass to the kernel so that only these
+    points are evaluated, and *achieved* is the fraction of the total weight
+    they represent.  Points with the same weight as the last point needed are
+    also included, so *achieved* may be larger than *coverage*.
+
+    The mesh is never formed.  Instead the cutoff is found by bisection,
+    with the weight above each trial cutoff computed from the two factors
+    returned by :func:`_pd_mesh`.
+    """
+    outer, inner = _pd_mesh(call_details, values)
+    # tail[k] is the sum of inner[k:]
+    tail = np.hstack((np.cumsum(inner[::-1])[::-1], 0.))
+    total = np.sum(outer)*tail[0]
+    if coverage >= 1.0 or total <= 0.:
+        return 0.0, 1.0
+
+    def mass(cutoff):
+        # type: (float) -> float
+        index = np.searchsorted(inner, cutoff/outer, side='right')
+        return np.sum(outer*tail[index])
+
+    # The weight above lo covers the target and the weight above hi does
+    # not, so the boundary weight lies in (lo, hi].  Bisect geometrically
+    # since the weights span many decades.
+    target = coverage*total
+    lo = 0.5*np.min(outer)*np.min(inner[inner > 0.])
+    hi = np.max(outer)*inner[-1]
+    while True:
+        mid = np.sqrt(lo*hi)
+        if mid <= lo or mid >= hi:
+            break
+        if mass(mid) >= target:
+            lo = mid
+        else:
+            hi = mid
+
+    # Split the difference between the boundary weight and the next weight
+    # below it so that the comparison in the kernel is not sensitive to
+    # rounding in the weight product.
+    index = np.searchsorted(inner, lo/outer, side='right')
+    above = index < len(inner)
+    boundary = np.min(outer[above]*inner[index[above]])
+    below = index > 0
+    next_weight = (np.max(outer[below]*inner[index[below]-1])
+                   if below.any() else 0.0)
+    cutoff = 0.5*(boundary + next_weight)
+    achieved = mass(cutoff)/total
+    return cutoff, achieved
+
+
+def pd_points(call_details, values, cutoff):
+    # type: (CallDetails, np.ndarray, float) -> int
+    """
+    Return the number of points in the polydispersity mesh with weight
+    above *cutoff*, which are the points evaluated by the kernel.
+    """
+    weights = _pd_weights(call_details, values)
+    if cutoff <= 0.:
+        return int(np.prod([np.sum(w > 0.) for w in weights]))
+    outer, inner = _pd_mesh(call_details, values)
+    index = np.searchsorted(inner, cutoff/outer, side='right')
+    return int(np.sum(len(inner) - index))
+
+
+def _pd_mesh(call_details, values):
+    # type: (CallDetails, np.ndarray) -> Tuple[np.ndarray, np.ndarray]
+    """
+    Return the polydispersity mesh weights as two factors *(outer, inner)*.
+
+    The active loops are split into two groups with similar mesh sizes and
+    the weight products for each group are returned, with the zero weights
+    dropped from *outer* and *inner* sorted in increasing order.  Each point
+    in the full mesh has the weight of an outer point times an inner point,
+    so the points above a cutoff can be found by searching *inner* once per
+    outer point, in memory proportional to the square root of the mesh size
+    rather than the size itself.
+    """
+    outer, inner = np.ones(1), np.ones(1)
+    weights = _pd_weights(call_details, values)
+    for w in sorted(weights, key=len, reverse=True):
+        if len(outer) <= len(inner):
+            outer = np.multiply.outer(w.astype('d'), outer).flatten()
+        else:
+            inner = np.multiply.outer(w.astype('d'), inner).flatten()
+    return outer[outer > 0.], np.sort(inner)
+
+
+def _pd_weights(call_details, values):
+    # type: (CallDetails, np.ndarray) -> List[np.ndarray]
+    """
+    Return the weight vectors for the active polydispersity loops.
+    """
+    nvalues = call_details.info.parameters.nvalues
+    base = nvalues + call_details.num_weights
+    num_active = call_details.num_active
+    offsets = call_details.pd_offset[:num_active]
+    lengths = call_details.pd_length[:num_active]
+    return [values[base+k:base+k+n] for k, n in zip(offsets, lengths)]
+
+
 def convert_magnetism(parameters, values):
     """
     Convert magnetism values from polar to rectangular coordinates.
@@ -289,3 +550,115 @@ def dispersion_mesh(model_info, pars):
             offset += n
         value = pars
     return value, weight
+
+
+def test_kernel_args():
+    """
+    Check that the reusable builder matches :func:`make_kernel_args`.
+    """
+    from .core import load_model_info, build_model
+    from .direct_model import get_weights
+
+    model_info = load_model_info('cylinder')
+    model = build_model(model_info, dtype='single', platform='dll')
+    kernel = model.make_kernel([np.linspace(0.001, 0.5, 10)])
+    builder = KernelArgs(kernel)
+    parameters = model_info.parameters
+    # (10, 4) uses the same padded buffer as (10, 5) with a shorter fill
+    for radius_n, theta_n in ((1, 1), (10, 5), (10, 5), (10, 4), (35, 1)):
+        pars = dict(radius_pd=0.1, radius_pd_n=radius_n, theta_pd=10,
+                    theta_pd_n=theta_n, sld_M0=radius_n*1e-2)
+        pairs = [get_weights(p, pars) for p in parameters.call_parameters]
+        target = make_kernel_args(kernel, pairs)
+        actual = builder(pairs)
+        assert (actual[0].buffer == target[0].buffer).all()
+        assert actual[1].dtype == target[1].dtype
+        assert (actual[1] == target[1]).all()
+        assert actual[2] == target[2]
+        assert actual[1].ctypes.data % 32 == 0
+    assert len(builder._details) == 4
+    values = [p.default for p in parameters.call_parameters]
+    target = make_mono_args(kernel, values)
+    actual = builder.mono(values)
+    assert (actual[0].buffer == target[0].buffer).all()
+    assert (actual[1] == target[1]).all()
+
+
+def test_orientation_innermost():
+    """
+    Check that orientation dispersity is placed in the innermost loops.
+    """
+    from .core import load_model_info
+
+    model_info = load_model_info('cylinder')
+    pars = model_info.parameters.call_parameters[2:]
+    names = [p.name for p in pars[:model_info.parameters.npars]]
+    length = np.ones(len(names), 'i')
+    for name, n in (('radius', 35), ('length', 20), ('theta', 5),
+                    ('phi', 3)):
+        length[names.index(name)] = n
+    offset = np.cumsum(np.hstack((0, length)))
+    call_details = make_details(model_info, length, offset[:-1], offset[-1])
+    order = [names[k] for k in call_details.pd_par[:call_details.num_active]]
+    assert order == ['theta', 'phi', 'radius', 'length']
+    assert call_details.num_eval == 35*20*5*3
+
+    # With five active parameters and four loops the four longest are
+    # kept, even though the shortest is an orientation parameter.
+    length = np.array([35, 20, 1, 15, 10, 3])
+    orientation = np.array([False, False, False, False, True, True])
+    assert _pd_order(length, orientation, 4).tolist() == [4, 0, 1, 3]
+    model_info = load_model_info('triaxial_ellipsoid')
+    names = [p.name for p in model_info.parameters.kernel_parameters]
+    length = np.ones(len(names), 'i')
+    for name, n in (('radius_equat_minor', 35), ('radius_equat_major', 20),
+                    ('radius_polar', 15), ('theta', 10), ('psi', 3)):
+        length[names.index(name)] = n
+    offset = np.cumsum(np.hstack((0, length)))
+    try:
+        make_details(model_info, length, offset[:-1], offset[-1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("five active parameters should fail")
+
+
+def test_coverage():
+    """
+    Check that the coverage cutoff drops the expected dispersion weight.
+    """
+    from .core import load_model_info, build_model
+    from .direct_model import call_kernel, get_weights
+
+    model_info = load_model_info('cylinder')
+    model = build_model(model_info, dtype='double!', platform='dll')
+    kernel = model.make_kernel([np.linspace(0.001, 0.5, 10)])
+    pars = dict(radius_pd=0.1, radius_pd_n=35, length_pd=0.2,
+                length_pd_n=20)
+    pairs = [get_weights(p, pars)
+             for p in model_info.parameters.call_parameters]
+    call_details, values, _ = make_kernel_args(kernel, pairs)
+    weight = np.ones(1)
+    for w in _pd_weights(call_details, values):
+        weight = np.multiply.outer(w, weight).flatten()
+    total = np.sum(weight)
+
+    # Full coverage evaluates every point, as does the unrestricted call.
+    target = call_kernel(kernel, pars)
+    assert coverage_cutoff(call_details, values, 1.0) == (0.0, 1.0)
+    actual = call_kernel(kernel, pars, coverage=1.0)
+    assert (actual == target).all()
+    assert kernel.pd_counts == (len(weight), 0, 0.0)
+
+    # Partial coverage keeps the heaviest points until the coverage is met.
+    for coverage in (0.5, 0.9, 0.99):
+        cutoff, achieved = coverage_cutoff(call_details, values, coverage)
+        keep = np.sort(weight[weight > cutoff])
+        assert achieved >= coverage
+        assert np.sum(keep[keep > keep[0]]) < coverage*total
+        assert abs(achieved - np.sum(keep)/total) < 1e-12
+        assert pd_points(call_details, values, cutoff) == len(keep)
+        call_kernel(kernel, pars, coverage=coverage)
+        evaluated, skipped, skipped_weight = kernel.pd_counts
+        assert (evaluated, skipped) == (len(keep), len(weight) - len(keep))
+        assert abs(skipped_weight/total - (1 - achieved)) < 1e-12
@@ -29,10 +29,11 @@ from . import sesans  # type: ignore
 from . import weights
 from . import resolution
 from . import resolution2d
-from .details import make_kernel_args, dispersion_mesh
+from . import perf
+from .details import KernelArgs, dispersion_mesh, coverage_cutoff
 
 try:
-    from typing import Optional, Dict, Tuple
+    from typing import Optional, Dict, Tuple, List
 except ImportError:
     pass
 else:
@@ -40,8 +41,8 @@ else:
     from .kernel import Kernel, KernelModel
     from .modelinfo import Parameter, ParameterSet
 
-def call_kernel(calculator, pars, cutoff=0., mono=False):
-    # type: (Kernel, ParameterSet, float, bool) -> np.ndarray
+def call_kernel(calculator, pars, cutoff=0., mono=False, coverage=None):
+    # type: (Kernel, ParameterSet, float, bool, Optional[float]) -> np.ndarray
     """
     Call *kernel* returned from *model.make_kernel* with parameters *pars*.
 
@@ -53,6 +54,13 @@ def call_kernel(calculator, pars, cutoff=0., mono=False):
     uncertainty.
 
     *mono* is True if polydispersity should be set to none on all parameters.
+
+    *coverage* is the fraction of the total dispersion weight to integrate.
+    If it is given, then *cutoff* is ignored and is instead chosen so that
+    only the points of largest weight are evaluated, as needed to reach
+    the requested coverage.  The fraction achieved is stored in
+    *calculator.pd_coverage*.  This is not available for mixture and
+    product models.
     """
     parameters = calculator.info.parameters
     if mono:
@@ -64,14 +72,42 @@ def call_kernel(calculator, pars, cutoff=0., mono=False):
     else:
         active = lambda name: True
 
-    #print("pars",[p.id for p in parameters.call_parameters])
-    vw_pairs = [(get_weights(p, pars) if active(p.name)
-                 else ([pars.get(p.name, p.default)], [1.0]))
-                for p in parameters.call_parameters]
+    # Reuse the details and value buffer from the previous call if possible
+    if calculator.kernel_args is None:
+        calculator.kernel_args = KernelArgs(calculator)
+    builder = calculator.kernel_args
 
-    call_details, values, is_magnetic = make_kernel_args(calculator, vw_pairs)
+    #print("pars",[p.id for p in parameters.call_parameters])
+    if all(_is_monodisperse(p, pars) for p in parameters.call_parameters
+           if active(p.name)):
+        # Skip the weight vectors when there is no polydispersity.
+        with perf.timer('details'):
+            values = [pars.get(p.name, p.default)
+                      for p in parameters.call_parameters]
+            call_details, values, is_magnetic = builder.mono(values)
+    else:
+        with perf.timer('weights'):
+            vw_pairs = [(get_weights(p, pars) if active(p.name)
+                         else ([pars.get(p.name, p.default)], [1.0]))
+                        for p in parameters.call_parameters]
+        with perf.timer('details'):
+            call_details, values, is_magnetic = builder(vw_pairs)
     #print("values:", values)
-    return calculator(call_details, values, cutoff, is_magnetic)
+    if coverage is not None:
+        if calculator.info.composition is not None:
+            raise ValueError("coverage is not supported for %s models"
+                             % calculator.info.composition[0])
+        cutoff, calculator.pd_coverage = coverage_cutoff(
+            call_details, values, coverage)
+    else:
+        calculator.pd_coverage = None
+    with perf.timer('kernel'):
+        result = calculator(call_details, values, cutoff, is_magnetic)
+    if perf.enabled():
+        if calculator.pd_counts is not None:
+            perf.count('pd_points', calculator.pd_counts[0])
+        perf.count('q_points', len(result))
+    return result
 
 
 def call_ER(model_info, pars):
@@ -129,6 +165,16 @@ def call_profile(model_info, **pars):
     return x, y, model_info.profile_axes
 
 
+def _is_monodisperse(parameter, values):
+    # type: (Parameter, Dict[str, float]) -> bool
+    """
+    Return True if :func:`get_weights` would give a single point of weight
+    1.0 for *parameter* without computing the distribution.
+    """
+    return (values.get(parameter.name+'_pd_n', 0) == 0
+            or values.get(parameter.name+'_pd', 0.0) == 0)
+
+
 def get_weights(parameter, values):
     # type: (Parameter, Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]
     """
@@ -142,7 +188,8 @@ def get_weights(parameter, values):
     relative = parameter.relative_pd
     limits = parameter.limits
     disperser = values.get(parameter.name+'_pd_type', 'gaussian')
-    npts = values.get(parameter.name+'_pd_n', 0)
+    # bumps stores the number of points as a float parameter
+    npts = int(values.get(parameter.name+'_pd_n', 0))
     width = values.get(parameter.name+'_pd', 0.0)
     nsigma = values.get(parameter.name+'_pd_nsigma', 3.0)
     if npts == 0 or width == 0:
@@ -280,6 +327,9 @@ class DataMixin(object):
         self._kernel_inputs = q_vectors
         self._kernel_mono_inputs = q_mono
         self._kernel = None
+        self.pd_coverage = None  # type: Optional[float]
+        self.pd_counts = None  # type: Optional[Tuple[int, int, float]]
+        self.perf_stats = perf.PerfStats() if perf.ENABLED else None
         self.Iq, self.dIq, self.index = Iq, dIq, index
         self.resolution = res
 
@@ -301,15 +351,25 @@ class DataMixin(object):
         else:
             raise ValueError("Unknown model")
 
-    def _calc_theory(self, pars, cutoff=0.0):
-        # type: (ParameterSet, float) -> np.ndarray
+    def _calc_theory(self, pars, cutoff=0.0, coverage=None):
+        # type: (ParameterSet, float, Optional[float]) -> np.ndarray
+        if self.perf_stats is None:
+            return self._eval_theory(pars, cutoff, coverage)
+        with perf.recording(self.perf_stats):
+            return self._eval_theory(pars, cutoff, coverage)
+
+    def _eval_theory(self, pars, cutoff, coverage):
+        # type: (ParameterSet, float, Optional[float]) -> np.ndarray
         if self._kernel is None:
             self._kernel = self._model.make_kernel(self._kernel_inputs)
             self._kernel_mono = (
                 self._model.make_kernel(self._kernel_mono_inputs)
                 if self._kernel_mono_inputs else None)
 
-        Iq_calc = call_kernel(self._kernel, pars, cutoff=cutoff)
+        Iq_calc = call_kernel(self._kernel, pars, cutoff=cutoff,
+                              coverage=coverage)
+        self.pd_coverage = self._kernel.pd_coverage
+        self.pd_counts = self._kernel.pd_counts
         # Storing the calculated Iq values so that they can be plotted.
         # Only applies to oriented USANS data for now.
         # TODO: extend plotting of calculate Iq to other measurement types
@@ -318,11 +378,13 @@ class DataMixin(object):
         if self.data_type == 'sesans':
             Iq_mono = (call_kernel(self._kernel_mono, pars, mono=True)
                        if self._kernel_mono_inputs else None)
-            result = sesans.transform(self._data,
-                                      self._kernel_inputs[0], Iq_calc,
-                                      self._kernel_mono_inputs, Iq_mono)
+            with perf.timer('sesans'):
+                result = sesans.transform(self._data,
+                                          self._kernel_inputs[0], Iq_calc,
+                                          self._kernel_mono_inputs, Iq_mono)
         else:
-            result = self.resolution.apply(Iq_calc)
+            with perf.timer('resolution'):
+                result = self.resolution.apply(Iq_calc)
             if hasattr(self.resolution, 'nx'):
                 self.Iq_calc = (
                     self.resolution.qx_calc, self.resolution.qy_calc,
@@ -340,17 +402,27 @@ class DirectModel(DataMixin):
     *model* is a model calculator return from :func:`generate.load_model`
 
     *cutoff* is the polydispersity weight cutoff.
+
+    *coverage*, if not None, is the fraction of the total polydispersity
+    weight to integrate, which is used in place of *cutoff*.  The
+    fraction achieved by the last call is available as *pd_coverage*.
+
+    The number of polydispersity points evaluated and skipped by the
+    cutoff in the last call, and the total weight skipped, are available
+    as *pd_counts*.  See :attr:`kernel.Kernel.pd_counts`.
     """
-    def __init__(self, data, model, cutoff=1e-5):
-        # type: (Data, KernelModel, float) -> None
+    def __init__(self, data, model, cutoff=1e-5, coverage=None):
+        # type: (Data, KernelModel, float, Optional[float]) -> None
         self.model = model
         self.cutoff = cutoff
+        self.coverage = coverage
         # Note: _interpret_data defines the model attributes
         self._interpret_data(data, model)
 
     def __call__(self, **pars):
         # type: (**float) -> np.ndarray
-        return self._calc_theory(pars, cutoff=self.cutoff)
+        return self._calc_theory(pars, cutoff=self.cutoff,
+                                 coverage=self.coverage)
 
     def simulate_data(self, noise=None, **pars):
         # type: (Optional[float], **float) -> None
@@ -367,6 +439,110 @@ class DirectModel(DataMixin):
         """
         return call_profile(self.model.info, **pars)
 
+
+class MultiDirectModel(object):
+    """
+    Create a calculator object for a model on several datasets at once.
+
+    *datasets* is a list of 1D or 2D SAS data, all of the same type.
+    SESANS data is not supported.
+
+    *model*, *cutoff* and *coverage* are as for :class:`DirectModel`.
+
+    The q values needed by each dataset are joined into a single kernel
+    input, so each call evaluates the kernel, including the polydispersity
+    loop, once for all datasets.  The result is split back into the
+    datasets and the resolution for each dataset is applied separately.
+    All datasets share the same parameter values.
+
+    Calling the object returns a list with the theory for each dataset.
+    """
+    def __init__(self, datasets, model, cutoff=1e-5, coverage=None):
+        # type: (List[Data], KernelModel, float, Optional[float]) -> None
+        self.model = model
+        self.cutoff = cutoff
+        self.coverage = coverage
+        self.parts = [DirectModel(data, model, cutoff=cutoff,
+                                  coverage=coverage)
+                      for data in datasets]
+        data_types = set(part.data_type for part in self.parts)
+        if len(data_types) != 1:
+            raise ValueError("datasets must all be the same type")
+        if 'sesans' in data_types:
+            raise ValueError("SESANS data cannot be combined")
+        inputs = [part._kernel_inputs for part in self.parts]
+        self._kernel_inputs = [np.hstack(q) for q in zip(*inputs)]
+        self._offsets = np.cumsum([0] + [len(q[0]) for q in inputs])
+        self._kernel = None  # type: Kernel
+        self.pd_coverage = None  # type: Optional[float]
+        self.pd_counts = None  # type: Optional[Tuple[int, int, float]]
+
+    def __call__(self, **pars):
+        # type: (**float) -> List[np.ndarray]
+        if self._kernel is None:
+            self._kernel = self.model.make_kernel(self._kernel_inputs)
+        Iq_calc = call_kernel(self._kernel, pars, cutoff=self.cutoff,
+                              coverage=self.coverage)
+        self.pd_coverage = self._kernel.pd_coverage
+        self.pd_counts = self._kernel.pd_counts
+        return [part.resolution.apply(Iq_calc[start:stop])
+                for part, start, stop
+                in zip(self.parts, self._offsets[:-1], self._offsets[1:])]
+
+
+def test_pd_counts():
+    """
+    Check the polydispersity points evaluated and skipped by the cutoff.
+    """
+    from .data import empty_data1D
+    from .core import load_model_info, build_model
+
+    model = build_model(load_model_info('cylinder'), platform='dll')
+    data = empty_data1D(np.logspace(-3, -1, 20))
+    pars = {'radius_pd': 0.1, 'radius_pd_n': 35,
+            'length_pd': 0.1, 'length_pd_n': 35}
+    radius, length = [p for p in model.info.parameters.call_parameters
+                      if p.name in ('radius', 'length')]
+    weights = np.multiply.outer(get_weights(radius, pars)[1],
+                                get_weights(length, pars)[1])
+    for cutoff in (0., 1e-5, 1e-3):
+        calculator = DirectModel(data, model, cutoff=cutoff)
+        calculator(**pars)
+        evaluated, skipped, skipped_weight = calculator.pd_counts
+        assert evaluated == np.sum(weights > cutoff)
+        assert evaluated + skipped == weights.size
+        assert np.allclose(skipped_weight, np.sum(weights[weights <= cutoff]),
+                           rtol=1e-12, atol=0)
+    calculator()
+    assert calculator.pd_counts == (1, 0, 0.)
+
+
+def test_multi_direct_model():
+    """
+    Check that the combined datasets match the individual calculations.
+    """
+    from .data import empty_data1D, empty_data2D
+    from .core import load_model_info, build_model
+
+    model = build_model(load_model_info('cylinder'), platform='dll')
+    pars = {'radius': 20., 'length': 300., 'radius_pd': 0.1,
+            'radius_pd_n': 10, 'theta': 30., 'phi': 10.}
+    for datasets in ([empty_data1D(np.logspace(-3, -1, 20)),
+                      empty_data1D(np.logspace(-2, 0, 30))],
+                     [empty_data2D(np.linspace(-0.1, 0.1, 6)),
+                      empty_data2D(np.linspace(-0.3, 0.3, 8))]):
+        calculator = MultiDirectModel(datasets, model)
+        for part, Iq in zip(datasets, calculator(**pars)):
+            target = DirectModel(part, model)(**pars)
+            assert np.allclose(Iq, target, rtol=1e-14, atol=0)
+    try:
+        MultiDirectModel(datasets[:1] + [empty_data1D([0.1])], model)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mixed 1D and 2D data should fail")
+
+
 def main():
     # type: () -> None
     """
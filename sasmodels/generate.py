@@ -1,4 +1,4 @@
-"""
+r"""
 SAS model constructor.
 
 Small angle scattering models are defined by a set of kernel functions:
@@ -25,6 +25,14 @@ Small angle scattering models are defined by a set of kernel functions:
     for some parameter or other (e.g., v.bell_radius < v.radius).  If
     necessary, the expression can call a function.
 
+    *prepare(p1, p2, ..., Scratch \*scratch)* is optional.  It fills in a
+    model defined *Scratch* structure with values that depend only on
+    the parameters, such as shell radii or contrast terms.  If it is
+    present, it is called once for each point in the polydispersity mesh
+    and the structure is passed as an additional final argument
+    *const Scratch \*scratch* to *Iq* and *Iqxy*, so that the work is done
+    once per parameter set rather than once per q value.
+
 These functions are defined in a kernel module .py script and an associated
 set of .c files.  The model constructor will use them to create models with
 polydispersity across volume and orientation parameters, and provide
@@ -106,9 +114,10 @@ The kernel module must set variables defining the kernel meta data:
     *VR* is a python function defining the volume ratio.  If it is not
     present, the volume ratio is 1.
 
-    *form_volume*, *Iq*, *Iqxy*, *Imagnetic* are strings containing the
-    C source code for the body of the volume, Iq, and Iqxy functions
-    respectively.  These can also be defined in the last source file.
+    *form_volume*, *Iq*, *Iqxy*, *Imagnetic*, *prepare* are strings
+    containing the C source code for the body of the volume, Iq, Iqxy and
+    prepare functions respectively.  These can also be defined in the last
+    source file.
 
     *Iq* and *Iqxy* also be instead be python functions defining the
     kernel.  If they are marked as *Iq.vectorized = True* then the
@@ -356,13 +365,16 @@ def ocl_timestamp(model_info):
     return newest
 
 
-def convert_type(source, dtype):
-    # type: (str, np.dtype) -> str
+def convert_type(source, dtype, mixed=False):
+    # type: (str, np.dtype, bool) -> str
     """
     Convert code from double precision to the desired type.
 
     Floating point constants are tagged with 'f' for single precision or 'L'
     for long double precision.
+
+    If *mixed* is True, the polydispersity sums are accumulated in double
+    precision even though the rest of the kernel uses *dtype*.
     """
     source = _fix_tgmath_int(source)
     if dtype == F16:
@@ -379,6 +391,8 @@ def convert_type(source, dtype):
         source = _convert_type(source, "long double", "L")
     else:
         raise ValueError("Unexpected dtype in source conversion: %s" % dtype)
+    if mixed:
+        source = "#define MIXED_PRECISION\n" + source
     return ("#define FLOAT_SIZE %d\n" % fbytes)+source
 
 
@@ -546,7 +560,7 @@ def kernel_name(model_info, variant):
     """
     Name of the exported kernel symbol.
 
-    *variant* is "Iq", "Iqxy" or "Imagnetic".
+    *variant* is "Iq", "Iqxy", "Imagnetic", "Iq_mono" or "Iqxy_mono".
     """
     return model_info.name + "_" + variant
 
@@ -573,15 +587,15 @@ def load_template(filename):
 
 
 _FN_TEMPLATE = """\
-double %(name)s(%(pars)s);
-double %(name)s(%(pars)s) {
+%(type)s %(name)s(%(pars)s);
+%(type)s %(name)s(%(pars)s) {
 #line %(line)d "%(filename)s"
     %(body)s
 }
 
 """
-def _gen_fn(name, pars, body, filename, line):
-    # type: (str, List[Parameter], str, str, int) -> str
+def _gen_fn(name, pars, body, filename, line, fn_type='double', extra=()):
+    # type: (str, List[Parameter], str, str, int, str, Sequence[str]) -> str
     """
     Generate a function given pars and body.
 
@@ -591,10 +605,14 @@ def _gen_fn(name, pars, body, filename, line):
          double fn(double a, double b, ...) {
              ....
          }
+
+    *fn_type* is the return type of the function, and *extra* is a list of
+    additional argument declarations to add after the parameters.
     """
-    par_decl = ', '.join(p.as_function_argument() for p in pars) if pars else 'void'
+    args = [p.as_function_argument() for p in pars] + list(extra)
+    par_decl = ', '.join(args) if args else 'void'
     return _FN_TEMPLATE % {
-        'name': name, 'pars': par_decl, 'body': body,
+        'name': name, 'type': fn_type, 'pars': par_decl, 'body': body,
         'filename': filename.replace('\\', '\\\\'), 'line': line,
     }
 
@@ -633,6 +651,18 @@ def _have_Iqxy(sources):
         return False
 
 
+_PREPARE_PATTERN = re.compile("^((inline|static) )? *(void )? *prepare *([(]|$)",
+                              flags=re.MULTILINE)
+def _have_prepare(sources):
+    # type: (List[str]) -> bool
+    """
+    Return true if any file defines the prepare function.
+
+    This has the same limitations as :func:`_have_Iqxy`.
+    """
+    return any(_PREPARE_PATTERN.search(code) for path, code in sources)
+
+
 def _add_source(source, code, path):
     """
     Add a file to the list of source code chunks, tagged with path and line.
@@ -677,6 +707,12 @@ def make_source(model_info):
     for path, code in user_code:
         _add_source(source, code, path)
 
+    # Models with a prepare function pass the scratch structure that it
+    # fills to Iq and Iqxy as an additional final argument.
+    have_prepare = (_have_prepare(user_code)
+                    or isinstance(model_info.prepare, str))
+    scratch_arg = ["const Scratch *scratch"] if have_prepare else []
+
     # Make parameters for q, qx, qy so that we can use them in declarations
     q, qx, qy = [Parameter(name=v) for v in ('q', 'qx', 'qy')]
     # Generate form_volume function, etc. from body only
@@ -684,14 +720,21 @@ def make_source(model_info):
         pars = partable.form_volume_parameters
         source.append(_gen_fn('form_volume', pars, model_info.form_volume,
                               model_info.filename, model_info._form_volume_line))
+    if isinstance(model_info.prepare, str):
+        pars = partable.iq_parameters
+        source.append(_gen_fn('prepare', pars, model_info.prepare,
+                              model_info.filename, model_info._prepare_line,
+                              fn_type='void', extra=["Scratch *scratch"]))
     if isinstance(model_info.Iq, str):
         pars = [q] + partable.iq_parameters
         source.append(_gen_fn('Iq', pars, model_info.Iq,
-                              model_info.filename, model_info._Iq_line))
+                              model_info.filename, model_info._Iq_line,
+                              extra=scratch_arg))
     if isinstance(model_info.Iqxy, str):
         pars = [qx, qy] + partable.iqxy_parameters
         source.append(_gen_fn('Iqxy', pars, model_info.Iqxy,
-                              model_info.filename, model_info._Iqxy_line))
+                              model_info.filename, model_info._Iqxy_line,
+                              extra=scratch_arg))
 
     # Define the parameter table
     # TODO: plug in current line number
@@ -711,11 +754,18 @@ def make_source(model_info):
         call_volume = "#define CALL_VOLUME(v) 1.0"
     source.append(call_volume)
 
-    refs = ["_q[_i]"] + _call_pars("_v.", partable.iq_parameters)
+    # The kernel declares *scratch* and calls CALL_PREPARE to fill it.
+    if have_prepare:
+        refs = _call_pars("_v.", partable.iq_parameters) + ["_s"]
+        source.append("#define CALL_PREPARE(_s,_v) prepare(%s)"%(",".join(refs)))
+    scratch_ref = ["&scratch"] if have_prepare else []
+
+    refs = ["_q[_i]"] + _call_pars("_v.", partable.iq_parameters) + scratch_ref
     call_iq = "#define CALL_IQ(_q,_i,_v) Iq(%s)" % (",".join(refs))
     if _have_Iqxy(user_code) or isinstance(model_info.Iqxy, str):
         # Call 2D model
-        refs = ["_q[2*_i]", "_q[2*_i+1]"] + _call_pars("_v.", partable.iqxy_parameters)
+        refs = (["_q[2*_i]", "_q[2*_i+1]"]
+                + _call_pars("_v.", partable.iqxy_parameters) + scratch_ref)
         call_iqxy = "#define CALL_IQ(_q,_i,_v) Iqxy(%s)" % (",".join(refs))
     else:
         # Call 1D model with sqrt(qx^2 + qy^2)
@@ -727,6 +777,16 @@ def make_source(model_info):
     magpars = [k-2 for k,p in enumerate(partable.call_parameters)
                if p.type == 'sld']
 
+    # Flag the parameters used by form_volume so that the kernel only
+    # recomputes the volume when a polydispersity loop changes one of them.
+    volpars = [k-2 for k,p in enumerate(partable.call_parameters)
+               if p.type == 'volume']
+    if volpars:
+        is_volume = " || ".join("_k==%d"%k for k in volpars)
+    else:
+        is_volume = "0"
+    source.append("#define IS_VOLUME_PAR(_k) (%s)"%is_volume)
+
     # Fill in definitions for numbers of parameters
     source.append("#define MAX_PD %s"%partable.max_pd)
     source.append("#define NUM_PARS %d"%partable.npars)
@@ -738,18 +798,29 @@ def make_source(model_info):
 
     # TODO: allow mixed python/opencl kernels?
 
-    ocl = kernels(ocl_code, call_iq, call_iqxy, model_info.name)
-    dll = kernels(dll_code, call_iq, call_iqxy, model_info.name)
+    ocl = kernels(ocl_code, call_iq, call_iqxy, model_info.name,
+                  partable.max_pd)
+    dll = kernels(dll_code, call_iq, call_iqxy, model_info.name,
+                  partable.max_pd)
     result = {
-        'dll': '\n'.join(source+dll[0]+dll[1]+dll[2]),
-        'opencl': '\n'.join(source+ocl[0]+ocl[1]+ocl[2]),
+        'dll': '\n'.join(source+dll[0]+dll[1]+dll[2]+dll[3]+dll[4]),
+        'opencl': '\n'.join(source+ocl[0]+ocl[1]+ocl[2]+ocl[3]+ocl[4]),
     }
 
     return result
 
 
-def kernels(kernel, call_iq, call_iqxy, name):
-    # type: ([str,str], str, str, str) -> List[str]
+def kernels(kernel, call_iq, call_iqxy, name, max_pd):
+    # type: ([str,str], str, str, str, int) -> List[str]
+    """
+    Return the code for the Iq, Iqxy, Imagnetic, Iq_mono and Iqxy_mono
+    kernels from the kernel template.
+
+    The monodisperse variants are compiled with MAX_PD set to zero so
+    that the polydispersity loops are removed.  The parameter table has
+    already been defined with the true MAX_PD, so the kernels share the
+    same calling convention.
+    """
     code = kernel[0]
     path = kernel[1].replace('\\', '\\\\')
     iq = [
@@ -784,7 +855,35 @@ def kernels(kernel, call_iq, call_iqxy, name):
         "#undef KERNEL_NAME",
     ]
 
-    return iq, iqxy, imagnetic
+    iq_mono = [
+        # define the Iq kernel without polydispersity loops
+        "#define KERNEL_NAME %s_Iq_mono" % name,
+        "#undef MAX_PD",
+        "#define MAX_PD 0",
+        call_iq,
+        '#line 1 "%s Iq_mono"' % path,
+        code,
+        "#undef MAX_PD",
+        "#define MAX_PD %d" % max_pd,
+        "#undef CALL_IQ",
+        "#undef KERNEL_NAME",
+        ]
+
+    iqxy_mono = [
+        # define the Iqxy kernel without polydispersity loops
+        "#define KERNEL_NAME %s_Iqxy_mono" % name,
+        "#undef MAX_PD",
+        "#define MAX_PD 0",
+        call_iqxy,
+        '#line 1 "%s Iqxy_mono"' % path,
+        code,
+        "#undef MAX_PD",
+        "#define MAX_PD %d" % max_pd,
+        "#undef CALL_IQ",
+        "#undef KERNEL_NAME",
+        ]
+
+    return iq, iqxy, imagnetic, iq_mono, iqxy_mono
 
 
 def load_kernel_module(model_name):
@@ -14,11 +14,11 @@ from __future__ import division, print_function
 import numpy as np
 
 try:
-    from typing import List
+    from typing import List, Tuple
 except ImportError:
     pass
 else:
-    from .details import CallDetails
+    from .details import CallDetails, KernelArgs
     from .modelinfo import ModelInfo
     import numpy as np  # type: ignore
 
@@ -39,6 +39,16 @@ class Kernel(object):
     info = None  # type: ModelInfo
     results = None # type: List[np.ndarray]
     dtype = None  # type: np.dtype
+    #: fraction of the dispersion weight included in the last call, if the
+    #: call was made with a *coverage* target
+    pd_coverage = None  # type: float
+    #: *(evaluated, skipped, skipped_weight)* for the last call, giving the
+    #: number of polydispersity points evaluated, the number skipped because
+    #: their weight was not above the cutoff, and the sum of their weights
+    pd_counts = None  # type: Tuple[int, int, float]
+    #: reusable argument builder for the kernel, created on first use by
+    #: :func:`sasmodels.direct_model.call_kernel`
+    kernel_args = None  # type: KernelArgs
 
     def __call__(self, call_details, values, cutoff, magnetic):
         # type: (CallDetails, np.ndarray, np.ndarray, float, bool) -> np.ndarray
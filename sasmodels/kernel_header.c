@@ -28,6 +28,7 @@
 #  define SAS_DOUBLE dou ## ble
 #  ifdef __cplusplus
       #include <cstdio>
+      #include <cstdlib>
       #include <cmath>
       using namespace std;
       #if defined(_MSC_VER)
@@ -53,6 +54,7 @@
 #  else // !__cplusplus
      #include <inttypes.h>  // C99 guarantees that int32_t types is here
      #include <stdio.h>
+     #include <stdlib.h>
      #if defined(__TINYC__)
          typedef int int32_t;
          #include <math.h>
@@ -85,6 +87,28 @@
 #  define pown(a,b) pow(a,b)
 #endif // !USE_OPENCL
 
+// Vectorized dlls (see kerneldll.SIMD) promise the compiler that the q and
+// result vectors do not overlap.
+#ifdef USE_SIMD
+#  ifdef __cplusplus
+#    define SAS_RESTRICT __restrict
+#  else
+#    define SAS_RESTRICT restrict
+#  endif
+#else
+#  define SAS_RESTRICT
+#endif
+
+// Polydispersity sums and the normalization are accumulated as SAS_ACCUM.
+// Mixed precision kernels evaluate I(q) in single precision but keep the
+// sums in double precision; otherwise SAS_ACCUM is converted along with
+// the rest of the kernel.
+#ifdef MIXED_PRECISION
+#  define SAS_ACCUM dou ## ble
+#else
+#  define SAS_ACCUM double
+#endif
+
 #if defined(NEED_EXPM1)
    static SAS_DOUBLE expm1(SAS_DOUBLE x_in) {
       double x = (double)x_in;  // go back to float for single precision kernels
@@ -79,7 +79,7 @@ void KERNEL_NAME(
     global const ProblemDetails *details,
     global const double *values,
     global const double *q, // nq q values, with padding to boundary
-    global double *result,  // nq+1 return values, again with padding
+    global SAS_ACCUM *result,  // nq+4 return values, again with padding
     const double cutoff     // cutoff in the polydispersity weight product
     )
 {
@@ -108,6 +108,18 @@ void KERNEL_NAME(
   double cos_mspin, sin_mspin;
   set_spins(values[NUM_PARS+2], values[NUM_PARS+3], spins);
   SINCOS(-values[NUM_PARS+4]*M_PI_180, sin_mspin, cos_mspin);
+
+  // The spin projections are constant across orientation and
+  // polydispersity for given qx, qy, so compute them once per call.
+  const double qx = q[2*q_index];
+  const double qy = q[2*q_index+1];
+  const double qsq = qx*qx + qy*qy;
+  double p[4];  // dd, du, ud, uu
+  if (qsq > 1.e-16) {
+    p[0] = (qy*cos_mspin + qx*sin_mspin)/qsq;
+    p[3] = -p[0];
+    p[1] = p[2] = (qy*sin_mspin - qx*cos_mspin)/qsq;
+  }
 #endif // MAGNETIC
 
   // Fill in the initial variables
@@ -120,8 +132,15 @@ void KERNEL_NAME(
 //if (q_index==0) printf("NUM_VALUES:%d  NUM_PARS:%d  MAX_PD:%d\n", NUM_VALUES, NUM_PARS, MAX_PD);
 //if (q_index==0) printf("start:%d stop:%d\n", pd_start, pd_stop);
 
-  double pd_norm = (pd_start == 0 ? 0.0 : result[nq]);
-  double this_result = (pd_start == 0 ? 0.0 : result[q_index]);
+  SAS_ACCUM pd_norm = (pd_start == 0 ? 0.0 : result[nq]);
+  // Count the points evaluated and the points and weight skipped by the
+  // cutoff in this call.  The caller sums them over the calls, since a
+  // running total in single precision is inexact beyond 2^24 points.
+  // The counts for one call are below 2^24, so they are stored exactly.
+  int32_t pd_evaluated = 0;
+  int32_t pd_skipped = 0;
+  SAS_ACCUM pd_skipped_weight = 0.0;
+  SAS_ACCUM this_result = (pd_start == 0 ? 0.0 : result[q_index]);
 //if (q_index==0) printf("start %d %g %g\n", pd_start, pd_norm, this_result);
 
 #if MAX_PD>0
@@ -179,6 +198,26 @@ void KERNEL_NAME(
   const double spherical_correction = 1.0;
 #endif
 
+  // The volume depends only on the volume parameters, so it only needs to
+  // be recomputed when the loop over one of them moves to a new value.
+#if MAX_PD>0
+  const bool vol0 = IS_VOLUME_PAR(p0);
+#endif
+#if MAX_PD>1
+  const bool vol1 = IS_VOLUME_PAR(p1);
+#endif
+#if MAX_PD>2
+  const bool vol2 = IS_VOLUME_PAR(p2);
+#endif
+#if MAX_PD>3
+  const bool vol3 = IS_VOLUME_PAR(p3);
+#endif
+#if MAX_PD>4
+  const bool vol4 = IS_VOLUME_PAR(p4);
+#endif
+  bool recompute_volume = true;
+  double volume = 0.0;
+
   int step = pd_start;
 
 
@@ -186,6 +225,7 @@ void KERNEL_NAME(
   const double weight5 = 1.0;
   while (i4 < n4) {
     local_values.vector[p4] = v4[i4];
+    recompute_volume |= vol4;
     double weight4 = w4[i4] * weight5;
 //if (q_index == 0) printf("step:%d level %d: p:%d i:%d n:%d value:%g weight:%g\n", step, 4, p4, i4, n4, local_values.vector[p4], weight4);
 #elif MAX_PD>3
@@ -194,6 +234,7 @@ void KERNEL_NAME(
 #if MAX_PD>3
   while (i3 < n3) {
     local_values.vector[p3] = v3[i3];
+    recompute_volume |= vol3;
     double weight3 = w3[i3] * weight4;
 //if (q_index == 0) printf("step:%d level %d: p:%d i:%d n:%d value:%g weight:%g\n", step, 3, p3, i3, n3, local_values.vector[p3], weight3);
 #elif MAX_PD>2
@@ -202,6 +243,7 @@ void KERNEL_NAME(
 #if MAX_PD>2
   while (i2 < n2) {
     local_values.vector[p2] = v2[i2];
+    recompute_volume |= vol2;
     double weight2 = w2[i2] * weight3;
 //if (q_index == 0) printf("step:%d level %d: p:%d i:%d n:%d value:%g weight:%g\n", step, 2, p2, i2, n2, local_values.vector[p2], weight2);
 #elif MAX_PD>1
@@ -210,6 +252,7 @@ void KERNEL_NAME(
 #if MAX_PD>1
   while (i1 < n1) {
     local_values.vector[p1] = v1[i1];
+    recompute_volume |= vol1;
     double weight1 = w1[i1] * weight2;
 //if (q_index == 0) printf("step:%d level %d: p:%d i:%d n:%d value:%g weight:%g\n", step, 1, p1, i1, n1, local_values.vector[p1], weight1);
 #elif MAX_PD>0
@@ -221,6 +264,7 @@ void KERNEL_NAME(
   }
   while(i0 < n0) {
     local_values.vector[p0] = v0[i0];
+    recompute_volume |= vol0;
     double weight0 = w0[i0] * weight1;
 //if (q_index == 0) printf("step:%d level %d: p:%d i:%d n:%d value:%g weight:%g\n", step, 0, p0, i0, n0, local_values.vector[p0], weight0);
     if (fast_theta) { // Theta is in inner loop
@@ -243,22 +287,22 @@ void KERNEL_NAME(
         // spherical correction is set at a minimum of 1e-6, otherwise there
         // would be problems looking at models with theta=90.
         const double weight = weight0 * spherical_correction;
-        pd_norm += weight * CALL_VOLUME(local_values.table);
+        if (recompute_volume) {
+          volume = CALL_VOLUME(local_values.table);
+          recompute_volume = false;
+        }
+        pd_norm += weight * volume;
 
-#if defined(MAGNETIC) && NUM_MAGNETIC > 0
-        const double qx = q[2*q_index];
-        const double qy = q[2*q_index+1];
-        const double qsq = qx*qx + qy*qy;
+#if defined(CALL_PREPARE) && !(defined(MAGNETIC) && NUM_MAGNETIC > 0)
+        // Parameter dependent values used by CALL_IQ.
+        Scratch scratch;
+        CALL_PREPARE(&scratch, local_values.table);
+#endif
 
-        // Constant across orientation, polydispersity for given qx, qy
+#if defined(MAGNETIC) && NUM_MAGNETIC > 0
         double scattering = 0.0;
         // TODO: what is the magnetic scattering at q=0
         if (qsq > 1.e-16) {
-          double p[4];  // dd, du, ud, uu
-          p[0] = (qy*cos_mspin + qx*sin_mspin)/qsq;
-          p[3] = -p[0];
-          p[1] = p[2] = (qy*sin_mspin - qx*cos_mspin)/qsq;
-
           for (int index=0; index<4; index++) {
             const double xs = spins[index];
             if (xs > 1.e-8) {
@@ -287,6 +331,11 @@ void KERNEL_NAME(
                     SLD(M1+3*sk, slds[sk]);
                 }
                 #endif
+                #ifdef CALL_PREPARE
+                // The sld values depend on q, so prepare for each q.
+                Scratch scratch;
+                CALL_PREPARE(&scratch, local_values.table);
+                #endif
                 scattering += CALL_IQ(q, q_index, local_values.table);
               }
             }
@@ -296,6 +345,10 @@ void KERNEL_NAME(
         const double scattering = CALL_IQ(q, q_index, local_values.table);
 #endif // !MAGNETIC
         this_result += weight * scattering;
+        ++pd_evaluated;
+      } else {
+        ++pd_skipped;
+        pd_skipped_weight += weight0;
       }
     }
     ++step;
@@ -331,7 +384,12 @@ void KERNEL_NAME(
 #endif
 
 //if (q_index==0) printf("res: %g/%g\n", this_result, pd_norm);
-  // Remember the current result and the updated norm.
+  // Remember the current result and the updated norm and the counters for this call.
   result[q_index] = this_result;
-  if (q_index == 0) result[nq] = pd_norm;
+  if (q_index == 0) {
+    result[nq] = pd_norm;
+    result[nq+1] = pd_evaluated;
+    result[nq+2] = pd_skipped;
+    result[nq+3] = pd_skipped_weight;
+  }
 }
@@ -0,0 +1,188 @@
+r"""
+Cached kernel evaluation
+------------------------
+
+Expensive models are often evaluated many times on the same q grid with
+only *scale* and *background* changing, for example while a fit is
+adjusting the overall intensity.  :class:`CachedModel` wraps any
+:class:`sasmodels.kernel.KernelModel` and keeps the most recently used
+results in a bounded cache.  The cache is keyed by the q vectors, the
+polydispersity details, the parameter values (excluding scale and
+background), the cutoff and the magnetism flag, so it is only used
+when the result would be identical apart from rounding.
+
+The kernel is evaluated with *scale=1* and *background=0* and the
+normalized result is stored, so that a repeated call which differs only
+in scale or background is returned as *scale\*I(q) + background* without
+running the kernel.
+
+To use it, wrap the model returned by :func:`sasmodels.core.build_model`::
+
+    model = CachedModel(build_model(model_info), size=32)
+    kernel = model.make_kernel([q])
+
+or pass *cache=32* to :func:`sasmodels.core.build_model`.
+"""
+from __future__ import print_function
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np  # type: ignore
+
+from .kernel import KernelModel, Kernel
+
+try:
+    from typing import List, Tuple
+except ImportError:
+    pass
+else:
+    from .details import CallDetails
+
+#: Default number of results retained by :class:`CachedModel`.
+DEFAULT_CACHE_SIZE = 32
+
+
+class CachedModel(KernelModel):
+    """
+    Kernel model which caches the results of the wrapped *model*.
+
+    *size* is the number of results to keep.  The least recently used
+    result is discarded when the cache is full.  The cache is shared by
+    all kernels created by the model, so a new kernel on the same q
+    vectors can reuse the results from an earlier kernel.
+
+    *hits* and *misses* count the cache lookups.
+    """
+    def __init__(self, model, size=DEFAULT_CACHE_SIZE):
+        # type: (KernelModel, int) -> None
+        self.model = model
+        self.info = model.info
+        self.dtype = model.dtype
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = self.misses = 0
+
+    def make_kernel(self, q_vectors):
+        # type: (List[np.ndarray]) -> CachedKernel
+        kernel = self.model.make_kernel(q_vectors)
+        return CachedKernel(self, kernel, _hash_arrays(q_vectors))
+
+    def lookup(self, key):
+        # type: (Tuple) -> Tuple[np.ndarray, Tuple[int, int, float]]
+        """
+        Return the cached *(result, pd_counts)* for *key*, or None if it
+        is not cached.
+        """
+        result = self.cache.pop(key, None)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache[key] = result # move to the end as most recently used
+        return result
+
+    def store(self, key, result):
+        # type: (Tuple, Tuple[np.ndarray, Tuple[int, int, float]]) -> None
+        """
+        Save *result* for *key*, removing the least recently used entry
+        if the cache is full.
+        """
+        if self.size <= 0:
+            return
+        self.cache[key] = result
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+    def clear(self):
+        # type: () -> None
+        """
+        Empty the cache.
+        """
+        self.cache.clear()
+        self.hits = self.misses = 0
+
+    def release(self):
+        # type: () -> None
+        self.clear()
+        self.model.release()
+
+
+class CachedKernel(Kernel):
+    """
+    Kernel wrapper which returns cached results from the parent
+    :class:`CachedModel` where available.
+    """
+    def __init__(self, model, kernel, q_hash):
+        # type: (CachedModel, Kernel, str) -> None
+        self.model = model
+        self.kernel = kernel
+        self.q_hash = q_hash
+        self.dim = kernel.dim
+        self.info = kernel.info
+        self.dtype = kernel.dtype
+
+    def __call__(self, call_details, values, cutoff, magnetic):
+        # type: (CallDetails, np.ndarray, float, bool) -> np.ndarray
+        scale, background = values[0], values[1]
+        key = (self.q_hash, call_details.buffer.tobytes(),
+               values[2:].tobytes(), float(cutoff), bool(magnetic))
+        cached = self.model.lookup(key)
+        if cached is None:
+            unit_values = values.copy()
+            unit_values[0:2] = [1.0, 0.0]
+            result = self.kernel(call_details, unit_values, cutoff, magnetic)
+            cached = np.array(result, copy=True), self.kernel.pd_counts
+            self.model.store(key, cached)
+        result, self.pd_counts = cached
+        return scale*result + background
+
+    def release(self):
+        # type: () -> None
+        self.kernel.release()
+
+
+def _hash_arrays(arrays):
+    # type: (List[np.ndarray]) -> str
+    """
+    Return a digest of the shape and contents of a list of arrays.
+    """
+    digest = hashlib.sha1()
+    for v in arrays:
+        v = np.ascontiguousarray(v)
+        digest.update(str((v.dtype.str, v.shape)).encode('ascii'))
+        digest.update(v.tobytes())
+    return digest.hexdigest()
+
+
+def test_cached_model():
+    """
+    Check that cached results match the uncached kernel.
+    """
+    from .core import load_model_info, build_model
+    from .direct_model import call_kernel
+
+    model_info = load_model_info('sphere')
+    model = build_model(model_info, dtype='double', platform='dll')
+    cached = CachedModel(model, size=2)
+    q = np.logspace(-3, -1, 20)
+    kernel = model.make_kernel([q])
+    cached_kernel = cached.make_kernel([q])
+    pars = {'radius': 50., 'radius_pd': 0.1, 'radius_pd_n': 10}
+    for scale, background in ((1., 0.), (2., 0.5), (3., 0.1)):
+        pars.update(scale=scale, background=background)
+        target = call_kernel(kernel, pars)
+        actual = call_kernel(cached_kernel, pars)
+        assert np.allclose(target, actual, rtol=1e-14, atol=0)
+    assert cached.misses == 1 and cached.hits == 2
+
+    # changing a kernel parameter misses, and the LRU holds two entries
+    for radius in (60., 70., 50.):
+        pars['radius'] = radius
+        call_kernel(cached_kernel, pars)
+    assert cached.misses == 4 and len(cached.cache) == 2
+
+    # a new kernel on the same q vectors shares the cache
+    pars['radius'] = 70.
+    call_kernel(cached.make_kernel([q.copy()]), pars)
+    assert cached.hits == 3
@@ -47,10 +47,22 @@ OpenCL kernels are compiled when needed by the device driver.  Some
 drivers produce compiler output even when there is no error.  You
 can see the output by setting PYOPENCL_COMPILER_OUTPUT=1.  It should be
 harmless, albeit annoying.
+
+The q vectors are padded to a multiple of the preferred work group size
+multiple reported by the driver.  Set SAS_OPENCL_TUNE=1 in the environment
+to also tune the work group size used to launch each kernel: on first use
+the kernel is timed with a few candidate local sizes, and the fastest is
+remembered for the remainder of the session and saved to :data:`TUNING_PATH`
+so that later sessions can use it directly.  The table is not saved if
+the directory is not writable.  Without tuning the driver chooses the
+local size, as before.  Tuning has not yet been benchmarked on CPU OpenCL
+drivers such as pocl; use explore/ocl_worksize.py to compare local sizes.
 """
 from __future__ import print_function
 
 import os
+from os.path import join as joinpath, expanduser, exists, dirname
+import json
 import warnings
 import logging
 import time
@@ -71,10 +83,11 @@ from pyopencl import mem_flags as mf
 from pyopencl.characterize import get_fast_inaccurate_build_options
 
 from . import generate
+from . import perf
 from .kernel import KernelModel, Kernel
 
 try:
-    from typing import Tuple, Callable, Any
+    from typing import Tuple, Callable, Any, Dict, List, Optional
     from .modelinfo import ModelInfo
     from .details import CallDetails
 except ImportError:
@@ -110,6 +123,17 @@ fix_pyopencl_include()
 # of polydisperse parameters.
 MAX_LOOPS = 2048
 
+# Work group tuning.  Set TUNE to True to time the candidate local sizes
+# for each kernel, otherwise the OpenCL driver chooses the local size.  Set
+# TUNING_PATH to None to keep the tuned values for the current session only.
+TUNE = os.environ.get("SAS_OPENCL_TUNE", "").lower() not in ("", "none", "0", "false")
+TUNING_PATH = joinpath(expanduser("~"), ".sasmodels", "opencl_tuning.json")
+
+# Largest local size tried when tuning, and the number of repeats used to
+# time each candidate.
+MAX_TUNING_SIZE = 256
+TUNING_REPEATS = 3
+
 
 # Pragmas for enable OpenCL features.  Be sure to protect them so that they
 # still compile even if OpenCL is not present.
@@ -162,6 +186,19 @@ def get_warp(kernel, queue):
         cl.kernel_work_group_info.PREFERRED_WORK_GROUP_SIZE_MULTIPLE,
         queue.device)
 
+def get_boundary(kernel, queue):
+    # type: (cl.Kernel, cl.CommandQueue) -> int
+    """
+    Return the padding boundary for q vectors sent to *kernel* on *queue*.
+
+    This is the warp size rounded up to a power of two, but at least 16.
+    """
+    warp = get_warp(kernel, queue)
+    boundary = 16
+    while boundary < warp:
+        boundary *= 2
+    return boundary
+
 def _stretch_input(vector, dtype, extra=1e-3, boundary=32):
     # type: (np.ndarray, np.dtype, float, int) -> np.ndarray
     """
@@ -185,24 +222,29 @@ def _stretch_input(vector, dtype, extra=1e-3, boundary=32):
     return np.ascontiguousarray(vector, dtype=dtype)
 
 
-def compile_model(context, source, dtype, fast=False):
-    # type: (cl.Context, str, np.dtype, bool) -> cl.Program
+def compile_model(context, source, dtype, fast=False, mixed=False):
+    # type: (cl.Context, str, np.dtype, bool, bool) -> cl.Program
     """
     Build a model to run on the gpu.
 
     Returns the compiled program and its type.  The returned type will
     be float32 even if the desired type is float64 if any of the
     devices in the context do not support the cl_khr_fp64 extension.
+
+    If *mixed* is True, the polydispersity sums are accumulated in double
+    precision, which requires the cl_khr_fp64 extension.
     """
     dtype = np.dtype(dtype)
     if not all(has_type(d, dtype) for d in context.devices):
         raise RuntimeError("%s not supported for devices"%dtype)
+    if mixed and not all(has_type(d, generate.F64) for d in context.devices):
+        raise RuntimeError("mixed precision not supported for devices")
 
-    source_list = [generate.convert_type(source, dtype)]
+    source_list = [generate.convert_type(source, dtype, mixed)]
 
     if dtype == generate.F16:
         source_list.insert(0, _F16_PRAGMA)
-    elif dtype == generate.F64:
+    elif dtype == generate.F64 or mixed:
         source_list.insert(0, _F64_PRAGMA)
 
     # Note: USE_SINCOS makes the intel cpu slower under opencl
@@ -243,6 +285,7 @@ class GpuEnvironment(object):
         self.queues = [cl.CommandQueue(context, context.devices[0])
                        for context in self.context]
         self.compiled = {}
+        self.tuning = _load_tuning(TUNING_PATH) if TUNE else {}
 
     def has_type(self, dtype):
         # type: (np.dtype) -> bool
@@ -285,28 +328,105 @@ class GpuEnvironment(object):
             warnings.warn("pyopencl.create_some_context() failed")
             warnings.warn("the environment variable 'SAS_OPENCL' might not be set correctly")
 
-    def compile_program(self, name, source, dtype, fast, timestamp):
-        # type: (str, str, np.dtype, bool, float) -> cl.Program
+    def compile_program(self, name, source, dtype, fast, timestamp,
+                        mixed=False):
+        # type: (str, str, np.dtype, bool, float, bool) -> cl.Program
         """
         Compile the program for the device in the given context.
         """
         # Note: PyOpenCL caches based on md5 hash of source, options and device
         # so we don't really need to cache things for ourselves.  I'll do so
         # anyway just to save some data munging time.
-        key = "%s-%s%s"%(name, dtype, ("-fast" if fast else ""))
+        key = "%s-%s%s%s"%(name, dtype, ("-fast" if fast else ""),
+                           ("-mixed" if mixed else ""))
         # Check timestamp on program
         program, program_timestamp = self.compiled.get(key, (None, np.inf))
         if program_timestamp < timestamp:
             del self.compiled[key]
         if key not in self.compiled:
-            context = self.get_context(dtype)
+            context = self.get_context(generate.F64 if mixed else dtype)
             logging.info("building %s for OpenCL %s", key,
                          context.devices[0].name.strip())
-            program = compile_model(self.get_context(dtype),
-                                    str(source), dtype, fast)
+            program = compile_model(context, str(source), dtype, fast, mixed)
             self.compiled[key] = (program, timestamp)
         return program
 
+    def get_local_size(self, kernel, queue, precision):
+        # type: (cl.Kernel, cl.CommandQueue, str) -> Optional[int]
+        """
+        Return the tuned local work group size for *kernel* on *queue*.
+
+        *precision* identifies the program variant, such as "float32-mixed",
+        since the fast and mixed precision programs are tuned separately.
+
+        Returns None if the kernel has not yet been tuned for the device,
+        or if the driver default was the fastest choice.  Use
+        :meth:`has_local_size` to distinguish the two.
+        """
+        return self.tuning.get(_tuning_key(kernel, queue, precision), None)
+
+    def has_local_size(self, kernel, queue, precision):
+        # type: (cl.Kernel, cl.CommandQueue, str) -> bool
+        """
+        Return True if *kernel* has been tuned for the device.
+        """
+        return _tuning_key(kernel, queue, precision) in self.tuning
+
+    def set_local_size(self, kernel, queue, precision, local_size):
+        # type: (cl.Kernel, cl.CommandQueue, str, Optional[int]) -> None
+        """
+        Record the best local work group size for *kernel* on *queue*,
+        saving it to :data:`TUNING_PATH`.
+        """
+        self.tuning[_tuning_key(kernel, queue, precision)] = local_size
+        _save_tuning(TUNING_PATH, self.tuning)
+
+def _tuning_key(kernel, queue, precision):
+    # type: (cl.Kernel, cl.CommandQueue, str) -> str
+    """
+    Key for the tuning table, which depends on device, kernel and precision.
+    """
+    return "%s:%s:%s"%(queue.device.name.strip(), kernel.function_name,
+                       precision)
+
+def _load_tuning(path):
+    # type: (Optional[str]) -> Dict[str, Optional[int]]
+    """
+    Load the table of tuned work group sizes from *path*, if it exists.
+    """
+    if path is None or not exists(path):
+        return {}
+    try:
+        with open(path) as fid:
+            return json.load(fid)
+    except Exception as exc:
+        warnings.warn("could not read OpenCL tuning from %r: %s"%(path, exc))
+        return {}
+
+def _save_tuning(path, tuning):
+    # type: (Optional[str], Dict[str, Optional[int]]) -> None
+    """
+    Save the table of tuned work group sizes to *path*.
+    """
+    if path is None:
+        return
+    # Don't complain if the home directory is read-only; the tuning is
+    # still used for the remainder of the session.
+    parent = dirname(path)
+    while not exists(parent) and dirname(parent) != parent:
+        parent = dirname(parent)
+    target = path if exists(path) else parent
+    if not os.access(target, os.W_OK):
+        logging.info("OpenCL tuning not saved: %r is read-only", target)
+        return
+    try:
+        if not exists(dirname(path)):
+            os.makedirs(dirname(path))
+        with open(path, 'w') as fid:
+            json.dump(tuning, fid, indent=2, sort_keys=True)
+    except Exception as exc:
+        warnings.warn("could not save OpenCL tuning to %r: %s"%(path, exc))
+
 def _get_default_context():
     # type: () -> List[cl.Context]
     """
@@ -377,24 +497,28 @@ class GpuModel(KernelModel):
     is an optional extension which may not be available on all devices.
     Half precision ('float16','half') may be available on some devices.
     Fast precision ('fast') is a loose version of single precision, indicating
-    that the compiler is allowed to take shortcuts.
+    that the compiler is allowed to take shortcuts.  Mixed precision
+    (*mixed=True* with single precision) accumulates the polydispersity
+    sums in double precision on devices which support it.
     """
-    def __init__(self, source, model_info, dtype=generate.F32, fast=False):
-        # type: (Dict[str,str], ModelInfo, np.dtype, bool) -> None
+    def __init__(self, source, model_info, dtype=generate.F32, fast=False,
+                 mixed=False):
+        # type: (Dict[str,str], ModelInfo, np.dtype, bool, bool) -> None
         self.info = model_info
         self.source = source
         self.dtype = dtype
         self.fast = fast
+        self.mixed = mixed and np.dtype(dtype) == generate.F32
         self.program = None # delay program creation
         self._kernels = None
 
     def __getstate__(self):
-        # type: () -> Tuple[ModelInfo, str, np.dtype, bool]
-        return self.info, self.source, self.dtype, self.fast
+        # type: () -> Tuple[ModelInfo, str, np.dtype, bool, bool]
+        return self.info, self.source, self.dtype, self.fast, self.mixed
 
     def __setstate__(self, state):
-        # type: (Tuple[ModelInfo, str, np.dtype, bool]) -> None
-        self.info, self.source, self.dtype, self.fast = state
+        # type: (Tuple[ModelInfo, str, np.dtype, bool, bool]) -> None
+        self.info, self.source, self.dtype, self.fast, self.mixed = state
         self.program = None
 
     def make_kernel(self, q_vectors):
@@ -407,17 +531,23 @@ class GpuModel(KernelModel):
                 self.source['opencl'],
                 self.dtype,
                 self.fast,
-                timestamp)
-            variants = ['Iq', 'Iqxy', 'Imagnetic']
+                timestamp,
+                self.mixed)
+            variants = ['Iq', 'Iqxy', 'Imagnetic', 'Iq_mono', 'Iqxy_mono']
             names = [generate.kernel_name(self.info, k) for k in variants]
-            kernels = [getattr(self.program, k) for k in names]
+            # The monodisperse variants may be missing from cached programs
+            # built before they were added; fall back to the full kernel.
+            kernels = [getattr(self.program, k, None) for k in names]
             self._kernels = dict((k, v) for k, v in zip(variants, kernels))
         is_2d = len(q_vectors) == 2
         if is_2d:
-            kernel = [self._kernels['Iqxy'], self._kernels['Imagnetic']]
+            kernel = [self._kernels['Iqxy'], self._kernels['Imagnetic'],
+                      self._kernels['Iqxy_mono']]
         else:
-            kernel = [self._kernels['Iq']]*2
-        return GpuKernel(kernel, self.dtype, self.info, q_vectors)
+            kernel = [self._kernels['Iq'], self._kernels['Iq'],
+                      self._kernels['Iq_mono']]
+        return GpuKernel(kernel, self.dtype, self.info, q_vectors,
+                         fast=self.fast, mixed=self.mixed)
 
     def release(self):
         # type: () -> None
@@ -448,38 +578,42 @@ class GpuInput(object):
     precision, so even if the program was created for double precision,
     the *GpuProgram.dtype* may be single precision.
 
+    *boundary* is the number of q points to pad to, which should be
+    a multiple of the preferred work group size of the kernel as returned
+    by :func:`get_boundary`.
+
+    *context* is the OpenCL context for the q buffer, which defaults to
+    the context for *dtype*.
+
     Call :meth:`release` when complete.  Even if not called directly, the
     buffer will be released when the data object is freed.
     """
-    def __init__(self, q_vectors, dtype=generate.F32):
-        # type: (List[np.ndarray], np.dtype) -> None
+    def __init__(self, q_vectors, dtype=generate.F32, boundary=32,
+                 context=None):
+        # type: (List[np.ndarray], np.dtype, int, cl.Context) -> None
         # TODO: do we ever need double precision q?
         env = environment()
         self.nq = q_vectors[0].size
         self.dtype = np.dtype(dtype)
         self.is_2d = (len(q_vectors) == 2)
-        # TODO: stretch input based on get_warp()
-        # not doing it now since warp depends on kernel, which is not known
-        # at this point, so instead using 32, which is good on the set of
-        # architectures tested so far.
+        self.boundary = boundary
+        # Note: +4 beyond the boundary because results is 4 elements
+        # longer than input.
+        width = ((self.nq + boundary + 3)//boundary)*boundary
         if self.is_2d:
-            # Note: 17 rather than 15 because results is 2 elements
-            # longer than input.
-            width = ((self.nq+17)//16)*16
             self.q = np.empty((width, 2), dtype=dtype)
             self.q[:self.nq, 0] = q_vectors[0]
             self.q[:self.nq, 1] = q_vectors[1]
         else:
-            # Note: 33 rather than 31 because results is 2 elements
-            # longer than input.
-            width = ((self.nq+33)//32)*32
             self.q = np.empty(width, dtype=dtype)
             self.q[:self.nq] = q_vectors[0]
         self.global_size = [self.q.shape[0]]
-        context = env.get_context(self.dtype)
+        if context is None:
+            context = env.get_context(self.dtype)
         #print("creating inputs of size", self.global_size)
         self.q_b = cl.Buffer(context, mf.READ_ONLY | mf.COPY_HOST_PTR,
                              hostbuf=self.q)
+        perf.count('cl_bytes_to_device', self.q.nbytes)
 
     def release(self):
         # type: () -> None
@@ -498,7 +632,8 @@ class GpuKernel(Kernel):
     """
     Callable SAS kernel.
 
-    *kernel* is the GpuKernel object to call
+    *kernel* is the list of GpuKernel objects to call for the normal,
+    magnetic and monodisperse calculations
 
     *model_info* is the module information
 
@@ -506,6 +641,11 @@ class GpuKernel(Kernel):
 
     *dtype* is the kernel precision
 
+    *fast* is True if the kernel was compiled with fast math.
+
+    *mixed* is True if the kernel accumulates the polydispersity sums in
+    double precision, and so returns double precision results.
+
     The resulting call method takes the *pars*, a list of values for
     the fixed parameters to the kernel, and *pd_pars*, a list of (value,weight)
     vectors for the polydisperse parameters.  *cutoff* determines the
@@ -514,23 +654,33 @@ class GpuKernel(Kernel):
 
     Call :meth:`release` when done with the kernel instance.
     """
-    def __init__(self, kernel, dtype, model_info, q_vectors):
-        # type: (cl.Kernel, np.dtype, ModelInfo, List[np.ndarray]) -> None
-        q_input = GpuInput(q_vectors, dtype)
+    def __init__(self, kernel, dtype, model_info, q_vectors, fast=False,
+                 mixed=False):
+        # type: (cl.Kernel, np.dtype, ModelInfo, List[np.ndarray], bool, bool) -> None
+        # Inputs and outputs for each kernel call
+        # Note: res may be shorter than res_b if global_size != nq
+        env = environment()
+        self.queue = env.get_queue(generate.F64 if mixed else dtype)
+
+        boundary = max(get_boundary(k, self.queue)
+                       for k in kernel if k is not None)
+        q_input = GpuInput(q_vectors, dtype, boundary=boundary,
+                           context=self.queue.context)
         self.kernel = kernel
         self.info = model_info
         self.dtype = dtype
+        # Fast and mixed precision programs differ from the plain program
+        # for the same dtype, so they get their own tuning entries.
+        self.precision = "%s%s%s"%(dtype, ("-fast" if fast else ""),
+                                   ("-mixed" if mixed else ""))
         self.dim = '2d' if q_input.is_2d else '1d'
-        # plus three for the normalization values
-        self.result = np.empty(q_input.nq+3, dtype)
-
-        # Inputs and outputs for each kernel call
-        # Note: res may be shorter than res_b if global_size != nq
-        env = environment()
-        self.queue = env.get_queue(dtype)
+        # plus four for the normalization and the cutoff counters
+        self.result = np.empty(q_input.nq+4,
+                               generate.F64 if mixed else dtype)
 
         self.result_b = cl.Buffer(self.queue.context, mf.READ_WRITE,
-                                  q_input.global_size[0] * dtype.itemsize)
+                                  q_input.global_size[0]
+                                  * self.result.dtype.itemsize)
         self.q_input = q_input # allocated by GpuInput above
 
         self._need_release = [self.result_b, self.q_input]
@@ -547,8 +697,15 @@ class GpuKernel(Kernel):
                               hostbuf=call_details.buffer)
         values_b = cl.Buffer(context, mf.READ_ONLY | mf.COPY_HOST_PTR,
                              hostbuf=values)
+        perf.count('cl_bytes_to_device',
+                   call_details.buffer.nbytes + values.nbytes)
 
-        kernel = self.kernel[1 if magnetic else 0]
+        if magnetic:
+            kernel = self.kernel[1]
+        elif call_details.num_active == 0 and self.kernel[2] is not None:
+            kernel = self.kernel[2]
+        else:
+            kernel = self.kernel[0]
         args = [
             np.uint32(self.q_input.nq), None, None,
             details_b, values_b, self.q_input.q_b, self.result_b,
@@ -557,15 +714,25 @@ class GpuKernel(Kernel):
         #print("Calling OpenCL")
         #call_details.show(values)
         # Call kernel and retrieve results
+        step = 1000000//self.q_input.nq + 1
+        local_size = self._local_size(kernel, args, call_details.num_eval, step)
+        global_size = self._global_size(local_size)
         wait_for = None
         last_nap = time.clock()
-        step = 1000000//self.q_input.nq + 1
-        for start in range(0, call_details.num_eval, step):
+        # The kernel returns the counters for each call, so copy them out
+        # after each call and sum them at the end.
+        starts = range(0, call_details.num_eval, step)
+        counts = np.empty((len(starts), 3), self.result.dtype)
+        offset = (self.q_input.nq+1)*self.result.dtype.itemsize
+        for k, start in enumerate(starts):
             stop = min(start + step, call_details.num_eval)
             #print("queuing",start,stop)
             args[1:3] = [np.int32(start), np.int32(stop)]
-            wait_for = [kernel(self.queue, self.q_input.global_size, None,
+            wait_for = [kernel(self.queue, global_size, local_size,
                                *args, wait_for=wait_for)]
+            wait_for = [cl.enqueue_copy(self.queue, counts[k], self.result_b,
+                                        device_offset=offset,
+                                        wait_for=wait_for, is_blocking=False)]
             if stop < call_details.num_eval:
                 # Allow other processes to run
                 wait_for[0].wait()
@@ -574,6 +741,7 @@ class GpuKernel(Kernel):
                     time.sleep(0.05)
                     last_nap = current_time
         cl.enqueue_copy(self.queue, self.result, self.result_b)
+        perf.count('cl_bytes_from_device', self.result.nbytes)
         #print("result", self.result)
 
         # Free buffers
@@ -581,12 +749,75 @@ class GpuKernel(Kernel):
             if v is not None: v.release()
 
         pd_norm = self.result[self.q_input.nq]
+        evaluated, skipped, skipped_weight = np.sum(counts, axis=0, dtype='d')
+        self.pd_counts = (int(evaluated), int(skipped), float(skipped_weight))
         scale = values[0]/(pd_norm if pd_norm!=0.0 else 1.0)
         background = values[1]
         #print("scale",scale,values[0],self.result[self.q_input.nq],background)
         return scale*self.result[:self.q_input.nq] + background
         # return self.result[:self.q_input.nq]
 
+    def _global_size(self, local_size):
+        # type: (Optional[int]) -> List[int]
+        """
+        Return the number of work items needed to cover the q vector.
+
+        Work items beyond *nq* return immediately, so the global size
+        can be padded to a multiple of the local size without extending
+        the q buffer.
+        """
+        if local_size is None:
+            return self.q_input.global_size
+        return [((self.q_input.nq + local_size - 1)//local_size)*local_size]
+
+    def _local_size(self, kernel, args, num_eval, step):
+        # type: (cl.Kernel, List[Any], int, int) -> Optional[int]
+        """
+        Return the local work group size for *kernel*, tuning it if needed.
+
+        Candidate sizes are multiples of the preferred work group size
+        multiple for the device, up to the limit for the kernel.  Each is
+        timed over the first block of the polydispersity loop, which is
+        recomputed by the call that follows, and the fastest is kept.
+        The driver default (None) is always one of the candidates.
+        """
+        if not TUNE:
+            return None
+        env = environment()
+        if env.has_local_size(kernel, self.queue, self.precision):
+            return env.get_local_size(kernel, self.queue, self.precision)
+
+        warp = get_warp(kernel, self.queue)
+        limit = min(MAX_TUNING_SIZE, kernel.get_work_group_info(
+            cl.kernel_work_group_info.WORK_GROUP_SIZE, self.queue.device))
+        candidates = [None]
+        size = warp
+        while size <= limit:
+            candidates.append(size)
+            size *= 2
+
+        args = args[:]
+        args[1:3] = [np.int32(0), np.int32(min(step, num_eval))]
+        best, best_time = None, np.inf
+        for local_size in candidates:
+            global_size = self._global_size(local_size)
+            try:
+                # Warm up, then time the remaining calls.
+                kernel(self.queue, global_size, local_size, *args).wait()
+                start = time.time()
+                for _ in range(TUNING_REPEATS):
+                    kernel(self.queue, global_size, local_size, *args).wait()
+                elapsed = time.time() - start
+            except cl.Error:
+                # Device rejected the work group size; try the next one.
+                continue
+            if elapsed < best_time:
+                best, best_time = local_size, elapsed
+        logging.info("tuned %s on %s: local size %s",
+                     kernel.function_name, self.queue.device.name.strip(), best)
+        env.set_local_size(kernel, self.queue, self.precision, best)
+        return best
+
     def release(self):
         # type: () -> None
         """
@@ -6,6 +6,20 @@ will attempt to compile with OpenMP flags so that the model can use all
 available kernels.  This may or may not be available on your compiler
 toolchain.  Depending on operating system and environment.
 
+If the environment variable *SAS_SIMD* is set, then sasmodels will build
+the models for that instruction set with auto-vectorization of the loop
+over q enabled.  For gcc, clang and mingw the value is the *-march* target,
+such as *native* for the machine doing the compile, or *haswell* for a
+specific processor family.  For msvc it is the */arch* target, such as
+*AVX2*.  It is ignored for tinycc.  Vectorized dlls are stored separately
+from portable dlls, with the target in the dll name.  The same can be
+done from python by setting *sasmodels.kerneldll.SIMD* before the model
+is loaded.  Results may differ from the portable build in the last digit
+since the compiler may use fused multiply-add instructions.  This is off
+by default: over the model library the vectorized builds were slower than
+the portable builds, with a geometric mean speed ratio of 0.91 for 1D and
+0.92 for 2D, so check with :mod:`sasmodels.bench` before using it.
+
 Windows does not have provide a compiler with the operating system.
 Instead, we assume that TinyCC is installed and available.  This can
 be done with a simple pip command if it is not already available::
@@ -68,6 +82,7 @@ from __future__ import print_function
 
 import sys
 import os
+import re
 from os.path import join as joinpath, splitext
 import subprocess
 import tempfile
@@ -89,7 +104,7 @@ from .exception import annotate_exception
 from .generate import F16, F32, F64
 
 try:
-    from typing import Tuple, Callable, Any
+    from typing import Tuple, Callable, Any, List, Optional
     from .modelinfo import ModelInfo
     from .details import CallDetails
 except ImportError:
@@ -110,6 +125,20 @@ elif os.name == 'nt':
 else:
     compiler = "unix"
 
+#: Instruction set target for vectorized dlls, or "" for portable dlls.
+SIMD = os.environ.get("SAS_SIMD", "")
+# Compiler flags for vectorized dlls, with {target} replaced by SIMD.
+SIMD_CC = []  # type: List[str]
+
+def simd_flags():
+    # type: () -> List[str]
+    """
+    Compiler flags for the vectorized build, or [] for a portable build.
+    """
+    if not SIMD:
+        return []
+    return [flag.format(target=SIMD) for flag in SIMD_CC]
+
 ARCH = "" if ct.sizeof(ct.c_void_p) > 4 else "x86"  # 4 byte pointers on x86
 if compiler == "unix":
     # Generic unix compile
@@ -119,9 +148,10 @@ if compiler == "unix":
     # add openmp support if not running on a mac
     if sys.platform != "darwin":
         CC.append("-fopenmp")
+    SIMD_CC = "-O3 -march={target} -fopenmp-simd -DUSE_SIMD".split()
     def compile_command(source, output):
         """unix compiler command"""
-        return CC + [source, "-o", output, "-lm"]
+        return CC + simd_flags() + [source, "-o", output, "-lm"]
 elif compiler == "msvc":
     # Call vcvarsall.bat before compiling to set path, headers, libs, etc.
     # MSVC compiler is available, so use it.  OpenMP requires a copy of
@@ -134,10 +164,11 @@ elif compiler == "msvc":
     CC = "cl /nologo /Ox /MD /W3 /GS- /DNDEBUG".split()
     if "SAS_OPENMP" in os.environ:
         CC.append("/openmp")
+    SIMD_CC = "/arch:{target} /DUSE_SIMD".split()
     LN = "/link /DLL /INCREMENTAL:NO /MANIFEST".split()
     def compile_command(source, output):
         """MSVC compiler command"""
-        return CC + ["/Tp%s"%source] + LN + ["/OUT:%s"%output]
+        return CC + simd_flags() + ["/Tp%s"%source] + LN + ["/OUT:%s"%output]
 elif compiler == "tinycc":
     # TinyCC compiler.
     CC = [tinycc.TCC] + "-shared -rdynamic -Wall".split()
@@ -149,9 +180,10 @@ elif compiler == "mingw":
     CC = "gcc -shared -std=c99 -O2 -Wall".split()
     if "SAS_OPENMP" in os.environ:
         CC.append("-fopenmp")
+    SIMD_CC = "-O3 -march={target} -fopenmp-simd -DUSE_SIMD".split()
     def compile_command(source, output):
         """mingw compiler command"""
-        return CC + [source, "-o", output, "-lm"]
+        return CC + simd_flags() + [source, "-o", output, "-lm"]
 
 # Windows-specific solution
 if os.name == 'nt':
@@ -184,14 +216,30 @@ def compile(source, output):
     if not os.path.exists(output):
         raise RuntimeError("compile failed.  File is in %r"%source)
 
-def dll_name(model_info, dtype):
-    # type: (ModelInfo, np.dtype) ->  str
+def _replace(source, target):
+    # type: (str, str) -> None
+    """
+    Rename *source* to *target*, replacing *target* if it exists.
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+    else:  # python 2
+        if os.name == 'nt' and os.path.exists(target):
+            os.unlink(target)
+        os.rename(source, target)
+
+def dll_name(model_info, dtype, mixed=False):
+    # type: (ModelInfo, np.dtype, bool) ->  str
     """
     Name of the dll containing the model.  This is the base file name without
-    any path or extension, with a form such as 'sas_sphere32'.
+    any path or extension, with a form such as 'sas_sphere32'.  Mixed
+    precision dlls have an 'm' after the number of bits, and vectorized
+    dlls end with the *SIMD* target.
     """
     bits = 8*dtype.itemsize
-    basename = "sas%d_%s"%(bits, model_info.id)
+    basename = "sas%d%s_%s"%(bits, "m" if mixed else "", model_info.id)
+    if simd_flags():
+        basename += "_" + re.sub(r"\W", "_", SIMD)
     basename += ARCH + ".so"
 
     # Hack to find precompiled dlls
@@ -202,17 +250,17 @@ def dll_name(model_info, dtype):
     return joinpath(DLL_PATH, basename)
 
 
-def dll_path(model_info, dtype):
-    # type: (ModelInfo, np.dtype) -> str
+def dll_path(model_info, dtype, mixed=False):
+    # type: (ModelInfo, np.dtype, bool) -> str
     """
     Complete path to the dll for the model.  Note that the dll may not
     exist yet if it hasn't been compiled.
     """
-    return os.path.join(DLL_PATH, dll_name(model_info, dtype))
+    return os.path.join(DLL_PATH, dll_name(model_info, dtype, mixed))
 
 
-def make_dll(source, model_info, dtype=F64):
-    # type: (str, ModelInfo, np.dtype) -> str
+def make_dll(source, model_info, dtype=F64, mixed=False):
+    # type: (str, ModelInfo, np.dtype, bool) -> str
     """
     Returns the path to the compiled model defined by *kernel_module*.
 
@@ -224,6 +272,9 @@ def make_dll(source, model_info, dtype=F64):
     the model should be single, double or long double precision.  The default
     is double precision, *np.dtype('d')*.
 
+    *mixed* is True if the polydispersity sums should be accumulated in
+    double precision when *dtype* is single precision.
+
     Set *sasmodels.ALLOW_SINGLE_PRECISION_DLLS* to False if single precision
     models are not allowed as DLLs.
 
@@ -235,8 +286,9 @@ def make_dll(source, model_info, dtype=F64):
     if dtype == F32 and not ALLOW_SINGLE_PRECISION_DLLS:
         dtype = F64  # Force 64-bit dll
     # Note: dtype may be F128 for long double precision
+    mixed = mixed and dtype == F32
 
-    dll = dll_path(model_info, dtype)
+    dll = dll_path(model_info, dtype, mixed)
 
     if not os.path.exists(dll):
         need_recompile = True
@@ -247,10 +299,14 @@ def make_dll(source, model_info, dtype=F64):
     if need_recompile:
         basename = splitext(os.path.basename(dll))[0] + "_"
         system_fd, filename = tempfile.mkstemp(suffix=".c", prefix=basename)
-        source = generate.convert_type(source, dtype)
+        source = generate.convert_type(source, dtype, mixed)
         with os.fdopen(system_fd, "w") as file_handle:
             file_handle.write(source)
-        compile(source=filename, output=dll)
+        # Compile to a private name then rename, so that processes building
+        # the same model at the same time never load a partial dll.
+        partial = "%s.%d" % (dll, os.getpid())
+        compile(source=filename, output=partial)
+        _replace(partial, dll)
         # comment the following to keep the generated c file
         # Note: if there is a syntax error then compile raises an error
         # and the source file will not be deleted.
@@ -259,8 +315,8 @@ def make_dll(source, model_info, dtype=F64):
     return dll
 
 
-def load_dll(source, model_info, dtype=F64):
-    # type: (str, ModelInfo, np.dtype) -> "DllModel"
+def load_dll(source, model_info, dtype=F64, mixed=False):
+    # type: (str, ModelInfo, np.dtype, bool) -> "DllModel"
     """
     Create and load a dll corresponding to the source, info pair returned
     from :func:`sasmodels.generate.make` compiled for the target precision.
@@ -268,8 +324,8 @@ def load_dll(source, model_info, dtype=F64):
     See :func:`make_dll` for details on controlling the dll path and the
     allowed floating point precision.
     """
-    filename = make_dll(source, model_info, dtype=dtype)
-    return DllModel(filename, model_info, dtype=dtype)
+    filename = make_dll(source, model_info, dtype=dtype, mixed=mixed)
+    return DllModel(filename, model_info, dtype=dtype, mixed=mixed)
 
 
 class DllModel(KernelModel):
@@ -284,15 +340,20 @@ class DllModel(KernelModel):
     for single and 'd', 'float64' or 'double' for double.  Double precision
     is an optional extension which may not be available on all devices.
 
+    *mixed* is True if the dll was compiled with :func:`make_dll` to
+    accumulate the polydispersity sums in double precision.
+
     Call :meth:`release` when done with the kernel.
     """
-    def __init__(self, dllpath, model_info, dtype=generate.F32):
-        # type: (str, ModelInfo, np.dtype) -> None
+    mixed = False
+    def __init__(self, dllpath, model_info, dtype=generate.F32, mixed=False):
+        # type: (str, ModelInfo, np.dtype, bool) -> None
         self.info = model_info
         self.dllpath = dllpath
         self._dll = None  # type: ct.CDLL
         self._kernels = None # type: List[Callable, Callable]
         self.dtype = np.dtype(dtype)
+        self.mixed = mixed and self.dtype == generate.F32
 
     def _load_dll(self):
         # type: () -> None
@@ -311,8 +372,18 @@ class DllModel(KernelModel):
         names = [generate.kernel_name(self.info, variant)
                  for variant in ("Iq", "Iqxy", "Imagnetic")]
         self._kernels = [self._dll[name] for name in names]
+        # Monodisperse kernels may be missing from precompiled dlls.
+        for variant in ("Iq_mono", "Iqxy_mono"):
+            try:
+                mono = self._dll[generate.kernel_name(self.info, variant)]
+            except AttributeError:
+                mono = None
+            self._kernels.append(mono)
         for k in self._kernels:
-            k.argtypes = argtypes
+            if k is not None:
+                k.argtypes = argtypes
+        # The magnetic kernel also takes the spin projection workspace.
+        self._kernels[2].argtypes = argtypes + [ct.c_void_p]
 
     def __getstate__(self):
         # type: () -> Tuple[ModelInfo, str]
@@ -330,8 +401,11 @@ class DllModel(KernelModel):
         if self._dll is None:
             self._load_dll()
         is_2d = len(q_vectors) == 2
-        kernel = self._kernels[1:3] if is_2d else [self._kernels[0]]*2
-        return DllKernel(kernel, self.info, q_input)
+        if is_2d:
+            kernel = [self._kernels[1], self._kernels[2], self._kernels[4]]
+        else:
+            kernel = [self._kernels[0], self._kernels[0], self._kernels[3]]
+        return DllKernel(kernel, self.info, q_input, mixed=self.mixed)
 
     def release(self):
         # type: () -> None
@@ -350,13 +424,18 @@ class DllKernel(Kernel):
     """
     Callable SAS kernel.
 
-    *kernel* is the c function to call.
+    *kernel* is the list of c functions to call for the normal, magnetic
+    and monodisperse calculations.  The monodisperse function, which may
+    be None, is used when no parameters are polydisperse.
 
     *model_info* is the module information
 
     *q_input* is the DllInput q vectors at which the kernel should be
     evaluated.
 
+    *mixed* is True if the kernel accumulates the polydispersity sums in
+    double precision, and so returns double precision results.
+
     The resulting call method takes the *pars*, a list of values for
     the fixed parameters to the kernel, and *pd_pars*, a list of (value, weight)
     vectors for the polydisperse parameters.  *cutoff* determines the
@@ -365,14 +444,18 @@ class DllKernel(Kernel):
 
     Call :meth:`release` when done with the kernel instance.
     """
-    def __init__(self, kernel, model_info, q_input):
-        # type: (Callable[[], np.ndarray], ModelInfo, PyInput) -> None
+    def __init__(self, kernel, model_info, q_input, mixed=False):
+        # type: (Callable[[], np.ndarray], ModelInfo, PyInput, bool) -> None
         self.kernel = kernel
         self.info = model_info
         self.q_input = q_input
         self.dtype = q_input.dtype
         self.dim = '2d' if q_input.is_2d else '1d'
-        self.result = np.empty(q_input.nq+1, q_input.dtype)
+        # plus four for the normalization and the cutoff counters
+        self.result = np.empty(q_input.nq+4, F64 if mixed else q_input.dtype)
+        # Workspace for the spin projections in the magnetic kernel,
+        # allocated on the first magnetic call.  See MAG_STRIDE in kernel_iq.c.
+        self._mag_q = None  # type: Optional[np.ndarray]
         self.real = (np.float32 if self.q_input.dtype == generate.F32
                      else np.float64 if self.q_input.dtype == generate.F64
                      else np.float128)
@@ -380,7 +463,12 @@ class DllKernel(Kernel):
     def __call__(self, call_details, values, cutoff, magnetic):
         # type: (CallDetails, np.ndarray, np.ndarray, float, bool) -> np.ndarray
 
-        kernel = self.kernel[1 if magnetic else 0]
+        if magnetic:
+            kernel = self.kernel[1]
+        elif call_details.num_active == 0 and self.kernel[2] is not None:
+            kernel = self.kernel[2]
+        else:
+            kernel = self.kernel[0]
         args = [
             self.q_input.nq, # nq
             None, # pd_start
@@ -391,16 +479,27 @@ class DllKernel(Kernel):
             self.result.ctypes.data,   # results
             self.real(cutoff), # cutoff
         ]
+        if magnetic and self.q_input.is_2d:
+            if self._mag_q is None:
+                self._mag_q = np.empty(5*self.q_input.nq, F64)
+            args.append(self._mag_q.ctypes.data)
         #print("Calling DLL")
         #call_details.show(values)
         step = 100
+        # The kernel returns the counters for each call; sum them here.
+        nq = self.q_input.nq
+        evaluated, skipped, skipped_weight = 0, 0, 0.
         for start in range(0, call_details.num_eval, step):
             stop = min(start + step, call_details.num_eval)
             args[1:3] = [start, stop]
             kernel(*args) # type: ignore
+            evaluated += int(self.result[nq+1])
+            skipped += int(self.result[nq+2])
+            skipped_weight += float(self.result[nq+3])
 
         #print("returned",self.q_input.q, self.result)
         pd_norm = self.result[self.q_input.nq]
+        self.pd_counts = (evaluated, skipped, skipped_weight)
         scale = values[0]/(pd_norm if pd_norm != 0.0 else 1.0)
         background = values[1]
         #print("scale",scale,background)
@@ -16,7 +16,7 @@ from .generate import F64
 from .kernel import KernelModel, Kernel
 
 try:
-    from typing import Union, Callable
+    from typing import Union, Callable, Tuple
 except:
     pass
 else:
@@ -161,8 +161,9 @@ class PyKernel(Kernel):
             raise NotImplementedError("Magnetism not implemented for pure python models")
         #print("Calling python kernel")
         #call_details.show(values)
-        res = _loops(self._parameter_vector, self._form, self._volume,
-                     self.q_input.nq, call_details, values, cutoff)
+        res, self.pd_counts = _loops(self._parameter_vector, self._form,
+                                     self._volume, self.q_input.nq,
+                                     call_details, values, cutoff)
         return res
 
     def release(self):
@@ -174,7 +175,7 @@ class PyKernel(Kernel):
         self.q_input = None
 
 def _loops(parameters, form, form_volume, nq, call_details, values, cutoff):
-    # type: (np.ndarray, Callable[[], np.ndarray], Callable[[], float], int, details.CallDetails, np.ndarray, np.ndarray, float) -> None
+    # type: (np.ndarray, Callable[[], np.ndarray], Callable[[], float], int, details.CallDetails, np.ndarray, np.ndarray, float) -> Tuple[np.ndarray, Tuple[int, int, float]]
     ################################################################
     #                                                              #
     #   !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!   #
@@ -190,12 +191,13 @@ def _loops(parameters, form, form_volume, nq, call_details, values, cutoff):
         pd_norm = float(form_volume())
         scale = values[0]/(pd_norm if pd_norm != 0.0 else 1.0)
         background = values[1]
-        return scale*form() + background
+        return scale*form() + background, (1, 0, 0.0)
 
     pd_value = values[2+n_pars:2+n_pars + call_details.num_weights]
     pd_weight = values[2+n_pars + call_details.num_weights:]
 
     pd_norm = 0.0
+    evaluated, skipped, skipped_weight = 0, 0, 0.0
     spherical_correction = 1.0
     partial_weight = np.NaN
     weight = np.NaN
@@ -230,6 +232,7 @@ def _loops(parameters, form, form_volume, nq, call_details, values, cutoff):
             spherical_correction = max(abs(cor), 1e-6)
         p0_index += 1
         if weight > cutoff:
+            evaluated += 1
             # Call the scattering function
             # Assume that NaNs are only generated if the parameters are bad;
             # exclude all q for that NaN.  Even better would be to have an
@@ -241,10 +244,13 @@ def _loops(parameters, form, form_volume, nq, call_details, values, cutoff):
             weight *= spherical_correction
             total += weight * Iq
             pd_norm += weight * form_volume()
+        else:
+            skipped += 1
+            skipped_weight += weight
 
     scale = values[0]/(pd_norm if pd_norm != 0.0 else 1.0)
     background = values[1]
-    return scale*total + background
+    return scale*total + background, (evaluated, skipped, skipped_weight)
 
 
 def _create_default_functions(model_info):
@@ -125,12 +125,17 @@ class MixtureKernel(Kernel):
         self.results = []  # type: List[np.ndarray]
         offset = 2 # skip scale & background
         parts = MixtureParts(self.info, self.kernels, call_details, values)
+        counts = [0, 0, 0.0]
         for kernel, kernel_details, kernel_values in parts:
             #print("calling kernel", kernel.info.name)
             result = kernel(kernel_details, kernel_values, cutoff, magnetic)
             #print(kernel.info.name, result)
             total += result
             self.results.append(result)
+            if kernel.pd_counts is not None:
+                counts = [a + b for a, b in zip(counts, kernel.pd_counts)]
+        # the counts are summed over the parts
+        self.pd_counts = tuple(counts)
 
         return scale*total + background
 
@@ -175,6 +180,9 @@ class MixtureParts(object):
 
         return kernel, call_details, values
 
+    # python 3 iterator protocol
+    __next__ = next
+
     def _part_details(self, info, par_index):
         # type: (ModelInfo, int) -> CallDetails
         full = self.call_details
@@ -41,22 +41,39 @@ model and value is the value to use for the test.  Any parameters not given
 in the parameter list will take on the default parameter value.
 
 Precision defaults to 5 digits (relative).
+
+Use *-j* to run the models in parallel, with one model at a time in each
+worker process, and *--incremental* to skip the models which have not
+changed since they last passed::
+
+    python -m sasmodels.model_test -j --incremental dll all
+
+The incremental record is kept in *~/.sasmodels/model_test.json*.  It
+stores a hash of each model file along with the generated kernel source,
+so changes to the C library files and kernel templates will trigger a
+retest, but changes to the python kernel drivers will not.  Delete the
+record, or run without *--incremental*, after changing the drivers.
 """
 from __future__ import print_function
 
 import sys
+import os
+import time
+import json
+import hashlib
 import unittest
 
 import numpy as np  # type: ignore
 
 from . import core
+from . import generate
 from .core import list_models, load_model_info, build_model
 from .direct_model import call_kernel, call_ER, call_VR
 from .exception import annotate_exception
 from .modelinfo import expand_pars
 
 try:
-    from typing import List, Iterator, Callable
+    from typing import List, Iterator, Callable, Dict, Tuple, Any
 except ImportError:
     pass
 else:
@@ -78,13 +95,7 @@ def make_suite(loaders, models):
     ModelTestCase = _hide_model_case_from_nose()
     suite = unittest.TestSuite()
 
-    if models[0] == 'all':
-        skip = models[1:]
-        models = list_models()
-    else:
-        skip = []
-    for model_name in models:
-        if model_name in skip: continue
+    for model_name in _expand_models(models):
         model_info = load_model_info(model_name)
 
         #print('------')
@@ -132,6 +143,18 @@ def make_suite(loaders, models):
     return suite
 
 
+def _expand_models(models):
+    # type: (List[str]) -> List[str]
+    """
+    Return the list of model names, expanding *["all", skip1, skip2, ...]*
+    to all models except those skipped.
+    """
+    if models[0] == 'all':
+        skip = models[1:]
+        return [name for name in list_models() if name not in skip]
+    return list(models)
+
+
 def _hide_model_case_from_nose():
     # type: () -> type
     class ModelTestCase(unittest.TestCase):
@@ -149,6 +172,7 @@ def _hide_model_case_from_nose():
             self.info = model_info
             self.platform = platform
             self.dtype = dtype
+            self._kernels = {}  # type: Dict[Tuple, Any]
 
             setattr(self, test_method_name, self.run_all)
             unittest.TestCase.__init__(self, test_method_name)
@@ -191,6 +215,23 @@ def _hide_model_case_from_nose():
             except:
                 annotate_exception(self.test_name)
                 raise
+            finally:
+                for kernel in self._kernels.values():
+                    kernel.release()
+                self._kernels = {}
+
+        def _get_kernel(self, model, q_vectors):
+            # type: (KernelModel, List[np.ndarray]) -> Any
+            """
+            Return a kernel for *q_vectors*, reusing the kernel from an
+            earlier test point with the same q values.
+            """
+            key = tuple(tuple(q) for q in q_vectors)
+            kernel = self._kernels.get(key, None)
+            if kernel is None:
+                kernel = model.make_kernel(q_vectors)
+                self._kernels[key] = kernel
+            return kernel
 
         def run_one(self, model, test):
             # type: (KernelModel, TestCondition) -> None
@@ -212,11 +253,11 @@ def _hide_model_case_from_nose():
             elif isinstance(x[0], tuple):
                 qx, qy = zip(*x)
                 q_vectors = [np.array(qx), np.array(qy)]
-                kernel = model.make_kernel(q_vectors)
+                kernel = self._get_kernel(model, q_vectors)
                 actual = call_kernel(kernel, pars)
             else:
                 q_vectors = [np.array(x)]
-                kernel = model.make_kernel(q_vectors)
+                kernel = self._get_kernel(model, q_vectors)
                 actual = call_kernel(kernel, pars)
 
             self.assertTrue(len(actual) > 0)
@@ -303,6 +344,142 @@ def run_one(model):
         stream.writeln("Note: no test suite created --- this should never happen")
 
 
+#: Record of the models which passed, for *--incremental*.
+TEST_RECORD = os.path.join(os.path.expanduser("~"), ".sasmodels",
+                           "model_test.json")
+
+def model_hash(model_info):
+    # type: (ModelInfo) -> str
+    """
+    Return a hash of the model definition file and the generated kernel
+    source, which includes the C library files and kernel templates.
+    """
+    digest = hashlib.sha1()
+    if model_info.filename and os.path.exists(model_info.filename):
+        with open(model_info.filename, 'rb') as fid:
+            digest.update(fid.read())
+    if not callable(model_info.Iq):
+        source = generate.make_source(model_info)
+        for key in sorted(source):
+            digest.update(source[key].encode('utf-8'))
+    return digest.hexdigest()
+
+def _load_record(path):
+    # type: (str) -> Dict[str, str]
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fid:
+            return json.load(fid)
+    except ValueError:  # corrupt record; retest everything
+        return {}
+
+def _save_record(path, record):
+    # type: (str, Dict[str, str]) -> None
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as fid:
+        json.dump(record, fid, indent=1, sort_keys=True)
+
+def _run_model_tests(args):
+    # type: (Tuple[List[str], str, int]) -> Tuple[str, int, int, str]
+    """
+    Run the tests for one model, returning the model name, the number of
+    tests run, the number of failures and errors, and the test output.
+
+    This is the task for the worker processes in :func:`run_models`.
+    """
+    loaders, model_name, verbosity = args
+    try:
+        from StringIO import StringIO  # python 2: unittest writes str
+    except ImportError:
+        from io import StringIO
+    stream = StringIO()
+    try:
+        suite = make_suite(loaders, [model_name])
+        runner = unittest.TextTestRunner(stream=stream, verbosity=verbosity)
+        result = runner.run(suite)
+        failed = len(result.failures) + len(result.errors)
+        return model_name, result.testsRun, failed, stream.getvalue()
+    except Exception:
+        import traceback
+        return model_name, 0, 1, traceback.format_exc()
+
+def run_models(loaders, models, processes=None, incremental=False,
+               record=TEST_RECORD, verbosity=1):
+    # type: (List[str], List[str], int, bool, str, int) -> int
+    """
+    Run the tests for *models* with a pool of *processes* workers, each
+    of which tests one model at a time.  *processes* defaults to the number
+    of CPUs; use *processes=1* to run in the current process.
+
+    If *incremental* is True, skip the models whose hash (see
+    :func:`model_hash`) matches the hash saved in the *record* file when
+    they last passed with the same *loaders*.  The record is updated with
+    the models that pass and cleared for those that fail.
+
+    The output for each model is printed when the model completes.
+    Returns 0 if success or 1 if any tests fail.
+    """
+    names = _expand_models(models)
+    tag = "+".join(sorted(loaders))
+    hashes = {}  # type: Dict[str, str]
+    previous = _load_record(record) if incremental else {}
+    pending = []
+    for name in names:
+        key = "%s %s" % (name, tag)
+        try:
+            hashes[key] = model_hash(load_model_info(name))
+        except Exception:
+            # Leave failures in model loading to the tests.
+            pass
+        if incremental and key in hashes and previous.get(key) == hashes[key]:
+            continue
+        pending.append(name)
+
+    tasks = [(loaders, name, verbosity) for name in pending]
+    start = time.time()
+    if processes == 1 or len(tasks) <= 1:
+        results = (_run_model_tests(task) for task in tasks)
+        pool = None
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(_run_model_tests, tasks)
+
+    total, failed_models = 0, []
+    try:
+        for name, count, failed, output in results:
+            total += count
+            key = "%s %s" % (name, tag)
+            if failed:
+                failed_models.append(name)
+                previous.pop(key, None)
+                print(output)
+            else:
+                if key in hashes:
+                    previous[key] = hashes[key]
+                if verbosity > 1:
+                    print(output)
+                else:
+                    print("%s ... ok (%d tests)" % (name, count))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if incremental:
+        _save_record(record, previous)
+    print("Ran %d tests for %d models in %.1f s; skipped %d unchanged models"
+          % (total, len(pending), time.time() - start,
+             len(names) - len(pending)))
+    if failed_models:
+        print("FAILED: %s" % ", ".join(sorted(failed_models)))
+        return 1
+    print("OK")
+    return 0
+
+
 def main(*models):
     # type: (*str) -> int
     """
@@ -317,11 +494,20 @@ def main(*models):
         from unittest import TextTestRunner as TestRunner
         test_args = {}
 
-    if models and models[0] == '-v':
-        verbosity = 2
+    verbosity = 1
+    processes = 0  # not parallel
+    incremental = False
+    while models and models[0].startswith('-'):
+        if models[0] == '-v':
+            verbosity = 2
+        elif models[0].startswith('-j'):
+            processes = int(models[0][2:]) if models[0][2:] else None
+        elif models[0] == '--incremental':
+            incremental = True
+        else:
+            print("unknown option %r" % models[0])
+            return 1
         models = models[1:]
-    else:
-        verbosity = 1
     if models and models[0] == 'opencl':
         if not core.HAVE_OPENCL:
             print("opencl is not available")
@@ -340,10 +526,17 @@ def main(*models):
     if not models:
         print("""\
 usage:
-  python -m sasmodels.model_test [-v] [opencl|dll] model1 model2 ...
+  python -m sasmodels.model_test [-v] [-j[N]] [--incremental] [opencl|dll] model1 model2 ...
 
 If -v is included on the command line, then use verbose output.
 
+If -j is included, then run the models in N worker processes, one model
+at a time in each worker.  N defaults to the number of CPUs.
+
+If --incremental is included, then skip the models which are unchanged
+since they last passed.  The record of passing models is kept in
+~/.sasmodels/model_test.json.
+
 If neither opencl nor dll is specified, then models will be tested with
 both OpenCL and dll; the compute target is ignored for pure python models.
 
@@ -353,6 +546,11 @@ If model1 is 'all', then all except the remaining models will be tested.
 
         return 1
 
+    if processes != 0 or incremental:
+        return run_models(loaders, list(models),
+                          processes=1 if processes == 0 else processes,
+                          incremental=incremental, verbosity=verbosity)
+
     runner = TestRunner(verbosity=verbosity, **test_args)
     result = runner.run(make_suite(loaders, models))
     return 1 if result.failures or result.errors else 0
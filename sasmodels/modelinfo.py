@@ -666,7 +666,7 @@ def _find_source_lines(model_info, kernel_module):
     Identify the location of the C source inside the model definition file.
 
     This code runs through the source of the kernel module looking for
-    lines that start with 'Iq', 'Iqxy' or 'form_volume'.  Clearly there are
+    lines that start with 'Iq', 'Iqxy', 'prepare' or 'form_volume'.  Clearly there are
     all sorts of reasons why this might not work (e.g., code commented out
     in a triple-quoted line block, code built using string concatenation,
     or code defined in the branch of an 'if' block), but it should work
@@ -680,6 +680,7 @@ def _find_source_lines(model_info, kernel_module):
     if (model_info.Iq is None
         and model_info.Iqxy is None
         and model_info.Imagnetic is None
+        and model_info.prepare is None
         and model_info.form_volume is None):
         return
 
@@ -697,6 +698,8 @@ def _find_source_lines(model_info, kernel_module):
             model_info._Iq_line = k+1
         elif v.startswith('form_volume'):
             model_info._form_volume_line = k+1
+        elif v.startswith('prepare'):
+            model_info._prepare_line = k+1
 
 
 def make_model_info(kernel_module):
@@ -742,6 +745,7 @@ def make_model_info(kernel_module):
     info.Iq = getattr(kernel_module, 'Iq', None) # type: ignore
     info.Iqxy = getattr(kernel_module, 'Iqxy', None) # type: ignore
     info.Imagnetic = getattr(kernel_module, 'Imagnetic', None) # type: ignore
+    info.prepare = getattr(kernel_module, 'prepare', None) # type: ignore
     info.profile = getattr(kernel_module, 'profile', None) # type: ignore
     info.sesans = getattr(kernel_module, 'sesans', None) # type: ignore
 
@@ -895,6 +899,16 @@ class ModelInfo(object):
     Iqxy = None             # type: Union[None, str, Callable[[np.ndarray], np.ndarray]]
     #: Returns *I(qx, qy, a, b, ...)*.  The interface follows :attr:`Iq`.
     Imagnetic = None        # type: Union[None, str, Callable[[np.ndarray], np.ndarray]]
+    #: Optional C code to precompute values which depend only on the
+    #: parameters.  The sources should define a *Scratch* structure to hold
+    #: the values, and the body of *prepare* fills in *scratch* given the
+    #: same parameters as :attr:`Iq`.  Alternatively, the sources can define
+    #: *static void prepare(double a, double b, ..., Scratch \*scratch)*
+    #: directly.  When present, *prepare* is called once for each point in
+    #: the polydispersity mesh, and *Iq* and *Iqxy* receive
+    #: *const Scratch \*scratch* as an additional final argument.  Only
+    #: available for C models.
+    prepare = None          # type: Optional[str]
     #: Returns a model profile curve *x, y*.  If *profile* is defined, this
     #: curve will appear in response to the *Show* button in SasView.  Use
     #: :attr:`profile_axes` to set the axis labels.  Note that *y* values
@@ -912,6 +926,7 @@ class ModelInfo(object):
     _Imagnetic_line = 1
     _Iqxy_line = 1
     _Iq_line = 1
+    _prepare_line = 1
     _form_volume_line = 1
 
 
@@ -112,7 +112,8 @@ parameters = [["sld",         "1e-6/Ang^2",   4, [-inf, inf], "sld",         "Ba
              ]
 # pylint: enable=bad-whitespace, line-too-long
 
-source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c", "barbell.c"]
+source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c", "lib/gauss76_sincos.c",
+          "barbell.c"]
 
 # parameters for demo
 demo = dict(scale=1, background=0,
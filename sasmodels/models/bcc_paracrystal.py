@@ -71,6 +71,35 @@ is SLOW. Go get some coffee. Fitting of any experimental data must be
 resolution smeared for any meaningful fit. This makes a triple integral.
 Very, very slow. Go get lunch!
 
+The orientation average for $Z(q)$ uses the symmetry of the lattice to
+integrate over 1/12 of the unit sphere, with a Gauss-Legendre rule in
+each of $\theta$ and $\phi$.  The number of points in each rule is set
+by the *quadrature* parameter to 20, 76 or 150, with 150 as the default.
+The relative error in $Z(q)$ compared to a 2000 point rule, for
+$g = 0.06$, is
+
+=========  ==========  ==========  ==========  =====================
+$qD$       20 point    76 point    150 point   previous (150 point)
+=========  ==========  ==========  ==========  =====================
+10         5.7e-1      3.2e-2      6.0e-4      2.5e-2
+47.4       5.8e-3      1.4e-6      4.1e-9      1.8e-4
+91.2       1.4e-5      6.0e-10     1.2e-14     3.4e-6
+=========  ==========  ==========  ==========  =====================
+
+"Previous" is the 150 point rule over the whole sphere used by earlier
+versions of the model.  The default rule is more accurate at every $qD$
+and about 10% faster.  The 76 point rule is about four times faster
+again, but near $qD = 10$ it is less accurate than the previous rule
+(3.2e-2 against 2.5e-2).  For 200 $q$ points on one core,
+the 20, 76 and 150 point rules take about 10, 130 and 500 ms, against
+550 ms for the previous rule.
+
+The quadrature is not adaptive and there is no error control: the same
+rule is used at every $q$ and its error is not estimated.  For $qD$ below
+about 5 the integrand is sharply peaked and none of the rules are
+accurate.  If a fit is done with the 20 or 76 point rule for speed,
+check the result with the 150 point rule.
+
 This example dataset is produced using 200 data points,
 *qmin* = 0.001 |Ang^-1|, *qmax* = 0.1 |Ang^-1| and the above default values.
 
@@ -114,6 +143,8 @@ category = "shape:paracrystal"
 #note - calculation requires double precision
 single = False
 
+QUADRATURE = ["20", "76", "150"]
+
 # pylint: disable=bad-whitespace, line-too-long
 #             ["name", "units", default, [lower, upper], "type","description" ],
 parameters = [["dnn",         "Ang",       220,    [-inf, inf], "",            "Nearest neighbour distance"],
@@ -123,11 +154,15 @@ parameters = [["dnn",         "Ang",       220,    [-inf, inf], "",            "
               ["sld_solvent", "1e-6/Ang^2",  1,    [-inf, inf], "sld",         "Solvent scattering length density"],
               ["theta",       "degrees",    60,    [-inf, inf], "orientation", "In plane angle"],
               ["phi",         "degrees",    60,    [-inf, inf], "orientation", "Out of plane angle"],
-              ["psi",         "degrees",    60,    [-inf, inf], "orientation", "Out of plane angle"]
+              ["psi",         "degrees",    60,    [-inf, inf], "orientation", "Out of plane angle"],
+              ["quadrature",  "",            2,    [QUADRATURE], "",           "Points in each dimension of the orientation average"]
              ]
 # pylint: enable=bad-whitespace, line-too-long
 
-source = ["lib/sph_j1c.c", "lib/gauss150.c", "lib/sphere_form.c", "bcc_paracrystal.c"]
+source = ["lib/sph_j1c.c", "lib/sphere_form.c", "lib/gauss20.c",
+          "lib/gauss20_sincos.c", "lib/gauss76.c", "lib/gauss76_sincos.c",
+          "lib/gauss150.c", "lib/gauss150_sincos.c", "lib/gauss_select.c",
+          "bcc_paracrystal.c"]
 
 # parameters for demo
 demo = dict(
@@ -140,3 +175,12 @@ demo = dict(
     phi_pd=15, phi_pd_n=0,
     psi_pd=15, psi_pd_n=0,
     )
+
+tests = [
+    # The 76 and 150 point orientation rules agree at qD = 47, but not
+    # at qD = 11.
+    [{'quadrature': 1}, 0.215268, 0.008668481],
+    [{'quadrature': 2}, 0.215268, 0.008668494],
+    [{'quadrature': 1}, 0.05, 0.7986634],
+    [{'quadrature': 2}, 0.05, 0.8030971],
+    ]
@@ -88,9 +88,9 @@ double Iq(double q, double sld, double solvent_sld,
     const double zb = M_PI_4;
     double total = 0.0;
     for (int i=0; i<76 ;i++) {
-        const double alpha= Gauss76Z[i]*zm + zb;
-        double sin_alpha, cos_alpha; // slots to hold sincos function output
-        SINCOS(alpha, sin_alpha, cos_alpha);
+        // sin, cos of alpha = Gauss76Z[i]*zm + zb
+        const double sin_alpha = Gauss76Sin[i];
+        const double cos_alpha = Gauss76Cos[i];
 
         const double cap_Fq = _cap_kernel(q, h, radius_cap, half_length, sin_alpha, cos_alpha);
         const double bj = sas_J1c(q*radius*sin_alpha);
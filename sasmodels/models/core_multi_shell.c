@@ -1,12 +1,4 @@
 
-static double
-f_constant(double q, double r, double sld)
-{
-  const double bes = sph_j1c(q * r);
-  const double vol = M_4PI_3 * cube(r);
-  return sld * vol * bes;
-}
-
 double
 form_volume(double core_radius, double n, double thickness[]);
 double
@@ -19,23 +11,46 @@ form_volume(double core_radius, double n, double thickness[])
   return M_4PI_3 * cube(r);
 }
 
-double
-Iq(double q, double core_sld, double core_radius,
-   double solvent_sld, double num_shells, double sld[], double thickness[]);
-double
-Iq(double q, double core_sld, double core_radius,
-   double solvent_sld, double num_shells, double sld[], double thickness[])
+// Interfaces between the core, the shells and the solvent.
+#define MAX_INTERFACES 11
+
+typedef struct {
+  int n;                        // number of interfaces
+  double r[MAX_INTERFACES];     // radius of each interface
+  double f[MAX_INTERFACES];     // volume times contrast at each interface
+} Scratch;
+
+static void
+prepare(double core_sld, double core_radius, double solvent_sld,
+        double num_shells, double sld[], double thickness[],
+        Scratch *scratch)
 {
   const int n = (int)ceil(num_shells);
-  double f, r, last_sld;
-  r = core_radius;
-  last_sld = core_sld;
-  f = 0.;
+  double r = core_radius;
+  double last_sld = core_sld;
   for (int i=0; i<n; i++) {
-    f += M_4PI_3 * cube(r) * (sld[i] - last_sld) * sph_j1c(q*r);
+    scratch->r[i] = r;
+    scratch->f[i] = M_4PI_3 * cube(r) * (sld[i] - last_sld);
     last_sld = sld[i];
     r += thickness[i];
   }
-  f += M_4PI_3 * cube(r) * (solvent_sld - last_sld) * sph_j1c(q*r);
+  scratch->r[n] = r;
+  scratch->f[n] = M_4PI_3 * cube(r) * (solvent_sld - last_sld);
+  scratch->n = n+1;
+}
+
+double
+Iq(double q, double core_sld, double core_radius,
+   double solvent_sld, double num_shells, double sld[], double thickness[],
+   const Scratch *scratch);
+double
+Iq(double q, double core_sld, double core_radius,
+   double solvent_sld, double num_shells, double sld[], double thickness[],
+   const Scratch *scratch)
+{
+  double f = 0.;
+  for (int i=0; i<scratch->n; i++) {
+    f += scratch->f[i] * sph_j1c(q*scratch->r[i]);
+  }
   return f * f * 1.0e-4;
 }
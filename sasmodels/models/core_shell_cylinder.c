@@ -15,6 +15,26 @@ double _cyl(double twovd, double besarg, double siarg)
     return twovd*si*bj;
 }
 
+static double
+_orient_avg(double core_qr, double core_qh, double core_twovd,
+    double shell_qr, double shell_qh, double shell_twovd, int n)
+{
+    GAUSS_TABLES(n, z, w);
+    GAUSS_SELECT_SINCOS(n, sin_alpha, cos_alpha);
+    double total = 0.0;
+    // double lower=0, upper=M_PI_2;
+    for (int i=0; i<n ;i++) {
+        // translate a point in [-1,1] to a point in [lower,upper]
+        //const double alpha = ( z[i]*(upper-lower) + upper + lower )/2.0;
+        const double sn = sin_alpha[i];
+        const double cn = cos_alpha[i];
+        const double fq = _cyl(core_twovd, core_qr*sn, core_qh*cn)
+            + _cyl(shell_twovd, shell_qr*sn, shell_qh*cn);
+        total += w[i] * fq * fq * sn;
+    }
+    return total;
+}
+
 double form_volume(double radius, double thickness, double length)
 {
     return M_PI*(radius+thickness)*(radius+thickness)*(length+2*thickness);
@@ -37,17 +57,13 @@ double Iq(double q,
     const double shell_qh = q*(0.5*length + thickness);
     const double shell_twovd = 2.0 * form_volume(radius,thickness,length)
                              * (shell_sld-solvent_sld);
+    int rule[2];
+    double frac[2];
+    const int nrules = gauss_select(fmax(shell_qr, shell_qh), rule, frac);
     double total = 0.0;
-    // double lower=0, upper=M_PI_2;
-    for (int i=0; i<76 ;i++) {
-        // translate a point in [-1,1] to a point in [lower,upper]
-        //const double alpha = ( Gauss76Z[i]*(upper-lower) + upper + lower )/2.0;
-        double sn, cn;
-        const double alpha = 0.5*(Gauss76Z[i]*M_PI_2 + M_PI_2);
-        SINCOS(alpha, sn, cn);
-        const double fq = _cyl(core_twovd, core_qr*sn, core_qh*cn)
-            + _cyl(shell_twovd, shell_qr*sn, shell_qh*cn);
-        total += Gauss76Wt[i] * fq * fq * sn;
+    for (int k=0; k<nrules; k++) {
+        total += frac[k] * _orient_avg(core_qr, core_qh, core_twovd,
+                                       shell_qr, shell_qh, shell_twovd, rule[k]);
     }
     // translate dx in [-1,1] to dx in [lower,upper]
     //const double form = (upper-lower)/2.0*total;
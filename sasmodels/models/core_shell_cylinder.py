@@ -129,7 +129,10 @@ parameters = [["sld_core", "1e-6/Ang^2", 4, [-inf, inf], "sld",
                "Out of plane angle"],
              ]
 
-source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c", "core_shell_cylinder.c"]
+source = ["lib/polevl.c", "lib/sas_J1.c",
+          "lib/gauss20.c", "lib/gauss76.c", "lib/gauss150.c",
+          "lib/gauss20_sincos.c", "lib/gauss76_sincos.c", "lib/gauss150_sincos.c",
+          "lib/gauss_select.c", "core_shell_cylinder.c"]
 
 def ER(radius, thickness, length):
     """
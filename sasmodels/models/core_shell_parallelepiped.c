@@ -70,7 +70,9 @@ double Iq(double q,
 		
 	    for(int j=0; j<nordj; j++) {
 
-            double uu = 0.5 * ( Gauss76Z[j] + 1.0 );
+            // sin, cos of 0.5*M_PI*uu with uu = 0.5 * ( Gauss76Z[j] + 1.0 )
+            const double sin_uu = Gauss76Sin[j];
+            const double cos_uu = Gauss76Cos[j];
             double mudum = mu * sqrt(1.0-sigma*sigma);
 
 	        double Vin = length_a * length_b * length_c;
@@ -88,10 +90,10 @@ double Iq(double q,
             double ta = (a_scaled+2.0*thick_rim_a)/length_b; 
             double tb = (a_scaled+2.0*thick_rim_b)/length_b;
     
-	        double arg1 = (0.5*mudum*a_scaled) * sin(0.5*M_PI*uu);
-	        double arg2 = (0.5*mudum) * cos(0.5*M_PI*uu);
-	        double arg3=  (0.5*mudum*ta) * sin(0.5*M_PI*uu);
-	        double arg4=  (0.5*mudum*tb) * cos(0.5*M_PI*uu);
+	        double arg1 = (0.5*mudum*a_scaled) * sin_uu;
+	        double arg2 = (0.5*mudum) * cos_uu;
+	        double arg3=  (0.5*mudum*ta) * sin_uu;
+	        double arg4=  (0.5*mudum*tb) * cos_uu;
 
 	        if(arg1==0.0){
 		        t1 = 1.0;
@@ -143,7 +143,7 @@ parameters = [["sld_core", "1e-6/Ang^2", 1, [-inf, inf], "sld",
                "Rotation angle around its own c axis against q plane"],
              ]
 
-source = ["lib/gauss76.c", "core_shell_parallelepiped.c"]
+source = ["lib/gauss76.c", "lib/gauss76_sincos.c", "core_shell_parallelepiped.c"]
 
 
 def ER(length_a, length_b, length_c, thick_rim_a, thick_rim_b, thick_rim_c):
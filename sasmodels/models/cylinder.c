@@ -1,6 +1,7 @@
 double form_volume(double radius, double length);
 double fq(double q, double sn, double cn,double radius, double length);
 double orient_avg_1D(double q, double radius, double length);
+double _orient_avg_1D(double q, double radius, double length, int n);
 double Iq(double q, double sld, double solvent_sld, double radius, double length);
 double Iqxy(double qx, double qy, double sld, double solvent_sld,
     double radius, double length, double theta, double phi);
@@ -20,24 +21,38 @@ double fq(double q, double sn, double cn, double radius, double length)
     return  sas_J1c(qr*sn) * sinc(qh*cn) ;
 }
 
-double orient_avg_1D(double q, double radius, double length)
+double _orient_avg_1D(double q, double radius, double length, int n)
 {
     // translate a point in [-1,1] to a point in [0, pi/2]
     const double zm = M_PI_4;
     const double zb = M_PI_4; 
 
+    GAUSS_TABLES(n, z, w);
+    GAUSS_SELECT_SINCOS(n, sin_alpha, cos_alpha);
     double total = 0.0;
-    for (int i=0; i<76 ;i++) {
-        const double alpha = Gauss76Z[i]*zm + zb;
-        double sn, cn; // slots to hold sincos function output
+    for (int i=0; i<n ;i++) {
         // alpha(theta,phi) the projection of the cylinder on the detector plane
-        SINCOS(alpha, sn, cn);
-        total += Gauss76Wt[i] * square( fq(q, sn, cn, radius, length) ) * sn;
+        // with alpha = z[i]*zm + zb
+        const double sn = sin_alpha[i];
+        const double cn = cos_alpha[i];
+        total += w[i] * square( fq(q, sn, cn, radius, length) ) * sn;
     }
     // translate dx in [-1,1] to dx in [lower,upper]
     return total*zm;
 }
 
+double orient_avg_1D(double q, double radius, double length)
+{
+    int rule[2];
+    double frac[2];
+    const int nrules = gauss_select(q*fmax(radius, 0.5*length), rule, frac);
+    double total = 0.0;
+    for (int k=0; k<nrules; k++) {
+        total += frac[k] * _orient_avg_1D(q, radius, length, rule[k]);
+    }
+    return total;
+}
+
 double Iq(double q,
     double sld,
     double solvent_sld,
@@ -124,7 +124,10 @@ parameters = [["sld", "1e-6/Ang^2", 4, [-inf, inf], "sld",
                "longitude"],
              ]
 
-source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c",  "cylinder.c"]
+source = ["lib/polevl.c", "lib/sas_J1.c",
+          "lib/gauss20.c", "lib/gauss76.c", "lib/gauss150.c",
+          "lib/gauss20_sincos.c", "lib/gauss76_sincos.c", "lib/gauss150_sincos.c",
+          "lib/gauss_select.c", "cylinder.c"]
 
 def ER(radius, length):
     """
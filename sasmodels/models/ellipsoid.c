@@ -19,23 +19,37 @@ double form_volume(double radius_polar, double radius_equatorial)
     return M_4PI_3*radius_polar*radius_equatorial*radius_equatorial;
 }
 
-double Iq(double q,
-    double sld,
-    double sld_solvent,
-    double radius_polar,
-    double radius_equatorial)
+static double
+_orient_avg(double q, double radius_polar, double radius_equatorial, int n)
 {
     // translate a point in [-1,1] to a point in [0, 1]
     const double zm = 0.5;
     const double zb = 0.5;
+    GAUSS_TABLES(n, z, w);
     double total = 0.0;
-    for (int i=0;i<76;i++) {
-        //const double sin_alpha = (Gauss76Z[i]*(upper-lower) + upper + lower)/2;
-        const double sin_alpha = Gauss76Z[i]*zm + zb;
-        total += Gauss76Wt[i] * _ellipsoid_kernel(q, radius_polar, radius_equatorial, sin_alpha);
+    for (int i=0;i<n;i++) {
+        //const double sin_alpha = (z[i]*(upper-lower) + upper + lower)/2;
+        const double sin_alpha = z[i]*zm + zb;
+        total += w[i] * _ellipsoid_kernel(q, radius_polar, radius_equatorial, sin_alpha);
     }
     // translate dx in [-1,1] to dx in [lower,upper]
-    const double form = total*zm;
+    return total*zm;
+}
+
+double Iq(double q,
+    double sld,
+    double sld_solvent,
+    double radius_polar,
+    double radius_equatorial)
+{
+    int rule[2];
+    double frac[2];
+    const int nrules = gauss_select(q*fmax(radius_polar, radius_equatorial),
+                                    rule, frac);
+    double form = 0.0;
+    for (int k=0; k<nrules; k++) {
+        form += frac[k] * _orient_avg(q, radius_polar, radius_equatorial, rule[k]);
+    }
     const double s = (sld - sld_solvent) * form_volume(radius_polar, radius_equatorial);
     return 1.0e-4 * s * s * form;
 }
@@ -1,43 +1,9 @@
 double form_volume(double radius);
-double Iq(double q,double dnn,double d_factor, double radius,double sld, double solvent_sld);
+double Iq(double q,double dnn,double d_factor, double radius,double sld, double solvent_sld,
+    double quadrature);
 double Iqxy(double qx, double qy, double dnn,
     double d_factor, double radius,double sld, double solvent_sld,
-    double theta, double phi, double psi);
-
-double _FCC_Integrand(double q, double dnn, double d_factor, double theta, double phi);
-double _FCCeval(double Theta, double Phi, double temp1, double temp3);
-
-
-double _FCC_Integrand(double q, double dnn, double d_factor, double theta, double phi) {
-
-	const double Da = d_factor*dnn;
-	const double temp1 = q*q*Da*Da;
-	const double temp3 = q*dnn;
-
-	double retVal = _FCCeval(theta,phi,temp1,temp3)/(4.0*M_PI);
-	return(retVal);
-}
-
-double _FCCeval(double Theta, double Phi, double temp1, double temp3) {
-
-	double result;
-        double sin_theta,cos_theta,sin_phi,cos_phi;
-	SINCOS(Theta, sin_theta, cos_theta);
-	SINCOS(Phi, sin_phi, cos_phi);
-
-	const double temp6 =  sin_theta;
-	const double temp7 =  sin_theta*sin_phi + cos_theta;
-	const double temp8 = -sin_theta*cos_phi + cos_theta;
-	const double temp9 = -sin_theta*cos_phi + sin_theta*sin_phi;
-
-	const double temp10 = exp((-1.0/8.0)*temp1*((temp7*temp7)+(temp8*temp8)+(temp9*temp9)));
-	result = pow((1.0-(temp10*temp10)),3)*temp6
-	    / ( (1.0 - 2.0*temp10*cos(0.5*temp3*temp7) + temp10*temp10)
-	      * (1.0 - 2.0*temp10*cos(0.5*temp3*temp8) + temp10*temp10)
-	      * (1.0 - 2.0*temp10*cos(0.5*temp3*temp9) + temp10*temp10));
-
-	return (result);
-}
+    double theta, double phi, double psi, double quadrature);
 
 double form_volume(double radius){
     return sphere_volume(radius);
@@ -46,38 +12,55 @@ double form_volume(double radius){
 
 double Iq(double q, double dnn,
   double d_factor, double radius,
-  double sld, double solvent_sld){
+  double sld, double solvent_sld, double quadrature){
 
 	//Volume fraction calculated from lattice symmetry and sphere radius
 	const double s1 = dnn*sqrt(2.0);
 	const double latticescale = 4.0*sphere_volume(radius/s1);
 
-    const double va = 0.0;
-    const double vb = 2.0*M_PI;
-    const double vaj = 0.0;
-    const double vbj = M_PI;
-
+    const double Da = d_factor*dnn;
+    const double temp1 = q*q*Da*Da;
+    const double temp3 = q*dnn;
+
+    // Orientation average over 1/12 of the unit sphere, in coordinates
+    // with the pole on the three fold axis of the primitive vectors.
+    // For the primitive vectors (0,1,1), (-1,0,1) and (-1,1,0) the axis
+    // is (-1,1,1).  Rotations about the axis by 2 pi/3 and reflections
+    // through the planes containing the axis and a primitive vector
+    // permute the vectors, and inversion changes their sign, leaving the
+    // integrand unchanged.
+    // Components of the primitive vectors in these coordinates.
+    const double a1 = 2.0/sqrt(6.0), a2 = -1.0/sqrt(6.0);
+    const double b2 = -1.0/sqrt(2.0);
+    const double c = 2.0/sqrt(3.0);
+
+    const int n = GAUSS_CHOICE(quadrature);
+    GAUSS_TABLES(n, z, w);
+    GAUSS_SELECT_SINCOS(n, sin_theta, cos_theta);
     double summ = 0.0;
-    double answer = 0.0;
-	for(int i=0; i<150; i++) {
-		//setup inner integral over the ellipsoidal cross-section
-		double summj=0.0;
-		const double zphi = ( Gauss150Z[i]*(vb-va) + va + vb )/2.0;		//the outer dummy is phi
-		for(int j=0;j<150;j++) {
-			//20 gauss points for the inner integral
-			double ztheta = ( Gauss150Z[j]*(vbj-vaj) + vaj + vbj )/2.0;		//the inner dummy is theta
-			double yyy = Gauss150Wt[j] * _FCC_Integrand(q,dnn,d_factor,ztheta,zphi);
-			summj += yyy;
-		}
-		//now calculate the value of the inner integral
-		double answer = (vbj-vaj)/2.0*summj;
-
-		//now calculate outer integral
-		summ = summ+(Gauss150Wt[i] * answer);
-	}		//final scaling is done at the end of the function, after the NT_FP64 case
-
-	answer = (vb-va)/2.0*summ;
-	answer = answer*sphere_form(q,radius,sld,solvent_sld)*latticescale;
+    for (int i=0; i<n; i++) {
+        double sin_phi, cos_phi;
+        SINCOS(M_PI/6.0*(z[i] + 1.0), sin_phi, cos_phi);
+        double summj = 0.0;
+        for (int j=0; j<n; j++) {
+            const double u = sin_theta[j]*cos_phi;
+            const double v = sin_theta[j]*sin_phi;
+            const double t = cos_theta[j];
+            const double temp7 = a1*u + c*t;
+            const double temp8 = a2*u + b2*v + c*t;
+            const double temp9 = a2*u - b2*v + c*t;
+            const double temp10 = exp((-1.0/8.0)*temp1*(temp7*temp7 + temp8*temp8 + temp9*temp9));
+            const double result = pow(1.0-(temp10*temp10),3)*sin_theta[j]
+                / ( (1.0 - 2.0*temp10*cos(0.5*temp3*temp7) + temp10*temp10)
+                  * (1.0 - 2.0*temp10*cos(0.5*temp3*temp8) + temp10*temp10)
+                  * (1.0 - 2.0*temp10*cos(0.5*temp3*temp9) + temp10*temp10));
+            summj += w[j] * result;
+        }
+        summ += w[i] * summj;
+    }
+    // 12 copies of theta in [0, pi/2], phi in [0, pi/3], over 4 pi steradians
+    double answer = 12.0*(M_PI/4.0)*(M_PI/6.0)*summ/(4.0*M_PI);
+    answer *= sphere_form(q,radius,sld,solvent_sld)*latticescale;
 
     return answer;
 
@@ -87,7 +70,7 @@ double Iq(double q, double dnn,
 
 double Iqxy(double qx, double qy, double dnn,
     double d_factor, double radius,double sld, double solvent_sld,
-    double theta, double phi, double psi){
+    double theta, double phi, double psi, double quadrature){
 
   double b3_x, b3_y, b1_x, b1_y, b2_x, b2_y; //b3_z,
   // double q_z;
@@ -19,9 +19,9 @@ elliptical_crosssection(double q, double a, double b)
     double summ=0.0;
 
     for(int i=0;i<N_POINTS_76;i++) {
-        double zi = ( Gauss76Z[i] + 1.0 )*M_PI/4.0;
-        double sn, cn;
-        SINCOS(zi, sn, cn);
+        // sin, cos of zi = ( Gauss76Z[i] + 1.0 )*M_PI/4.0
+        const double sn = Gauss76Sin[i];
+        const double cn = Gauss76Cos[i];
         double arg = q*sqrt(a*a*sn*sn+b*b*cn*cn);
         double yyy = pow((double)sas_J1c(arg),2);
         yyy *= Gauss76Wt[i];
@@ -108,7 +108,8 @@ parameters = [
     ]
 # pylint: enable=bad-whitespace, line-too-long
 
-source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c", "lib/wrc_cyl.c",
+source = ["lib/polevl.c", "lib/sas_J1.c", "lib/gauss76.c", "lib/gauss76_sincos.c",
+          "lib/wrc_cyl.c",
           "flexible_cylinder_elliptical.c"]
 
 demo = dict(scale=1.0, background=0.0001,
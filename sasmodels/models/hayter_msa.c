@@ -1,8 +1,19 @@
 // Hayter-Penfold (rescaled) MSA structure factor for screened Coulomb interactions 
 //
+// The MSA coefficients depend on the parameters but not on q, so they
+// are solved once per parameter set in prepare() and reused for each q.
+typedef struct {
+    double gMSAWave[17];
+    double diam;
+    int ierr;
+} Scratch;
+
 // C99 needs declarations of routines here
+static void prepare(double radius_effective, double VolFrac, double zz,
+      double Temp, double csalt, double dialec, Scratch *scratch);
 double Iq(double QQ,
-      double radius_effective, double zz, double VolFrac, double Temp, double csalt, double dialec);
+      double radius_effective, double VolFrac, double zz, double Temp,
+      double csalt, double dialec, const Scratch *scratch);
 int
 sqcoef(int ir, double gMSAWave[]);
 
@@ -10,21 +21,22 @@ int
 sqfun(int ix, int ir, double gMSAWave[]);
 
 double
-sqhcal(double qq, double gMSAWave[]);
+sqhcal(double qq, const double gMSAWave[]);
   
-double Iq(double QQ,
-      double radius_effective, double VolFrac, double zz, double Temp, double csalt, double dialec)
+static void prepare(double radius_effective, double VolFrac, double zz,
+      double Temp, double csalt, double dialec, Scratch *scratch)
 {
-    double gMSAWave[17]={1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17};
+    double *gMSAWave = scratch->gMSAWave;
 	double Elcharge=1.602189e-19;		// electron charge in Coulombs (C)
 	double kB=1.380662e-23;				// Boltzman constant in J/K
 	double FrSpPerm=8.85418782E-12;	//Permittivity of free space in C^2/(N m^2)
-	double SofQ, Qdiam, Vp, ss;
+	double Vp, ss;
 	double SIdiam, diam, Kappa, cs, IonSt;
 	double  Perm, Beta;
 	double pi, charge;
 	int ierr;
 	
+	for (int i=0; i<17; i++) gMSAWave[i] = i+1;
 	pi = M_PI;
 
 	diam=2*radius_effective;		//in A
@@ -52,7 +64,6 @@ double Iq(double QQ,
 	gMSAWave[5]=Beta*charge*charge/(pi*Perm*SIdiam*pow((2.0+Kappa*SIdiam),2));
 	
 	//         Finally set up dimensionless parameters 
-	Qdiam=QQ*diam;
 	gMSAWave[6] = Kappa*SIdiam;
 	gMSAWave[4] = VolFrac;
 	
@@ -64,12 +75,22 @@ double Iq(double QQ,
 	gMSAWave[9] = 2.0*ss*gMSAWave[5]*exp(gMSAWave[6]-gMSAWave[6]/ss);
 	
 	//        CALCULATE COEFFICIENTS, CHECK ALL IS WELL
-	//        AND IF SO CALCULATE S(Q*SIG)
 	
 	ierr=0;
 	ierr=sqcoef(ierr, gMSAWave);
-	if (ierr>=0) {
-		SofQ=sqhcal(Qdiam, gMSAWave);
+	scratch->diam = diam;
+	scratch->ierr = ierr;
+}
+
+double Iq(double QQ,
+      double radius_effective, double VolFrac, double zz, double Temp,
+      double csalt, double dialec, const Scratch *scratch)
+{
+	double SofQ;
+
+	//        IF ALL IS WELL CALCULATE S(Q*SIG)
+	if (scratch->ierr>=0) {
+		SofQ=sqhcal(QQ*scratch->diam, scratch->gMSAWave);
 	}else{
        	//SofQ=NaN;
 		SofQ=-1.0;
@@ -488,7 +509,7 @@ sqfun(int ix, int ir, double gMSAWave[])
 }
 
 double
-sqhcal(double qq, double gMSAWave[])
+sqhcal(double qq, const double gMSAWave[])
 {      	
     double SofQ,etaz,akz,gekz,e24,x1,x2,ck,sk,ak2,qk,q2k,qk2,qk3,qqk,sink,cosk,asink,qcosk,aqk,inter; 		
 	//	WAVE gMSAWave = $"root:HayPenMSA:gMSAWave"
@@ -126,6 +126,46 @@ tests = [
       'dielectconst': 78.0,
       'radius_effective_pd': 0.1,
       'radius_effective_pd_n': 40},
-     [0.00001, 0.0010, 0.01, 0.075], [0.450272, 0.450420, 0.465116, 1.039625]]
+     [0.00001, 0.0010, 0.01, 0.075], [0.450272, 0.450420, 0.465116, 1.039625]],
+    # Regression tests recorded before the MSA coefficients were moved out
+    # of the q loop, covering the small q Taylor expansion, high volume
+    # fraction, no added salt and strong coupling.
+    [{'radius_effective': 20.75,
+      'charge': 19.0,
+      'volfraction': 0.0192,
+      'temperature': 318.16,
+      'concentration_salt': 0.05,
+      'dielectconst': 71.08},
+     [0.0001, 0.001, 0.01, 0.05, 0.1, 0.2, 0.5],
+     [0.4566195, 0.4567628, 0.4715185, 0.8268645, 1.030617, 1.005359,
+      1.001381]],
+    [{'radius_effective': 30.0,
+      'charge': 40.0,
+      'volfraction': 0.2,
+      'temperature': 298.0,
+      'concentration_salt': 0.1,
+      'dielectconst': 78.0},
+     [0.0001, 0.001, 0.01, 0.05, 0.1, 0.2, 0.5],
+     [0.06342252, 0.0634494, 0.06625155, 0.203848, 1.30271, 1.010524,
+      0.9972283]],
+    [{'radius_effective': 15.0,
+      'charge': 10.0,
+      'volfraction': 0.3,
+      'temperature': 298.0,
+      'concentration_salt': 0.0,
+      'dielectconst': 78.0},
+     [0.0001, 0.001, 0.01, 0.05, 0.1, 0.2, 0.5],
+     [0.04456256, 0.0445674, 0.04507471, 0.05909575, 0.1346989, 1.56915,
+      0.9536739]],
+    [{'radius_effective': 50.0,
+      'charge': 80.0,
+      'volfraction': 0.01,
+      'temperature': 350.0,
+      'concentration_salt': 0.001,
+      'dielectconst': 60.0,
+      'radius_effective_pd': 0.1,
+      'radius_effective_pd_n': 40},
+     [0.0001, 0.001, 0.01, 0.05, 0.1, 0.2, 0.5],
+     [0.07784282, 0.0786675, 0.2225506, 0.9999194, 1.000793, 1.001, 1.001]],
     ]
 # ADDED by:  RKH  ON: 16Mar2016 converted from sasview, new Taylor expansion at smallest rescaled Q
@@ -39,32 +39,36 @@ double Iq(double q,
     
     for(int i=0; i<nordi; i++) {
 
-	    double theta = 0.5 * ( Gauss76Z[i]*(v1b-v1a) + v1a + v1b );	
+	    // sin, cos of theta = 0.5 * ( Gauss76Z[i]*(v1b-v1a) + v1a + v1b )
+	    const double sin_theta = Gauss76Sin[i];
+	    const double cos_theta = Gauss76Cos[i];
         
         // To check potential problems if denominator goes to zero here !!!
-        double termAL_theta = 8.0*cos(q*c_half*cos(theta)) / (q*q*sin(theta)*sin(theta));
-        double termAT_theta = 8.0*sin(q*c_half*cos(theta)) / (q*q*sin(theta)*cos(theta));
+        double termAL_theta = 8.0*cos(q*c_half*cos_theta) / (q*q*sin_theta*sin_theta);
+        double termAT_theta = 8.0*sin(q*c_half*cos_theta) / (q*q*sin_theta*cos_theta);
 
 	    double sumj = 0.0;
         
 	    for(int j=0; j<nordj; j++) {
 
-            double phi = 0.5 * ( Gauss76Z[j]*(v2b-v2a) + v2a + v2b ); 
+            // sin, cos of phi = 0.5 * ( Gauss76Z[j]*(v2b-v2a) + v2a + v2b )
+            const double sin_phi = Gauss76Sin[j];
+            const double cos_phi = Gauss76Cos[j];
             
             // Amplitude AL from eqn. (7c)
-            double AL = termAL_theta * sin(q*a_half*sin(theta)*sin(phi)) * 
-                sin(q*b_half*sin(theta)*cos(phi)) / (sin(phi)*cos(phi));
+            double AL = termAL_theta * sin(q*a_half*sin_theta*sin_phi) * 
+                sin(q*b_half*sin_theta*cos_phi) / (sin_phi*cos_phi);
 
             // Amplitude AT from eqn. (9)
-            double AT = termAT_theta * (  (cos(q*a_half*sin(theta)*sin(phi))*sin(q*b_half*sin(theta)*cos(phi))/cos(phi)) 
-                + (cos(q*b_half*sin(theta)*cos(phi))*sin(q*a_half*sin(theta)*sin(phi))/sin(phi)) );
+            double AT = termAT_theta * (  (cos(q*a_half*sin_theta*sin_phi)*sin(q*b_half*sin_theta*cos_phi)/cos_phi) 
+                + (cos(q*b_half*sin_theta*cos_phi)*sin(q*a_half*sin_theta*sin_phi)/sin_phi) );
 
             sumj += Gauss76Wt[j] * (AL+AT)*(AL+AT);
 
 	    }
 
 	    sumj = 0.5 * (v2b-v2a) * sumj;
-	    sumi += Gauss76Wt[i] * sumj * sin(theta);
+	    sumi += Gauss76Wt[i] * sumj * sin_theta;
 
     }
 
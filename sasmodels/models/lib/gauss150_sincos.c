@@ -0,0 +1,317 @@
+/*
+ *  sin and cos of the 150 point Gauss-Legendre nodes mapped to [0, pi/2],
+ *
+ *      alpha = pi/4 (Gauss150Z[i] + 1)
+ *
+ *  for orientation averages over alpha, which can use
+ *  Gauss150Sin[i] and Gauss150Cos[i] in place of SINCOS(alpha, sn, cn).
+ *
+ *  Use with the weights in lib/gauss150.c.  Generated from the Gauss150Z
+ *  table using numpy; regenerate if that table changes.
+ */
+
+constant double Gauss150Sin[150]={
+	0.00010026357929316378,
+	0.00052823482031195534,
+	0.001297991889027684,
+	0.0024093691301400192,
+	0.0038618995711938399,
+	0.005654947343664278,
+	0.0077877180646319759,
+	0.010259258463013827,
+	0.013068453804360494,
+	0.016214024445226419,
+	0.019694521832625815,
+	0.023508324058836894,
+	0.027653631030607431,
+	0.032128459297996757,
+	0.036930636585039839,
+	0.042057796064839982,
+	0.047507370423305988,
+	0.053276585757718833,
+	0.059362455358332476,
+	0.065761773423141878,
+	0.072471108757713218,
+	0.079486798513535975,
+	0.086804942019690898,
+	0.094421394763718025,
+	0.10233176257839463,
+	0.11053139609168564,
+	0.11901538549739336,
+	0.1277785557039984,
+	0.13681546191884375,
+	0.1461203857241605,
+	0.15568733170045262,
+	0.1655100246514607,
+	0.17558190748328947,
+	0.18589613978832281,
+	0.19644559718225763,
+	0.20722287143996801,
+	0.21822027147296863,
+	0.22942982518798682,
+	0.24084328226258842,
+	0.25245211786993921,
+	0.26424753738064349,
+	0.27622048206518862,
+	0.28836163581587476,
+	0.30066143290221858,
+	0.31311006676874364,
+	0.32569749987879848,
+	0.33841347460263616,
+	0.35124752514244917,
+	0.36418899048142983,
+	0.37722702833824567,
+	0.39035063010260557,
+	0.40354863672190616,
+	0.41680975550329274,
+	0.4301225777899097,
+	0.44347559746467446,
+	0.45685723022962127,
+	0.47025583360377904,
+	0.48365972757768722,
+	0.49705721585806589,
+	0.51043660763186982,
+	0.52378623977500016,
+	0.53709449942736032,
+	0.55034984685274557,
+	0.56354083849927705,
+	0.57665615017376426,
+	0.58968460024150127,
+	0.6026151727616188,
+	0.61543704046721726,
+	0.62813958749911658,
+	0.64071243180218207,
+	0.6531454470938205,
+	0.66542878431539587,
+	0.67755289247896955,
+	0.6895085388239337,
+	0.70128682820075683,
+	0.71287922160217443,
+	0.72427755376573955,
+	0.7354740497756409,
+	0.74646134059610492,
+	0.75723247747347266,
+	0.76778094514915785,
+	0.77810067383111781,
+	0.78818604987715479,
+	0.79803192514929144,
+	0.80763362500456903,
+	0.81698695489387896,
+	0.82608820554679974,
+	0.83493415672684002,
+	0.84352207954793523,
+	0.85184973734947289,
+	0.8599153851334842,
+	0.86771776757389729,
+	0.87525611561386829,
+	0.88253014167314137,
+	0.88954003349310751,
+	0.89628644665271484,
+	0.90277049579356705,
+	0.9089937445974452,
+	0.91495819456404182,
+	0.92066627264090584,
+	0.92612081776142818,
+	0.93132506635015311,
+	0.93628263685775159,
+	0.94099751339064175,
+	0.94547402850247564,
+	0.9497168452165482,
+	0.95373093834958755,
+	0.95752157520840897,
+	0.96109429573152427,
+	0.9644548921480286,
+	0.96760938822594234,
+	0.97056401818168758,
+	0.97332520532153577,
+	0.97589954048470784,
+	0.97829376035635351,
+	0.98051472571690945,
+	0.98256939969235779,
+	0.98446482606771157,
+	0.9862081077236553,
+	0.98780638525370612,
+	0.9892668158165534,
+	0.99059655227541221,
+	0.99180272267331482,
+	0.99289241009029106,
+	0.99387263292537786,
+	0.99475032564337418,
+	0.99553232002324976,
+	0.99622532694213217,
+	0.99683591872587962,
+	0.99737051209439098,
+	0.99783535172704885,
+	0.99823649447103968,
+	0.99857979421276111,
+	0.99887088743013364,
+	0.99911517944137374,
+	0.99931783136368768,
+	0.9994837477933981,
+	0.99961756521723,
+	0.99972364116286894,
+	0.9998060440954456,
+	0.99986854406531345,
+	0.9999146041113528,
+	0.99994737242306364,
+	0.99996967526387814,
+	0.99998401065744069,
+	0.99999254283804639,
+	0.99999709746598497,
+	0.99999915760817315,
+	0.9999998604839776,
+	0.99999999497360736
+};
+
+constant double Gauss150Cos[150]={
+	0.99999999497360736,
+	0.9999998604839776,
+	0.99999915760817315,
+	0.99999709746598497,
+	0.99999254283804639,
+	0.99998401065744069,
+	0.99996967526387814,
+	0.99994737242306364,
+	0.9999146041113528,
+	0.99986854406531345,
+	0.99980604409544571,
+	0.99972364116286894,
+	0.99961756521723,
+	0.9994837477933981,
+	0.99931783136368768,
+	0.99911517944137374,
+	0.99887088743013364,
+	0.99857979421276111,
+	0.99823649447103968,
+	0.99783535172704885,
+	0.99737051209439098,
+	0.99683591872587962,
+	0.99622532694213217,
+	0.99553232002324976,
+	0.99475032564337418,
+	0.99387263292537786,
+	0.99289241009029117,
+	0.99180272267331482,
+	0.99059655227541221,
+	0.9892668158165534,
+	0.98780638525370612,
+	0.9862081077236553,
+	0.98446482606771157,
+	0.98256939969235779,
+	0.98051472571690945,
+	0.97829376035635351,
+	0.97589954048470784,
+	0.97332520532153577,
+	0.97056401818168758,
+	0.96760938822594234,
+	0.9644548921480286,
+	0.96109429573152438,
+	0.95752157520840897,
+	0.95373093834958755,
+	0.9497168452165482,
+	0.94547402850247564,
+	0.94099751339064175,
+	0.9362826368577517,
+	0.93132506635015311,
+	0.92612081776142818,
+	0.92066627264090584,
+	0.91495819456404182,
+	0.90899374459744509,
+	0.90277049579356716,
+	0.89628644665271495,
+	0.88954003349310751,
+	0.88253014167314137,
+	0.8752561156138684,
+	0.86771776757389729,
+	0.85991538513348431,
+	0.851849737349473,
+	0.84352207954793523,
+	0.83493415672684002,
+	0.82608820554679985,
+	0.81698695489387896,
+	0.80763362500456903,
+	0.79803192514929144,
+	0.78818604987715479,
+	0.77810067383111792,
+	0.76778094514915785,
+	0.75723247747347266,
+	0.74646134059610503,
+	0.7354740497756409,
+	0.72427755376573966,
+	0.71287922160217454,
+	0.70128682820075694,
+	0.68950853882393381,
+	0.67755289247896955,
+	0.66542878431539598,
+	0.6531454470938205,
+	0.64071243180218207,
+	0.62813958749911658,
+	0.61543704046721726,
+	0.6026151727616188,
+	0.58968460024150127,
+	0.57665615017376437,
+	0.56354083849927705,
+	0.55034984685274557,
+	0.53709449942736043,
+	0.52378623977500027,
+	0.51043660763186982,
+	0.49705721585806589,
+	0.48365972757768738,
+	0.47025583360377904,
+	0.45685723022962127,
+	0.44347559746467458,
+	0.43012257778990987,
+	0.41680975550329269,
+	0.40354863672190616,
+	0.39035063010260573,
+	0.37722702833824567,
+	0.36418899048142978,
+	0.35124752514244933,
+	0.3384134746026361,
+	0.32569749987879848,
+	0.3131100667687437,
+	0.30066143290221864,
+	0.28836163581587482,
+	0.27622048206518879,
+	0.26424753738064344,
+	0.25245211786993921,
+	0.24084328226258853,
+	0.2294298251879868,
+	0.2182202714729686,
+	0.2072228714399679,
+	0.19644559718225765,
+	0.18589613978832292,
+	0.17558190748328947,
+	0.16551002465146095,
+	0.15568733170045268,
+	0.14612038572416058,
+	0.13681546191884389,
+	0.12777855570399851,
+	0.1190153854973935,
+	0.11053139609168566,
+	0.10233176257839462,
+	0.094421394763717997,
+	0.086804942019690953,
+	0.079486798513535989,
+	0.072471108757713357,
+	0.065761773423142017,
+	0.059362455358332643,
+	0.053276585757719083,
+	0.047507370423306113,
+	0.04205779606484001,
+	0.036930636585039915,
+	0.032128459297996827,
+	0.027653631030607573,
+	0.023508324058837099,
+	0.019694521832626041,
+	0.016214024445226505,
+	0.013068453804360369,
+	0.010259258463013789,
+	0.0077877180646321138,
+	0.0056549473436643067,
+	0.0038618995711939821,
+	0.0024093691301401692,
+	0.0012979918890277096,
+	0.00052823482031194818,
+	0.00010026357929320826
+};
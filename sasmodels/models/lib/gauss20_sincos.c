@@ -0,0 +1,57 @@
+/*
+ *  sin and cos of the 20 point Gauss-Legendre nodes mapped to [0, pi/2],
+ *
+ *      alpha = pi/4 (Gauss20Z[i] + 1)
+ *
+ *  for orientation averages over alpha, which can use
+ *  Gauss20Sin[i] and Gauss20Cos[i] in place of SINCOS(alpha, sn, cn).
+ *
+ *  Use with the weights in lib/gauss20.c.  Generated from the Gauss20Z
+ *  table using numpy; regenerate if that table changes.
+ */
+
+constant double Gauss20Sin[20]={
+	0.0053967593828706216,
+	0.028292606215245229,
+	0.068876344611014495,
+	0.12602126339566844,
+	0.19791506649202581,
+	0.28196612610587368,
+	0.37478434889458562,
+	0.4722927329959275,
+	0.56999155268170576,
+	0.66335575288224202,
+	0.74830417954066919,
+	0.82165055216405603,
+	0.88144175891503884,
+	0.92711201686940803,
+	0.95942436060840486,
+	0.98021917266265346,
+	0.99202754053108799,
+	0.99762520475027328,
+	0.99959968409036082,
+	0.9999854373880469
+};
+
+constant double Gauss20Cos[20]={
+	0.9999854373880469,
+	0.99959968409036082,
+	0.99762520475027328,
+	0.9920275405310881,
+	0.98021917266265357,
+	0.95942436060840486,
+	0.92711201686940803,
+	0.88144175891503884,
+	0.82165055216405603,
+	0.74830417954066908,
+	0.66335575288224191,
+	0.56999155268170587,
+	0.47229273299592756,
+	0.37478434889458556,
+	0.28196612610587357,
+	0.19791506649202595,
+	0.12602126339566855,
+	0.068876344611014467,
+	0.028292606215245448,
+	0.0053967593828706858
+};
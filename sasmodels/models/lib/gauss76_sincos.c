@@ -0,0 +1,169 @@
+/*
+ *  sin and cos of the 76 point Gauss-Legendre nodes mapped to [0, pi/2],
+ *
+ *      alpha = pi/4 (Gauss76Z[i] + 1)
+ *
+ *  for orientation averages over alpha, which can use
+ *  Gauss76Sin[i] and Gauss76Cos[i] in place of SINCOS(alpha, sn, cn).
+ *
+ *  Use with the weights in lib/gauss76.c.  Generated from the Gauss76Z
+ *  table using numpy; regenerate if that table changes.
+ */
+
+constant double Gauss76Sin[76]={
+	0.00038802723925129953,
+	0.0020437723944611414,
+	0.0050196370847963674,
+	0.0093111900080130022,
+	0.014911064849380387,
+	0.021809383610029529,
+	0.029993684314764159,
+	0.03944878707450359,
+	0.050156635546728147,
+	0.062096123498459076,
+	0.075242912793060432,
+	0.089569248792725042,
+	0.10504377934107011,
+	0.12163138370202231,
+	0.13929301796818455,
+	0.15798558347639979,
+	0.17766182466324543,
+	0.19827026254965349,
+	0.21975516965682881,
+	0.24205659162423199,
+	0.2651104201269015,
+	0.2888485208803207,
+	0.31319891958645757,
+	0.33808604762890798,
+	0.36343104818639993,
+	0.38915214222425248,
+	0.41516505256800385,
+	0.44138348299055574,
+	0.46771964798396692,
+	0.49408484767115635,
+	0.52039008117310182,
+	0.54654669071489648,
+	0.57246702785880599,
+	0.59806513252097104,
+	0.62325741488354591,
+	0.6479633299741826,
+	0.6721060345625508,
+	0.69561301612591353,
+	0.71841668396287228,
+	0.74045491308019773,
+	0.76167153222945683,
+	0.78201674840931601,
+	0.80144750125174968,
+	0.81992774194712126,
+	0.837428632701674,
+	0.85392866412637314,
+	0.86941368939174757,
+	0.88387687541294691,
+	0.89731857271714033,
+	0.90974610695853297,
+	0.92117349625479084,
+	0.93162109959689865,
+	0.94111520251171366,
+	0.94968754691734047,
+	0.95737481269628721,
+	0.96421805891620682,
+	0.97026213285444651,
+	0.97555505503743778,
+	0.98014738840058713,
+	0.98409159942422342,
+	0.98744141872499025,
+	0.99025120810091161,
+	0.99257534046475859,
+	0.9944675984775696,
+	0.99598059703525699,
+	0.99716523408832092,
+	0.99807017360828099,
+	0.99874136387286605,
+	0.99922159364094532,
+	0.99955008824031744,
+	0.99976214710627576,
+	0.99988882389246536,
+	0.9999566499307031,
+	0.99998740154240795,
+	0.99999791149501893,
+	0.99999992471742793
+};
+
+constant double Gauss76Cos[76]={
+	0.99999992471742793,
+	0.99999791149501893,
+	0.99998740154240795,
+	0.9999566499307031,
+	0.99988882389246536,
+	0.99976214710627576,
+	0.99955008824031744,
+	0.99922159364094532,
+	0.99874136387286605,
+	0.99807017360828099,
+	0.99716523408832092,
+	0.99598059703525699,
+	0.9944675984775696,
+	0.99257534046475859,
+	0.99025120810091161,
+	0.98744141872499025,
+	0.98409159942422342,
+	0.98014738840058713,
+	0.97555505503743789,
+	0.97026213285444662,
+	0.96421805891620682,
+	0.95737481269628721,
+	0.94968754691734047,
+	0.94111520251171366,
+	0.93162109959689865,
+	0.92117349625479084,
+	0.90974610695853297,
+	0.89731857271714033,
+	0.88387687541294691,
+	0.86941368939174768,
+	0.85392866412637325,
+	0.837428632701674,
+	0.81992774194712126,
+	0.80144750125174968,
+	0.78201674840931612,
+	0.76167153222945683,
+	0.74045491308019773,
+	0.71841668396287228,
+	0.69561301612591364,
+	0.67210603456255091,
+	0.6479633299741826,
+	0.62325741488354591,
+	0.59806513252097104,
+	0.57246702785880599,
+	0.54654669071489648,
+	0.52039008117310215,
+	0.4940848476711564,
+	0.46771964798396687,
+	0.4413834829905558,
+	0.4151650525680039,
+	0.38915214222425254,
+	0.36343104818639993,
+	0.33808604762890793,
+	0.31319891958645757,
+	0.28884852088032054,
+	0.26511042012690161,
+	0.24205659162423224,
+	0.2197551696568289,
+	0.19827026254965358,
+	0.17766182466324554,
+	0.15798558347639985,
+	0.13929301796818461,
+	0.1216313837020223,
+	0.10504377934107008,
+	0.08956924879272514,
+	0.075242912793060487,
+	0.062096123498459083,
+	0.050156635546728306,
+	0.039448787074503736,
+	0.029993684314764148,
+	0.021809383610029591,
+	0.014911064849380463,
+	0.009311190008013193,
+	0.0050196370847965088,
+	0.0020437723944613183,
+	0.00038802723925150743
+};
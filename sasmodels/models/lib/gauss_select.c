@@ -0,0 +1,99 @@
+/*
+ *  Select a Gauss-Legendre rule for orientation averaging.
+ *
+ *  Requires lib/gauss20.c, lib/gauss76.c and lib/gauss150.c.
+ *
+ *  The number of oscillations in the orientation integrand of a particle
+ *  is proportional to qd, the product of q and the largest dimension of
+ *  the particle (radius or half length).  At low qd the integrand is
+ *  smooth and the 20 point rule is enough; at high qd even the 76 point
+ *  rule is not enough, and the 150 point rule is used.
+ *
+ *  The thresholds keep the relative error of the cylinder and ellipsoid
+ *  orientation averages below 1e-6 compared to a 3000 point rule, for
+ *  aspect ratios from 1:20 to 20:1.  The 20 point rule reaches 1e-6 at
+ *  qd=12.9 for cylinders and 21.7 for ellipsoids; the 76 point rule at
+ *  qd=62.9 and 95.6 respectively.
+ *
+ *  Switching rules at a hard threshold would make I(q) jump by up to the
+ *  quadrature error as qd crosses it, which upsets the finite difference
+ *  derivatives used by the fitters.  Instead, gauss_select() blends the
+ *  lower and the higher rule with a smooth step over the band from
+ *  (1-GAUSS_SELECT_BLEND) times the threshold up to the threshold, so
+ *  I(q) and its derivative are continuous in qd.  Within the band both
+ *  rules are evaluated.
+ *
+ *  Usage, with the integral for a given rule in a separate function:
+ *
+ *      double integral(double q, ..., int n)
+ *      {
+ *          GAUSS_TABLES(n, z, w);
+ *          double total = 0.0;
+ *          for (int i=0; i<n; i++) total += w[i] * f(z[i]);
+ *          return total;
+ *      }
+ *
+ *      int rule[2];
+ *      double frac[2];
+ *      const int nrules = gauss_select(q*fmax(radius, 0.5*length), rule, frac);
+ *      double total = 0.0;
+ *      for (int k=0; k<nrules; k++) total += frac[k]*integral(q, ..., rule[k]);
+ *
+ *  For integrals over alpha in [0, pi/2], GAUSS_SELECT_SINCOS gives the
+ *  matching tables of sin(alpha) and cos(alpha), which also requires
+ *  lib/gauss20_sincos.c, lib/gauss76_sincos.c and lib/gauss150_sincos.c:
+ *
+ *      GAUSS_SELECT_SINCOS(n, sin_alpha, cos_alpha);
+ *      for (int i=0; i<n; i++) total += w[i] * f(sin_alpha[i], cos_alpha[i]);
+ *
+ *  GAUSS_CHOICE converts the value of a model parameter with the choices
+ *  ["20", "76", "150"] to the number of points in the rule:
+ *
+ *      const int n = GAUSS_CHOICE(quadrature);
+ *      GAUSS_TABLES(n, z, w);
+ */
+#define GAUSS_SELECT_QD_20 12.0
+#define GAUSS_SELECT_QD_76 60.0
+
+#define GAUSS_SELECT_BLEND 0.25
+
+#define GAUSS_TABLES(n, z, w) \
+    constant double *z = (n == 20 ? Gauss20Z : n == 76 ? Gauss76Z : Gauss150Z); \
+    constant double *w = (n == 20 ? Gauss20Wt : n == 76 ? Gauss76Wt : Gauss150Wt)
+
+#define GAUSS_SELECT_SINCOS(n, sn, cn) \
+    constant double *sn = (n == 20 ? Gauss20Sin : n == 76 ? Gauss76Sin : Gauss150Sin); \
+    constant double *cn = (n == 20 ? Gauss20Cos : n == 76 ? Gauss76Cos : Gauss150Cos)
+
+#define GAUSS_CHOICE(k) ((int)(k) == 0 ? 20 : (int)(k) == 1 ? 76 : 150)
+
+int gauss_select(double qd, int rule[2], double frac[2]);
+int gauss_select(double qd, int rule[2], double frac[2])
+{
+    int low;
+    double stop;
+    if (qd < GAUSS_SELECT_QD_20) {
+        low = 20;
+        stop = GAUSS_SELECT_QD_20;
+    } else if (qd < GAUSS_SELECT_QD_76) {
+        low = 76;
+        stop = GAUSS_SELECT_QD_76;
+    } else {
+        // Also used if qd is NaN.
+        rule[0] = 150;
+        frac[0] = 1.0;
+        return 1;
+    }
+    const double start = stop*(1.0 - GAUSS_SELECT_BLEND);
+    rule[0] = low;
+    if (qd <= start) {
+        frac[0] = 1.0;
+        return 1;
+    }
+    const double t = (qd - start)/(stop - start);
+    const double step = t*t*(3.0 - 2.0*t);
+    frac[0] = 1.0 - step;
+    rule[1] = (low == 20 ? 76 : 150);
+    frac[1] = step;
+    return 2;
+}
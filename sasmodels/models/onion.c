@@ -1,16 +1,45 @@
+// Each shell has an inner and an outer interface, plus the core and solvent.
+#define MAX_INTERFACES 22
+
+typedef struct {
+  int n;                        // number of interfaces
+  double r[MAX_INTERFACES];     // radius of the interface
+  double vol[MAX_INTERFACES];   // signed volume inside the interface
+  double alpha[MAX_INTERFACES]; // exponential decay rate, A r/thickness
+  double contrast[MAX_INTERFACES]; // weight of the exponential term
+  double flat[MAX_INTERFACES];  // weight of the constant term
+  int is_exp[MAX_INTERFACES];   // true if the shell profile is not flat
+} Scratch;
+
+static void
+add_interface(Scratch *scratch, double sign, double r, double sld_in,
+    double sld_out, double thickness, double A, double side)
+{
+  const int k = scratch->n++;
+  scratch->r[k] = r;
+  scratch->vol[k] = sign * M_4PI_3 * cube(r);
+  scratch->is_exp[k] = (fabs(A) > 0.0);
+  if (scratch->is_exp[k]) {
+    const double slope = (sld_out - sld_in)/expm1(A);
+    scratch->alpha[k] = A * r/thickness;
+    scratch->contrast[k] = slope*exp(A*side);
+    scratch->flat[k] = sld_in - slope;
+  } else {
+    scratch->alpha[k] = 0.0;
+    scratch->contrast[k] = 0.0;
+    scratch->flat[k] = sld_in;
+  }
+}
 
 static double
-f_exp(double q, double r, double sld_in, double sld_out,
-    double thickness, double A, double side)
+f_exp(double q, const Scratch *scratch, int k)
 {
-  const double vol = M_4PI_3 * cube(r);
-  const double qr = q * r;
-  const double bes = sph_j1c(qr);
-  const double alpha = A * r/thickness;
+  const double qr = q * scratch->r[k];
   double result;
   if (qr == 0.0) {
     result = 1.0;
-  } else if (fabs(A) > 0.0) {
+  } else if (scratch->is_exp[k]) {
+    const double alpha = scratch->alpha[k];
     const double qrsq = qr * qr;
     const double alphasq = alpha * alpha;
     const double sumsq = alphasq + qrsq;
@@ -19,13 +48,11 @@ f_exp(double q, double r, double sld_in, double sld_out,
     const double t1 = (alphasq - qrsq)*sinqr/qr - 2.0*alpha*cosqr;
     const double t2 = alpha*sinqr/qr - cosqr;
     const double fun = -3.0*(t1/sumsq - t2)/sumsq;
-    const double slope = (sld_out - sld_in)/expm1(A);
-    const double contrast = slope*exp(A*side);
-    result = contrast*fun + (sld_in-slope)*bes;
+    result = scratch->contrast[k]*fun + scratch->flat[k]*sph_j1c(qr);
   } else {
-    result = sld_in*bes;
+    result = scratch->flat[k]*sph_j1c(qr);
   }
-  return vol * result;
+  return scratch->vol[k] * result;
 }
 
 static double
@@ -39,21 +66,33 @@ form_volume(double core_radius, double n, double thickness[])
   return M_4PI_3*cube(r);
 }
 
-static double
-Iq(double q, double sld_core, double core_radius, double sld_solvent,
+static void
+prepare(double sld_core, double core_radius, double sld_solvent,
     double n_shells, double sld_in[], double sld_out[], double thickness[],
-    double A[])
+    double A[], Scratch *scratch)
 {
   int n = (int)(n_shells+0.5);
   double r_out = core_radius;
-  double f = f_exp(q, r_out, sld_core, 0.0, 0.0, 0.0, 0.0);
+  scratch->n = 0;
+  add_interface(scratch, 1.0, r_out, sld_core, 0.0, 0.0, 0.0, 0.0);
   for (int i=0; i < n; i++){
     const double r_in = r_out;
     r_out += thickness[i];
-    f -= f_exp(q, r_in, sld_in[i], sld_out[i], thickness[i], A[i], 0.0);
-    f += f_exp(q, r_out, sld_in[i], sld_out[i], thickness[i], A[i], 1.0);
+    add_interface(scratch, -1.0, r_in, sld_in[i], sld_out[i], thickness[i], A[i], 0.0);
+    add_interface(scratch, 1.0, r_out, sld_in[i], sld_out[i], thickness[i], A[i], 1.0);
+  }
+  add_interface(scratch, -1.0, r_out, sld_solvent, 0.0, 0.0, 0.0, 0.0);
+}
+
+static double
+Iq(double q, double sld_core, double core_radius, double sld_solvent,
+    double n_shells, double sld_in[], double sld_out[], double thickness[],
+    double A[], const Scratch *scratch)
+{
+  double f = 0.0;
+  for (int k=0; k < scratch->n; k++) {
+    f += f_exp(q, scratch, k);
   }
-  f -= f_exp(q, r_out, sld_solvent, 0.0, 0.0, 0.0, 0.0);
   const double f2 = f * f * 1.0e-4;
 
   return f2;
@@ -37,24 +37,16 @@ double form_volume(double length_a, double length_b, double length_c)
 }
 
 
-double Iq(double q,
-    double sld,
-    double solvent_sld,
-    double length_a,
-    double length_b,
-    double length_c)
+static double
+_orient_avg(double mu, double a_scaled, double c_scaled, int n)
 {
     double tmp1, tmp2;
-    
-    double mu = q * length_b;
-    
-    // Scale sides by B
-    double a_scaled = length_a / length_b;
-    double c_scaled = length_c / length_b;
-        
+
     //Order of integration
-    int nordi=76;			        
-    int nordj=76;
+    GAUSS_TABLES(n, z, w);
+    GAUSS_SELECT_SINCOS(n, sin_uu, cos_uu);
+    int nordi=n;
+    int nordj=n;
 
     // outer integral (with nordi gauss points), integration limits = 0, 1
     double summ = 0; //initialize integral
@@ -64,14 +56,14 @@ double Iq(double q,
         // inner integral (with nordj gauss points), integration limits = 0, 1
 	
         double summj = 0.0;
-	    double sigma = 0.5 * ( Gauss76Z[i] + 1.0 );		
+	    double sigma = 0.5 * ( z[i] + 1.0 );		
 		
 	    for(int j=0; j<nordj; j++) {
 
-            double uu = 0.5 * ( Gauss76Z[j] + 1.0 );
+            // sin_uu, cos_uu = sin, cos of 0.5*M_PI*uu with uu = 0.5*(z[j] + 1.0)
             double mudum = mu * sqrt(1.0-sigma*sigma);
-	        double arg1 = 0.5 * mudum * cos(0.5*M_PI*uu);
-	        double arg2 = 0.5 * mudum * a_scaled * sin(0.5*M_PI*uu);
+	        double arg1 = 0.5 * mudum * cos_uu[j];
+	        double arg2 = 0.5 * mudum * a_scaled * sin_uu[j];
             if(arg1==0.0) {
 	        tmp1 = 1.0;
             } else {
@@ -83,7 +75,7 @@ double Iq(double q,
                 tmp2 = sin(arg2)*sin(arg2)/arg2/arg2;
             }
 
-            summj += Gauss76Wt[j] * tmp1 * tmp2;
+            summj += w[j] * tmp1 * tmp2;
         }
 		
         // value of the inner integral
@@ -97,9 +89,35 @@ double Iq(double q,
         }
 		
 	    // sum of outer integral
-        summ += Gauss76Wt[i] * answer;
+        summ += w[i] * answer;
         
     }	
+
+    return summ;
+}
+
+
+double Iq(double q,
+    double sld,
+    double solvent_sld,
+    double length_a,
+    double length_b,
+    double length_c)
+{
+    double mu = q * length_b;
+    
+    // Scale sides by B
+    double a_scaled = length_a / length_b;
+    double c_scaled = length_c / length_b;
+
+    int rule[2];
+    double frac[2];
+    const int nrules = gauss_select(0.5*q*fmax(fmax(length_a, length_b), length_c),
+                                    rule, frac);
+    double summ = 0.0;
+    for (int k=0; k<nrules; k++) {
+        summ += frac[k] * _orient_avg(mu, a_scaled, c_scaled, rule[k]);
+    }
    
     const double vd = (sld-solvent_sld) * form_volume(length_a, length_b, length_c);
     
@@ -203,7 +203,9 @@ parameters = [["sld", "1e-6/Ang^2", 4, [-inf, inf], "sld",
                "Rotation angle around its own c axis against q plane"],
              ]
 
-source = ["lib/gauss76.c", "parallelepiped.c"]
+source = ["lib/gauss20.c", "lib/gauss76.c", "lib/gauss150.c",
+          "lib/gauss20_sincos.c", "lib/gauss76_sincos.c", "lib/gauss150_sincos.c",
+          "lib/gauss_select.c", "parallelepiped.c"]
 
 def ER(length_a, length_b, length_c):
     """
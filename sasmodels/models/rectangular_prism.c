@@ -39,23 +39,27 @@ double Iq(double q,
     
     for(int i=0; i<nordi; i++) {
 
-	    double theta = 0.5 * ( Gauss76Z[i]*(v1b-v1a) + v1a + v1b );	
+	    // sin, cos of theta = 0.5 * ( Gauss76Z[i]*(v1b-v1a) + v1a + v1b )
+	    const double sin_theta = Gauss76Sin[i];
+	    const double cos_theta = Gauss76Cos[i];
 
-	    double arg = q * c_half * cos(theta);
+	    double arg = q * c_half * cos_theta;
 	    if (fabs(arg) > 1.e-16) {termC = sin(arg)/arg;} else {termC = 1.0;}  
 
 	    double sumj = 0.0;
         
 	    for(int j=0; j<nordj; j++) {
 
-            double phi = 0.5 * ( Gauss76Z[j]*(v2b-v2a) + v2a + v2b ); 
+            // sin, cos of phi = 0.5 * ( Gauss76Z[j]*(v2b-v2a) + v2a + v2b )
+            const double sin_phi = Gauss76Sin[j];
+            const double cos_phi = Gauss76Cos[j];
 
 	        // Amplitude AP from eqn. (12), rewritten to avoid round-off effects when arg=0
 
-	        arg = q * a_half * sin(theta) * sin(phi); 
+	        arg = q * a_half * sin_theta * sin_phi; 
 	        if (fabs(arg) > 1.e-16) {termA = sin(arg)/arg;} else {termA = 1.0;}
 	       
-	        arg = q * b_half * sin(theta) * cos(phi); 
+	        arg = q * b_half * sin_theta * cos_phi; 
 	        if (fabs(arg) > 1.e-16) {termB = sin(arg)/arg;} else {termB = 1.0;}	  
                
 	        double AP = termA * termB * termC;  
@@ -65,7 +69,7 @@ double Iq(double q,
 	    }
 
 	    sumj = 0.5 * (v2b-v2a) * sumj;
-	    sumi += Gauss76Wt[i] * sumj * sin(theta);
+	    sumi += Gauss76Wt[i] * sumj * sin_theta;
 
     }
 
@@ -5,7 +5,8 @@ double Iq(double q,
           double d_factor,
           double radius,
           double sphere_sld,
-          double solvent_sld);
+          double solvent_sld,
+          double quadrature);
 
 double Iqxy(double qx, double qy,
             double dnn,
@@ -15,83 +16,50 @@ double Iqxy(double qx, double qy,
             double solvent_sld,
             double theta,
             double phi,
-            double psi);
+            double psi,
+            double quadrature);
 
 double form_volume(double radius)
 {
     return sphere_volume(radius);
 }
 
-static double
-sc_eval(double theta, double phi, double temp3, double temp4, double temp5)
-{
-    double cnt, snt;
-    SINCOS(theta, cnt, snt);
-
-    double cnp, snp;
-    SINCOS(phi, cnp, snp);
-
-	double temp6 = snt;
-	double temp7 = -1.0*temp3*snt*cnp;
-	double temp8 = temp3*snt*snp;
-	double temp9 = temp3*cnt;
-	double result = temp6/((1.0-temp4*cos((temp7))+temp5)*
-	                       (1.0-temp4*cos((temp8))+temp5)*
-	                       (1.0-temp4*cos((temp9))+temp5));
-	return (result);
-}
-
-static double
-sc_integrand(double dnn, double d_factor, double qq, double xx, double yy)
-{
-    //Function to calculate integrand values for simple cubic structure
-
-	double da = d_factor*dnn;
-	double temp1 = qq*qq*da*da;
-	double temp2 = pow( 1.0-exp(-1.0*temp1) ,3);
-	double temp3 = qq*dnn;
-	double temp4 = 2.0*exp(-0.5*temp1);
-	double temp5 = exp(-1.0*temp1);
-
-	double integrand = temp2*sc_eval(yy,xx,temp3,temp4,temp5);
-	integrand *= 2.0/M_PI;
-
-	return(integrand);
-}
-
 static
 double sc_crystal_kernel(double q,
           double dnn,
           double d_factor,
           double radius,
           double sphere_sld,
-          double solvent_sld)
+          double solvent_sld,
+          double quadrature)
 {
-	const double va = 0.0;
-	const double vb = M_PI/2.0; //orientation average, outer integral
-
-    double summ=0.0;
-    double answer=0.0;
-
-	for(int i=0;i<150;i++) {
-		//setup inner integral over the ellipsoidal cross-section
-		double summj=0.0;
-		double zi = ( Gauss150Z[i]*(vb-va) + va + vb )/2.0;
-		for(int j=0;j<150;j++) {
-			//150 gauss points for the inner integral
-			double zij = ( Gauss150Z[j]*(vb-va) + va + vb )/2.0;
-			double tmp = Gauss150Wt[j] * sc_integrand(dnn,d_factor,q,zi,zij);
-			summj += tmp;
-		}
-		//now calculate the value of the inner integral
-		answer = (vb-va)/2.0*summj;
-
-		//now calculate outer integral
-		double tmp = Gauss150Wt[i] * answer;
-		summ += tmp;
-	}		//final scaling is done at the end of the function, after the NT_FP64 case
-
-	answer = (vb-va)/2.0*summ;
+    const double da = d_factor*dnn;
+    const double temp1 = q*q*da*da;
+    const double temp2 = pow( 1.0-exp(-1.0*temp1) ,3);
+    const double temp3 = q*dnn;
+    const double temp4 = 2.0*exp(-0.5*temp1);
+    const double temp5 = exp(-1.0*temp1);
+
+    // Orientation average over the octant theta, phi in [0, pi/2], using
+    // the tables of sin and cos at the quadrature points for both angles.
+    const int n = GAUSS_CHOICE(quadrature);
+    GAUSS_TABLES(n, z, w);
+    GAUSS_SELECT_SINCOS(n, sin_z, cos_z);
+    double summ = 0.0;
+    for (int i=0; i<n; i++) {
+        const double temp7 = -temp3*sin_z[i];
+        const double temp8 = temp3*cos_z[i];
+        double summj = 0.0;
+        for (int j=0; j<n; j++) {
+            const double result = cos_z[j]/((1.0-temp4*cos(temp7*cos_z[j])+temp5)*
+                                             (1.0-temp4*cos(temp8*cos_z[j])+temp5)*
+                                             (1.0-temp4*cos(temp3*sin_z[j])+temp5));
+            summj += w[j] * result;
+        }
+        summ += w[i] * summj;
+    }
+    // 8 octants over 4 pi steradians
+    double answer = temp2*(2.0/M_PI)*(M_PI/4.0)*(M_PI/4.0)*summ;
 
 	//Volume fraction calculated from lattice symmetry and sphere radius
 	// NB: 4/3 pi r^3 / dnn^3 = 4/3 pi(r/dnn)^3
@@ -190,14 +158,16 @@ double Iq(double q,
           double d_factor,
           double radius,
           double sphere_sld,
-          double solvent_sld)
+          double solvent_sld,
+          double quadrature)
 {
     return sc_crystal_kernel(q,
               dnn,
               d_factor,
               radius,
               sphere_sld,
-              solvent_sld);
+              solvent_sld,
+              quadrature);
 }
 
 // Iqxy is never called since no orientation or magnetic parameters.
@@ -209,7 +179,8 @@ double Iqxy(double qx, double qy,
             double solvent_sld,
             double theta,
             double phi,
-            double psi)
+            double psi,
+            double quadrature)
 {
     double q = sqrt(qx*qx + qy*qy);
 
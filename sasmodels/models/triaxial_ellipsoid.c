@@ -26,8 +26,9 @@ double Iq(double q,
     double outer = 0.0;
     for (int i=0;i<76;i++) {
         //const double cos_alpha = (Gauss76Z[i]*(upper-lower) + upper + lower)/2;
-        const double x = 0.5*(Gauss76Z[i] + 1.0);
-        SINCOS(M_PI_2*x, sn, cn);
+        // sn, cn = sin, cos of M_PI_2*x with x = 0.5*(Gauss76Z[i] + 1.0)
+        sn = Gauss76Sin[i];
+        cn = Gauss76Cos[i];
         const double acosx2 = radius_equat_minor*radius_equat_minor*cn*cn;
         const double bsinx2 = radius_equat_major*radius_equat_major*sn*sn;
         const double c2 = radius_polar*radius_polar;
@@ -0,0 +1,226 @@
+"""
+Performance counters
+--------------------
+
+Record where the time goes when evaluating a model.  Each stage of the
+evaluation pipeline is timed separately:
+
+    *weights*     polydispersity weight generation
+    *details*     packing parameter values into the kernel arguments
+    *kernel*      running the kernel
+    *resolution*  applying the resolution function
+    *sesans*      transforming I(q) for SESANS data
+
+along with the following counters:
+
+    *pd_points*            polydispersity points evaluated after the cutoff
+    *q_points*             q points evaluated
+    *cl_bytes_to_device*   bytes copied to the OpenCL device
+    *cl_bytes_from_device* bytes copied from the OpenCL device
+
+Nothing is recorded unless a :class:`PerfStats` object is active, so the
+cost when disabled is a check of an empty list at each stage.  To record
+a block of code::
+
+    from sasmodels import perf
+    with perf.recording() as stats:
+        model(**pars)
+    stats.show()
+
+:class:`sasmodels.direct_model.DirectModel` and
+:class:`sasmodels.bumps_model.Experiment` record their own evaluations
+into *perf_stats* if it is set to a :class:`PerfStats` object.  Set the
+environment variable SAS_PERF=1 to create one for every model.
+"""
+from __future__ import print_function, division
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from typing import Dict, List, Iterator
+except ImportError:
+    pass
+
+#: True if SAS_PERF is set in the environment, in which case each
+#: :class:`sasmodels.direct_model.DataMixin` records its own statistics.
+ENABLED = os.environ.get("SAS_PERF", "").lower() not in ("", "0", "false", "none")
+
+#: Pipeline stages, in order of evaluation.
+STAGES = ("weights", "details", "kernel", "resolution", "sesans")
+
+# CRUFT: python 2 does not have perf_counter
+_clock = getattr(time, 'perf_counter', time.time)
+
+# Statistics objects which are currently recording.
+_active = []  # type: List["PerfStats"]
+
+
+class PerfStats(object):
+    """
+    Accumulated time per stage and event counts.
+
+    *calls[stage]* and *seconds[stage]* are the number of calls and the
+    total wall time for each stage timed, and *counters[name]* is the
+    total for each counter.
+    """
+    def __init__(self):
+        # type: () -> None
+        self.calls = {}  # type: Dict[str, int]
+        self.seconds = {}  # type: Dict[str, float]
+        self.counters = {}  # type: Dict[str, int]
+
+    def reset(self):
+        # type: () -> None
+        """
+        Clear the statistics.
+        """
+        self.calls.clear()
+        self.seconds.clear()
+        self.counters.clear()
+
+    def add_time(self, stage, seconds):
+        # type: (str, float) -> None
+        """
+        Add a call taking *seconds* to *stage*.
+        """
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        self.seconds[stage] = self.seconds.get(stage, 0.) + seconds
+
+    def add_count(self, name, n):
+        # type: (str, int) -> None
+        """
+        Add *n* to counter *name*.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self):
+        # type: () -> Dict[str, Dict]
+        """
+        Return the statistics as a dictionary of stages and counters,
+        with *{stage: {'calls': n, 'seconds': t}}* for the stages.
+        """
+        stages = dict((stage, {'calls': self.calls[stage],
+                               'seconds': self.seconds[stage]})
+                      for stage in self.calls)
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+    def show(self):
+        # type: () -> None
+        """
+        Print the statistics to the console.
+        """
+        order = [s for s in STAGES if s in self.calls]
+        order += sorted(s for s in self.calls if s not in STAGES)
+        for stage in order:
+            calls, seconds = self.calls[stage], self.seconds[stage]
+            print("%-12s %8d calls %10.3f ms %10.1f us/call"
+                  % (stage, calls, 1e3*seconds, 1e6*seconds/calls))
+        for name in sorted(self.counters):
+            print("%-22s %12d" % (name, self.counters[name]))
+
+
+@contextmanager
+def recording(stats=None):
+    # type: (PerfStats) -> Iterator[PerfStats]
+    """
+    Record statistics into *stats* while in the context.
+
+    A new :class:`PerfStats` is created if *stats* is not given.  The
+    statistics are also recorded into any enclosing context.
+    """
+    if stats is None:
+        stats = PerfStats()
+    if stats in _active:
+        # Already recording; don't count twice
+        yield stats
+        return
+    _active.append(stats)
+    try:
+        yield stats
+    finally:
+        _active.remove(stats)
+
+
+def enabled():
+    # type: () -> bool
+    """
+    Return True if statistics are being recorded.
+    """
+    return bool(_active)
+
+
+def count(name, n):
+    # type: (str, int) -> None
+    """
+    Add *n* to counter *name* in the active statistics.
+    """
+    for stats in _active:
+        stats.add_count(name, n)
+
+
+class _Timer(object):
+    __slots__ = ('stage', 'start')
+    def __init__(self, stage):
+        # type: (str) -> None
+        self.stage = stage
+        self.start = 0.
+
+    def __enter__(self):
+        self.start = _clock()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        elapsed = _clock() - self.start
+        for stats in _active:
+            stats.add_time(self.stage, elapsed)
+
+
+class _NullTimer(object):
+    __slots__ = ()
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage):
+    # type: (str) -> object
+    """
+    Return a context manager which times *stage* in the active statistics.
+    """
+    return _Timer(stage) if _active else _NULL_TIMER
+
+
+def test_perf():
+    """
+    Check that stages are recorded only when active.
+    """
+    import numpy as np  # type: ignore
+    from .core import load_model_info, build_model
+    from .data import empty_data1D
+    from .direct_model import DirectModel
+
+    model = build_model(load_model_info('sphere'), platform='dll')
+    calculator = DirectModel(empty_data1D(np.logspace(-3, -1, 20)), model,
+                             cutoff=0.)
+    calculator(radius_pd=0.1, radius_pd_n=10)
+    assert calculator.perf_stats is None or ENABLED
+
+    stats = PerfStats()
+    calculator.perf_stats = stats
+    with recording() as outer:
+        calculator(radius_pd=0.1, radius_pd_n=10)
+        calculator(radius_pd=0.1, radius_pd_n=10)
+    for s in (stats, outer):
+        assert s.calls['weights'] == 2 and s.calls['details'] == 2
+        assert s.calls['kernel'] == 2 and s.calls['resolution'] == 2
+        assert s.counters['pd_points'] == 20
+        assert s.counters['q_points'] == 40
+    calculator.perf_stats = None
+    calculator(radius_pd=0.1, radius_pd_n=10)
+    assert stats.calls['kernel'] == 2
+    assert stats.as_dict()['stages']['kernel']['calls'] == 2
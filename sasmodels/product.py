@@ -213,6 +213,8 @@ class ProductKernel(Kernel):
 
         # remember the parts for plotting later
         self.results = [p_result, s_result]
+        # the polydispersity mesh is defined by the form factor
+        self.pd_counts = self.p_kernel.pd_counts
 
         #import pylab as plt
         #plt.subplot(211); plt.loglog(self.p_kernel.q_input.q, p_result, '-')
@@ -154,6 +154,107 @@ class SchulzDispersion(Dispersion):
         return x, px
 
 
+def _hermite(npts):
+    """
+    Return Gauss-Hermite nodes and weights for integrating against the
+    standard normal distribution.
+    """
+    t, w = np.polynomial.hermite.hermgauss(npts)
+    return sqrt(2.0)*t, w
+
+
+def _laguerre(npts, alpha):
+    r"""
+    Return generalized Gauss-Laguerre nodes and weights for integrating
+    against $u^\alpha e^{-u}$, with the weights normalized to sum to one.
+
+    The nodes and weights are the eigenvalues and the squared first
+    components of the eigenvectors of the Jacobi matrix for the Laguerre
+    recurrence (Golub-Welsch).  Unlike the classical formulas, this does
+    not require $\Gamma(\alpha+1)$, so it is stable for large $\alpha$.
+    """
+    k = np.arange(npts)
+    diagonal = 2*k + alpha + 1
+    off_diagonal = np.sqrt(k[1:]*(k[1:] + alpha))
+    jacobi = np.diag(diagonal) + np.diag(off_diagonal, 1) + np.diag(off_diagonal, -1)
+    u, vectors = np.linalg.eigh(jacobi)
+    w = vectors[0]**2
+    return u, w/np.sum(w)
+
+
+class GaussHermiteDispersion(Dispersion):
+    r"""
+    Gaussian dispersion, with 1-\ $\sigma$ width, integrated using
+    Gauss-Hermite quadrature.
+
+    .. math::
+
+        w = \exp\left(-\tfrac12 (x - c)^2/\sigma^2\right)
+
+    The distribution is not truncated at *nsigmas*, which has no effect
+    for this type even though :meth:`get_pars` still reports it.  Instead
+    the nodes spread further into the tails as *npts* increases, reaching
+    about $\pm 6.4\sigma$ for 15 points.
+    """
+    type = "gaussian_hermite"
+    default = dict(npts=15, width=0, nsigmas=0)
+    def _weights(self, center, sigma, lb, ub):
+        t, w = _hermite(self.npts)
+        x = center + sigma*t
+        idx = (x >= lb) & (x <= ub)
+        return x[idx], w[idx]
+
+
+class LogNormalHermiteDispersion(Dispersion):
+    r"""
+    log Gaussian dispersion, with 1-\ $\sigma$ width, integrated using
+    Gauss-Hermite quadrature in $\ln x$.
+
+    .. math::
+
+        w = \frac{\exp\left(-\tfrac12 (\ln x - c)^2/\sigma^2\right)}{x\sigma}
+
+    As for *lognormal*, $\sigma$ is the width relative to the center,
+    which is the median of the distribution.  The range of the nodes is
+    set by *npts*, and *nsigmas* has no effect.
+    """
+    type = "lognormal_hermite"
+    default = dict(npts=30, width=0, nsigmas=0)
+    def _weights(self, center, sigma, lb, ub):
+        t, w = _hermite(self.npts)
+        # sigma in the lognormal function is in ln(R) space
+        sig = np.fabs(sigma/center)
+        x = center*np.exp(sig*t)
+        idx = (x >= max(lb, 1e-8)) & (x <= max(ub, 1e-8))
+        return x[idx], w[idx]
+
+
+class SchulzLaguerreDispersion(Dispersion):
+    r"""
+    Schultz dispersion, with 1-\ $\sigma$ width, integrated using
+    generalized Gauss-Laguerre quadrature.
+
+    .. math::
+
+        w = \frac{z^z\,R^{z-1}}{e^{Rz}\,c \Gamma(z)}
+
+    where $c$ is the center of the distribution, $R = x/c$ and $z=(c/\sigma)^2$.
+
+    Substituting $u = Rz$ gives the Laguerre weight $u^{z-1}e^{-u}$, so
+    the nodes are $x = c u_k/z$ for the Laguerre nodes $u_k$ with
+    $\alpha = z-1$.  The range of the nodes is set by *npts*, and *nsigmas*
+    has no effect.
+    """
+    type = "schulz_laguerre"
+    default = dict(npts=20, width=0, nsigmas=0)
+    def _weights(self, center, sigma, lb, ub):
+        z = (center/sigma)**2
+        u, w = _laguerre(self.npts, z-1)
+        x = center*u/z
+        idx = (x >= max(lb, 1e-8)) & (x <= max(ub, 1e-8))
+        return x[idx], w[idx]
+
+
 class ArrayDispersion(Dispersion):
     r"""
     Empirical dispersion curve.
@@ -195,6 +296,9 @@ MODELS = OrderedDict((d.type, d) for d in (
     LogNormalDispersion,
     GaussianDispersion,
     SchulzDispersion,
+    GaussHermiteDispersion,
+    LogNormalHermiteDispersion,
+    SchulzLaguerreDispersion,
 ))
 
 
@@ -209,6 +313,8 @@ def get_weights(disperser, n, width, nsigmas, value, limits, relative):
     *width* is the width of the disperser distribution.
 
     *nsigmas* is the number of sigmas to span for the dispersion convolution.
+    It is ignored by the quadrature types *gaussian_hermite*,
+    *lognormal_hermite* and *schulz_laguerre*.
 
     *value* is the value of the parameter in the model.
 
@@ -250,3 +356,41 @@ def plot_weights(model_info, pairs):
         pylab.grid(True)
         pylab.legend()
         #pylab.show()
+
+
+def test_quadrature_moments():
+    """
+    Check the mean and variance of the quadrature dispersions against the
+    analytic distributions, and their truncation at the limits.
+    """
+    center, width = 50., 0.2
+    sigma = width*center
+    lognormal_mean = center*np.exp(width**2/2)
+    lognormal_var = (np.exp(width**2) - 1)*lognormal_mean**2
+    for disperser, mean, var in (
+            ('gaussian_hermite', center, sigma**2),
+            ('lognormal_hermite', lognormal_mean, lognormal_var),
+            ('schulz_laguerre', center, sigma**2),
+        ):
+        npts = MODELS[disperser].default['npts']
+        # nsigmas is ignored, so any value gives the same weights
+        x, w = get_weights(disperser, npts, width, 3, center,
+                           (-np.inf, np.inf), True)
+        x0, w0 = get_weights(disperser, npts, width, 0, center,
+                             (-np.inf, np.inf), True)
+        assert (x == x0).all() and (w == w0).all()
+        assert len(x) == npts
+        w = w/np.sum(w)
+        actual_mean = np.sum(w*x)
+        actual_var = np.sum(w*(x - actual_mean)**2)
+        assert abs(actual_mean - mean) < 1e-10*mean, (disperser, actual_mean)
+        assert abs(actual_var - var) < 1e-8*var, (disperser, actual_var)
+
+        # Nodes outside the limits are dropped along with their weights.
+        lb, ub = center - sigma, center + 2*sigma
+        xt, wt = get_weights(disperser, npts, width, 3, center, (lb, ub), True)
+        keep = (x >= lb) & (x <= ub)
+        assert 0 < len(xt) < npts
+        assert (xt == x[keep]).all()
+        assert np.allclose(wt/np.sum(wt), w[keep]/np.sum(w[keep]))
+
@@ -41,7 +41,8 @@ setup(
     packages=[
         'sasmodels',
         'sasmodels.models',
-        'sasmodels.custom'
+        'sasmodels.custom',
+        'sasmodels.bench',
     ],
     package_data={
         'sasmodels.models': ['*.c', 'lib/*.c'],